@@ -1,36 +1,253 @@
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g, Response
 from flask_cors import CORS
 import sqlite3
 import pickle
 import os
-from werkzeug.security import generate_password_hash, check_password_hash
+import sys
+import json
+import csv
+import io
+import base64
+import hashlib
+import threading
+import time
 from datetime import datetime, timedelta
+from functools import wraps
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 
 app = Flask(__name__)
-CORS(app)  # Enable Cross-Origin Resource Sharing
+# Largest request body accepted (a full /api/predict/batch fits easily);
+# werkzeug and asgi.py answer 413 past it
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 2 * 1024 * 1024))
+# Enable Cross-Origin Resource Sharing. Dashboard polls send If-None-Match,
+# which needs a preflight; max_age lets the browser reuse it between polls
+CORS(app, expose_headers=['ETag'], max_age=int(os.environ.get('CORS_MAX_AGE', 600)))
 
 import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE = os.path.join(BASE_DIR, 'complaints.db')
-
-# Load model and vectorizer
-try:
-    with open(os.path.join(BASE_DIR, 'model.pkl'), 'rb') as f:
-        model = pickle.load(f)
-    print("Model loaded successfully.")
-except FileNotFoundError:
-    print("Error: model.pkl not found. Make sure to train the model first.")
-    model = None
-
-try:
-    with open(os.path.join(BASE_DIR, 'vectorizer.pkl'), 'rb') as f:
-        vectorizer = pickle.load(f)
-    print("Vectorizer loaded successfully.")
-except FileNotFoundError:
-    print("Error: vectorizer.pkl not found.")
-    vectorizer = None
+# Make sibling modules importable when served as backend.app (gunicorn)
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from artifacts import load_artifacts
+from batching import PredictionBatcher
+from registry import ModelRegistry
+from migrations import LATEST_VERSION, migrate
+from passwords import AuthBusy, PasswordVerifier, hash_password
+from inference import load_classifier, normalize_text, text_key_safe, SklearnClassifier
+from cache import TTLCache
+from events import EventBroker, EventStream
+from db import (ConnectionPool, connect, ensure_indexes, enable_zone_stats, disable_zone_stats,
+                ensure_change_versions, zone_version, INDEXES, ZONE_STATS_TRIGGERS, CHANGE_VERSION_TRIGGERS)
+
+DATABASE = os.environ.get('COMPLAINTS_DB', os.path.join(BASE_DIR, 'complaints.db'))
+
+# Load the classifier, first match wins:
+#   1. the registry version named by models/CURRENT (hot-swapped when
+#      CURRENT changes, see the MODEL HOT RELOAD section)
+#   2. the array artifacts in model_artifacts/ (python backend/artifacts.py export)
+#   3. the pickled sklearn model and vectorizer
+# Array artifacts are served by the NumPy engine (inference.py).
+MODEL_ARTIFACTS = os.environ.get('MODEL_ARTIFACTS', os.path.join(BASE_DIR, 'model_artifacts'))
+model_registry = ModelRegistry(os.environ.get('MODEL_REGISTRY', os.path.join(BASE_DIR, 'models')))
+
+def load_registry_version(version):
+    loaded = load_classifier(load_artifacts(model_registry.path(version)))
+    loaded.version = version
+    return loaded
+
+model = vectorizer = classifier = None
+if model_registry.current():
+    classifier = load_registry_version(model_registry.current())
+    print(f"Model {classifier.version} loaded from the registry.")
+elif os.path.exists(os.path.join(MODEL_ARTIFACTS, 'meta.json')):
+    classifier = load_classifier(load_artifacts(MODEL_ARTIFACTS))
+    print(f"Model artifacts loaded from {MODEL_ARTIFACTS}.")
+else:
+    try:
+        with open(os.path.join(BASE_DIR, 'model.pkl'), 'rb') as f:
+            model = pickle.load(f)
+        print("Model loaded successfully.")
+    except FileNotFoundError:
+        print("Error: model.pkl not found. Make sure to train the model first.")
+
+    try:
+        with open(os.path.join(BASE_DIR, 'vectorizer.pkl'), 'rb') as f:
+            vectorizer = pickle.load(f)
+        print("Vectorizer loaded successfully.")
+    except FileNotFoundError:
+        print("Error: vectorizer.pkl not found.")
+
+    if model and vectorizer:
+        classifier = SklearnClassifier(vectorizer, model, version='pickle')
+
+# Upper bound on complaints accepted by a single /api/predict/batch call
+MAX_PREDICT_BATCH = 1000
+
+# Set by asgi.py to classify in worker processes
+inference_pool = None
+
+def classify_texts(texts):
+    # Returns (category, model version) per text
+    current, pool = classifier, inference_pool
+    # The pool's workers hold the model they started with; after a swap
+    # classify in-thread until the pool is replaced
+    if pool is not None and pool.version == current.version:
+        categories = pool.classify(texts)
+    else:
+        # One transform + predict for the whole list of texts
+        categories = current.predict(texts)
+    return [(category, current.version) for category in categories]
+
+def swap_classifier(new_classifier):
+    # One assignment: requests see either the old or the new model, never a mix
+    global classifier
+    classifier = new_classifier
+
+# Coalesces concurrent /api/predict calls into one classify_texts() call.
+# A window of 0 ms disables batching.
+predict_batcher = PredictionBatcher(
+    classify_texts,
+    window_ms=float(os.environ.get('PREDICT_BATCH_WINDOW_MS', 5)),
+    max_batch=int(os.environ.get('PREDICT_BATCH_MAX', 64)),
+    timeout=float(os.environ.get('PREDICT_BATCH_TIMEOUT', 5)),
+)
+
+# Predicted category by normalized complaint text. Keys include the model
+# version, so a new artifact never answers from the old model's entries.
+# A size of 0 disables the cache.
+prediction_cache = TTLCache(maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)), default_ttl=0)
+
+def prediction_key(text):
+    if not prediction_cache.maxsize or not text_key_safe(classifier.params):
+        return None
+    return (classifier.version, normalize_text(text))
+
+def predict_category(text):
+    # Returns (category, model version). Results are cached under the
+    # version that produced them, even if the model was swapped meanwhile.
+    key = prediction_key(text)
+    category = prediction_cache.get(key) if key else None
+    if category is not None:
+        return category, key[0]
+    category, version = predict_batcher.predict(text)
+    if key:
+        prediction_cache.set((version, key[1]), category)
+    return category, version
+
+def predict_categories(texts):
+    # Cached results for repeated texts; one classify_texts() call for the
+    # distinct misses
+    keys = [prediction_key(text) for text in texts]
+    results = [None] * len(texts)
+    pending = {}  # cache key (or index, if uncacheable) -> indices of those texts
+    for i, key in enumerate(keys):
+        category = prediction_cache.get(key) if key else None
+        if category is not None:
+            results[i] = (category, key[0])
+        else:
+            pending.setdefault(key or i, []).append(i)
+    if pending:
+        groups = list(pending.values())
+        for indices, (category, version) in zip(groups, classify_texts([texts[indices[0]] for indices in groups])):
+            for i in indices:
+                results[i] = (category, version)
+            if keys[indices[0]]:
+                prediction_cache.set((version, keys[indices[0]][1]), category)
+    return results
+
+# Online learning (ONLINE_LEARNING=1): staff decisions in support_action
+# train a HashingVectorizer + SGDClassifier in the background, bootstrapped
+# from the training CSV and the most recent ONLINE_BOOTSTRAP_LIMIT
+# reviewed complaints, and every update is swapped in as the serving model
+REVIEWED_STATUSES = ('Verified by L1', 'Forwarded to Department', 'Resolved')
+ONLINE_BOOTSTRAP_LIMIT = int(os.environ.get('ONLINE_BOOTSTRAP_LIMIT', 20000))
+online_learner = None
+
+def online_bootstrap_data():
+    from train_model import load_csv, load_db
+    texts, labels = load_csv(os.path.join(BASE_DIR, 'complaints_dataset.csv'))
+    db_texts, db_labels = load_db(DATABASE, REVIEWED_STATUSES, limit=ONLINE_BOOTSTRAP_LIMIT)
+    return texts + db_texts, labels + db_labels
+
+if os.environ.get('ONLINE_LEARNING') == '1' and classifier is not None:
+    from online import OnlineLearner
+    online_learner = OnlineLearner(
+        classifier.classes,
+        on_update=swap_classifier,
+        bootstrap=online_bootstrap_data,
+        batch_size=int(os.environ.get('ONLINE_BATCH_SIZE', 32)),
+        flush_seconds=float(os.environ.get('ONLINE_FLUSH_SECONDS', 30)),
+        base_version=classifier.version,
+    )
+    online_learner.start()
+
+# --- MODEL HOT RELOAD ---
+# A background thread polls models/CURRENT and swaps in the version it
+# names (python backend/registry.py promote <version>, or POST
+# /api/master/model). The new model is loaded and warmed up off the
+# request path; in-flight requests finish on the model they started with.
+# With online learning on, the learner owns the serving model instead.
+MODEL_WATCH_SECONDS = float(os.environ.get('MODEL_WATCH_SECONDS', 5))
+WARMUP_TEXTS = [
+    'Delivery was late and the food was cold',
+    'Money deducted but order failed',
+    'The app crashes when I open my orders',
+]
+model_reload_lock = threading.Lock()
+model_reload_state = {'version': None, 'status': None, 'error': None, 'at': None}
+model_watcher = {'pid': None, 'lock': threading.Lock()}
+
+def reload_model(version):
+    global inference_pool
+    with model_reload_lock:
+        if classifier is not None and classifier.version == version:
+            return
+        model_reload_state.update(version=version, status='loading', error=None,
+                                  at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        try:
+            new = load_registry_version(version)
+            new.predict(WARMUP_TEXTS)
+            old_pool = inference_pool
+            if old_pool is not None:
+                from inference_pool import InferencePool
+                new_pool = InferencePool(new, old_pool.processes)
+                new_pool.classify(WARMUP_TEXTS)
+                # Until the classifier swap below, classify_texts() sees a
+                # version mismatch and classifies in-thread
+                inference_pool = new_pool
+            swap_classifier(new)
+            if old_pool is not None:
+                old_pool.shutdown()
+        except Exception as e:
+            model_reload_state.update(status='failed', error=str(e))
+            print(f"Model reload to {version} failed: {e}")
+            return
+        model_reload_state['status'] = 'ready'
+        print(f"Model {version} loaded from the registry.")
+
+def watch_model_registry():
+    while True:
+        time.sleep(MODEL_WATCH_SECONDS)
+        version = model_registry.current()
+        # A version that failed to load is retried only once CURRENT changes
+        serving = classifier.version if classifier else None
+        if version and version != serving and not (
+                model_reload_state['version'] == version and model_reload_state['status'] == 'failed'):
+            reload_model(version)
+
+@app.before_request
+def start_model_watcher():
+    # Started lazily so that each forked worker runs its own watcher
+    if model_watcher['pid'] == os.getpid() or online_learner is not None or not MODEL_WATCH_SECONDS:
+        return
+    with model_watcher['lock']:
+        if model_watcher['pid'] != os.getpid():
+            model_watcher['pid'] = os.getpid()
+            threading.Thread(target=watch_model_registry, name='model-watcher', daemon=True).start()
 
 # Dummy Data for Restaurants
 SOUTH_INDIAN_MENU = [
@@ -100,178 +317,207 @@ for zone, names in ZONES.items():
         })
         r_id += 1
 
+# Read-mostly API results (category stats, zones, departments, staff lists)
+response_cache = TTLCache(maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', 256)))
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', 5))
+REGISTRY_CACHE_TTL = float(os.environ.get('REGISTRY_CACHE_TTL', 300))
+STAFF_CACHE_TTL = float(os.environ.get('STAFF_CACHE_TTL', 30))
+
+# Live complaint events for /api/support/stream
+event_broker = EventBroker()
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+
+def complaints_changed(event_type=None, complaints=()):
+    # Write hook for every path that inserts or updates complaints
+    response_cache.invalidate('stats')
+    for complaint in complaints:
+        event_broker.publish(event_type, complaint)
+
+def load_complaint_events(conn, complaint_ids):
+    # Event payloads are full support-listing rows (joined user/order columns
+    # and compensations), so dashboards can insert or patch them in place
+    # instead of re-fetching the listing
+    rows = conn.execute(
+        f"SELECT c.*, u.username as user_name, o.restaurant_name, o.items, o.total_amount {COMPLAINT_LISTING_FROM} "
+        "WHERE c.id IN (SELECT value FROM json_each(?)) ORDER BY c.id",
+        (json.dumps(complaint_ids),)
+    ).fetchall()
+    complaints = [dict(row) for row in rows]
+    compensations = load_compensations(conn, [c['id'] for c in complaints])
+    for c in complaints:
+        c['compensations'] = compensations[c['id']]
+    return complaints
+
+def staff_changed(zone_id):
+    response_cache.invalidate(f'staff:{zone_id}')
+
+# Serve /api/master/stats from the trigger-maintained zone_stats counters
+# instead of aggregating complaints (ZONE_STATS=0 turns this off)
+USE_ZONE_STATS = os.environ.get('ZONE_STATS', '1') != '0'
+
+# Warmed connections handed out per request (DB_POOL_SIZE=0 disables pooling)
+db_pool = ConnectionPool(DATABASE, size=int(os.environ.get('DB_POOL_SIZE', 8)))
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Standalone connection for code running outside a request (init_db)
+    return connect(DATABASE)
+
+def get_db():
+    # One pooled connection per request, released in close_db()
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exc):
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
 
 def init_db():
     conn = get_db_connection()
     cursor = conn.cursor()
-    
-    # User Table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'user'
-        )
-    ''')
-    
-    # Orders Table (New)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            restaurant_name TEXT NOT NULL,
-            items TEXT NOT NULL,
-            total_amount REAL NOT NULL,
-            order_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'Delivered',
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-
-    # Complaints Table (Updated with user_id and status)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS complaints (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            order_id INTEGER,
-            text TEXT NOT NULL,
-            category TEXT NOT NULL,
-            status TEXT DEFAULT 'Pending',
-            admin_response_text TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (order_id) REFERENCES orders (id)
-        )
-    ''')
-    
-    # Attempt to add columns to existing table if they don't exist (Migration)
-    try:
-        cursor.execute("ALTER TABLE complaints ADD COLUMN order_id INTEGER REFERENCES orders(id)")
-    except sqlite3.OperationalError:
-        pass # Column likely exists
-        
-    try:
-        cursor.execute("ALTER TABLE complaints ADD COLUMN admin_response_text TEXT")
-    except sqlite3.OperationalError:
-        pass # Column likely exists
-
-    # Additional Tables for Multi-tier System
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS zones (
-            zone_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            zone_name TEXT UNIQUE NOT NULL,
-            district TEXT NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS departments (
-            department_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            department_name TEXT UNIQUE NOT NULL
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS support_staff (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL,
-            zone_id INTEGER,
-            department_id INTEGER,
-            created_by_admin INTEGER,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (zone_id) REFERENCES zones (zone_id),
-            FOREIGN KEY (department_id) REFERENCES departments (department_id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS company_admin_registry (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            zone_id INTEGER NOT NULL,
-            admin_username TEXT UNIQUE NOT NULL,
-            admin_password TEXT NOT NULL,
-            created_by_company TEXT DEFAULT 'System',
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (zone_id) REFERENCES zones (zone_id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS complaint_compensation (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            complaint_id INTEGER NOT NULL,
-            type TEXT NOT NULL,
-            amount REAL,
-            coupon_code TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (complaint_id) REFERENCES complaints (id)
-        )
-    ''')
-
-    try:
-        cursor.execute('ALTER TABLE complaints ADD COLUMN zone_id INTEGER REFERENCES zones(zone_id)')
-    except sqlite3.OperationalError:
-        pass
 
-    try:
-        cursor.execute('ALTER TABLE complaints ADD COLUMN department_id INTEGER REFERENCES departments(department_id)')
-    except sqlite3.OperationalError:
-        pass
+    # Tables and columns are created and upgraded by the versioned
+    # migrations in migrations.py
+    migrate(conn)
 
     # Ensure default zones and departments exist
     default_zones = [('Chennai', 'Chennai District'), ('Bangalore', 'Urban'), ('Hyderabad', 'Hyderabad District')]
-    for name, dist in default_zones:
-        try:
-            cursor.execute('INSERT INTO zones (zone_name, district) VALUES (?, ?)', (name, dist))
-        except sqlite3.IntegrityError:
-            pass
+    cursor.executemany('INSERT OR IGNORE INTO zones (zone_name, district) VALUES (?, ?)', default_zones)
 
     default_depts = ['Finance', 'Delivery', 'Restaurant', 'App Issue']
-    for dept in default_depts:
-        try:
-            cursor.execute('INSERT INTO departments (department_name) VALUES (?)', (dept,))
-        except sqlite3.IntegrityError:
-            pass
-
-    conn.commit()
-    
-    # Ensure Zone Admins exist
-    cursor.execute('SELECT zone_id, zone_name FROM zones')
-    zones = cursor.fetchall()
-    for row in zones:
-        z_id, z_name = row['zone_id'], row['zone_name']
-        admin_uname = f'{z_name.lower()}_admin'
-        admin_pass = generate_password_hash('admin123')
-        try:
-            cursor.execute('INSERT INTO company_admin_registry (zone_id, admin_username, admin_password) VALUES (?, ?, ?)',
-                           (z_id, admin_uname, admin_pass))
-        except sqlite3.IntegrityError:
-            pass
+    cursor.executemany('INSERT OR IGNORE INTO departments (department_name) VALUES (?)', [(d,) for d in default_depts])
     conn.commit()
 
+    # Ensure Zone Admins exist. hashing is deliberately slow,
+    # so hash once and only when an account is actually missing
+    existing = {row[0] for row in cursor.execute('SELECT admin_username FROM company_admin_registry')}
+    missing = [(row['zone_id'], f"{row['zone_name'].lower()}_admin")
+               for row in cursor.execute('SELECT zone_id, zone_name FROM zones')]
+    missing = [(z_id, uname) for z_id, uname in missing if uname not in existing]
+    if missing:
+        admin_pass = hash_password('admin123')
+        cursor.executemany('INSERT OR IGNORE INTO company_admin_registry (zone_id, admin_username, admin_password) VALUES (?, ?, ?)',
+                           [(z_id, uname, admin_pass) for z_id, uname in missing])
+        conn.commit()
+
     # Check if admin exists, if not create one
-    cursor.execute("SELECT * FROM users WHERE role = 'admin'")
+    cursor.execute("SELECT 1 FROM users WHERE role = 'admin'")
     if not cursor.fetchone():
-        admin_pass = generate_password_hash("admin123")
+        admin_pass = hash_password("admin123")
         cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
                       ("admin", admin_pass, "admin"))
         print("Admin user created: admin / admin123")
         conn.commit()
+
+    ensure_indexes(conn)
+
+    ensure_change_versions(conn)
+
+    if USE_ZONE_STATS:
+        enable_zone_stats(conn)
+    else:
+        disable_zone_stats(conn)
         
     conn.close()
 
-init_db()
+def database_is_current(conn):
+    # One query: the newest migration is applied, the admin account is
+    # seeded and the managed indexes and triggers match this configuration
+    required = list(INDEXES) + list(CHANGE_VERSION_TRIGGERS) + (list(ZONE_STATS_TRIGGERS) if USE_ZONE_STATS else [])
+    forbidden = [] if USE_ZONE_STATS else list(ZONE_STATS_TRIGGERS)
+    try:
+        row = conn.execute(f"""
+            SELECT (SELECT MAX(version) FROM schema_version) = ?
+               AND EXISTS (SELECT 1 FROM users WHERE role = 'admin')
+               AND (SELECT COUNT(*) FROM sqlite_master WHERE name IN ({','.join('?' * len(required))})) = ?
+               AND NOT EXISTS (SELECT 1 FROM sqlite_master WHERE name IN ({','.join('?' * len(forbidden))}))
+        """, [LATEST_VERSION, *required, len(required), *forbidden]).fetchone()
+    except sqlite3.OperationalError:
+        # No schema_version or users table yet: a new database
+        return False
+    return bool(row[0])
+
+def ensure_db():
+    # Warm starts cost a single query; init_db() only runs for a new or
+    # out of date database
+    conn = get_db_connection()
+    try:
+        current = database_is_current(conn)
+    finally:
+        conn.close()
+    if not current:
+        init_db()
+
+def create_app():
+    # Entry point for servers, e.g. gunicorn 'backend.app:create_app()'.
+    # Importing this module no longer touches the database
+    ensure_db()
+    return app
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or upgrade the schema and seed the default accounts."""
+    init_db()
+    print(f'Database ready: {DATABASE}')
 
 # --- AUTHENTICATION ---
 
+# Password checks run in their own bounded process pool (see passwords.py)
+# so a burst of logins cannot take the CPU from other endpoints
+password_verifier = PasswordVerifier()
+
+@app.errorhandler(AuthBusy)
+def auth_busy(e):
+    res = jsonify({'error': 'Too many login attempts, please retry'})
+    res.status_code = 503
+    res.headers['Retry-After'] = '1'
+    return res
+
+def check_login(conn, table, column, user, password):
+    if not user:
+        return False
+    ok, new_hash = password_verifier.verify(user[column], password)
+    if new_hash:
+        # Hashing policy changed (or a plaintext password): store the upgrade
+        # unless the password was changed meanwhile
+        conn.execute(f"UPDATE {table} SET {column} = ? WHERE id = ? AND {column} = ?",
+                     (new_hash, user['id'], user[column]))
+        conn.commit()
+        if table == 'support_staff':
+            # Cached staff lists carry the stored password
+            staff_changed(user['zone_id'])
+    return ok
+
+# Master admin endpoints take the signed token handed out by
+# /api/master/login as "Authorization: Bearer <token>". Set SECRET_KEY when
+# running more than one worker, or each process signs with its own key.
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    print("SECRET_KEY not set; master tokens are only valid in this process.")
+    SECRET_KEY = os.urandom(32).hex()
+MASTER_TOKEN_TTL = int(os.environ.get('MASTER_TOKEN_TTL', 12 * 3600))
+master_tokens = URLSafeTimedSerializer(SECRET_KEY, salt='master-admin')
+
+def master_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        try:
+            claims = master_tokens.loads(token, max_age=MASTER_TOKEN_TTL) if scheme == 'Bearer' else None
+        except BadSignature:
+            claims = None
+        if not claims or claims.get('role') != 'master' or 'zone_id' not in claims:
+            return jsonify({'error': 'Master admin login required'}), 401
+        g.master = claims
+        return view(*args, **kwargs)
+    return wrapper
+
+def foreign_zone(zone_id):
+    # Master admins manage their own zone only
+    return str(zone_id) != str(g.master['zone_id'])
+
 @app.route('/api/register', methods=['POST'])
 def register():
     data = request.json
@@ -281,13 +527,15 @@ def register():
     
     if not username or not password:
         return jsonify({'error': 'Username and password required'}), 400
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({'error': 'Username and password must be strings'}), 400
     
     if role not in ['user', 'admin']:
          return jsonify({'error': 'Invalid role'}), 400
         
-    hashed_password = generate_password_hash(password)
+    hashed_password = hash_password(password)
     
-    conn = get_db_connection()
+    conn = get_db()
     try:
         conn.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
                     (username, hashed_password, role))
@@ -295,8 +543,6 @@ def register():
         return jsonify({'message': 'User registered successfully'}), 201
     except sqlite3.IntegrityError:
         return jsonify({'error': 'Username already exists'}), 409
-    finally:
-        conn.close()
 
 @app.route('/api/login', methods=['POST'])
 def login():
@@ -304,12 +550,13 @@ def login():
     username = data.get('username')
     password = data.get('password')
     role = data.get('role') # 'user' or 'admin' login attempt
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({'error': 'Username and password must be strings'}), 400
     
-    conn = get_db_connection()
+    conn = get_db()
     user = conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
-    conn.close()
     
-    if user and check_password_hash(user['password'], password):
+    if check_login(conn, 'users', 'password', user, password):
         if role and user['role'] != role:
              return jsonify({'error': 'Invalid role for this user'}), 403
              
@@ -345,12 +592,11 @@ def place_order():
     if not user_id or not restaurant_name or not items:
         return jsonify({'error': 'Missing order details'}), 400
         
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute("INSERT INTO orders (user_id, restaurant_name, items, total_amount) VALUES (?, ?, ?, ?)",
                    (user_id, restaurant_name, str(items), total_amount))
     conn.commit()
-    conn.close()
     
     return jsonify({'message': 'Order placed successfully'}), 201
 
@@ -360,7 +606,7 @@ def get_orders():
     if not user_id:
         return jsonify({'error': 'User ID required'}), 400
         
-    conn = get_db_connection()
+    conn = get_db()
     # Get orders and try to attach any complaints raised for them
     query = '''
         SELECT o.*, c.status as complaint_status, c.admin_response_text 
@@ -370,7 +616,6 @@ def get_orders():
         ORDER BY o.order_date DESC
     '''
     rows = conn.execute(query, (user_id,)).fetchall()
-    conn.close()
     
     return jsonify([dict(row) for row in rows])
 
@@ -378,7 +623,7 @@ def get_orders():
 
 @app.route('/api/predict', methods=['POST'])
 def predict_complaint():
-    if not model or not vectorizer:
+    if classifier is None:
         return jsonify({'error': 'Model not loaded'}), 500
 
     data = request.json
@@ -392,37 +637,249 @@ def predict_complaint():
     if not user_id:
         return jsonify({'error': 'User ID required'}), 401
     
-    # Vectorize and Predict
-    text_vectorized = vectorizer.transform([text])
-    predicted_category = model.predict(text_vectorized)[0]
+    # Vectorize and Predict (cached by normalized text, else batched with
+    # concurrent requests)
+    predicted_category, model_version = predict_category(text)
     
     # Save to DB
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor()
-    cursor.execute("INSERT INTO complaints (user_id, order_id, text, category, status, zone_id) VALUES (?, ?, ?, ?, ?, ?)", 
-                  (user_id, order_id, text, predicted_category, 'Pending', zone_id))
+    cursor.execute("INSERT INTO complaints (user_id, order_id, text, category, status, zone_id, model_version) VALUES (?, ?, ?, ?, ?, ?, ?)", 
+                  (user_id, order_id, text, predicted_category, 'Pending', zone_id, model_version))
     complaint_id = cursor.lastrowid
     conn.commit()
-    conn.close()
+    complaints_changed('complaint_created', load_complaint_events(conn, [complaint_id]))
     
     return jsonify({
         'id': complaint_id,
         'category': predicted_category,
         'status': 'Pending',
-        'original_text': text
+        'original_text': text,
+        'model_version': model_version
     })
 
+def valid_id(value, optional=False):
+    # Integer ids, also accepted as digit strings; bools are not ids
+    if value is None:
+        return optional
+    if isinstance(value, str):
+        return value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_complaints_batch():
+    if classifier is None:
+        return jsonify({'error': 'Model not loaded'}), 500
+
+    data = request.json or {}
+    items = data.get('complaints')
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'complaints must be a non-empty list'}), 400
+    if len(items) > MAX_PREDICT_BATCH:
+        return jsonify({'error': f'At most {MAX_PREDICT_BATCH} complaints per batch'}), 413
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('text'), str) or not item['text'].strip():
+            return jsonify({'error': 'No text provided', 'index': index}), 400
+        if not item.get('user_id'):
+            return jsonify({'error': 'User ID required', 'index': index}), 400
+        for field in ('user_id', 'order_id', 'zone_id'):
+            if field in item and not valid_id(item[field], optional=field != 'user_id'):
+                return jsonify({'error': f'{field} must be an integer id', 'index': index}), 400
+
+    # Vectorize and Predict the whole batch in one pass (repeated texts once)
+    predictions = predict_categories([item['text'] for item in items])
+
+    rows = [(item['user_id'], item.get('order_id'), item['text'], category, 'Pending', item.get('zone_id', 1), version)
+            for item, (category, version) in zip(items, predictions)]
+
+    # Save to DB in a single transaction
+    conn = get_db()
+    with conn:
+        conn.executemany("INSERT INTO complaints (user_id, order_id, text, category, status, zone_id, model_version) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        # AUTOINCREMENT ids are contiguous while this transaction holds the write lock
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+    first_id = last_id - len(rows) + 1
+    complaints_changed('complaint_created', load_complaint_events(conn, list(range(first_id, last_id + 1))))
+    return jsonify({
+        'count': len(rows),
+        'complaints': [
+            {'id': first_id + i, 'category': category, 'status': 'Pending', 'model_version': version}
+            for i, (category, version) in enumerate(predictions)
+        ]
+    })
+
+# --- CONDITIONAL GET ---
+
+def zone_conditional_json(zone_id, build):
+    # Serves build() as JSON with an ETag derived from the zone's change
+    # version and the full request URL, answering 304 when the client
+    # already has it. The version is read before the data, so a concurrent
+    # write can only make the ETag look older than the body, never newer.
+    version = zone_version(get_db(), zone_id)
+    etag = hashlib.sha1(f'{request.full_path}|{version}'.encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# --- COMPLAINT LISTINGS ---
+
+COMPLAINT_LISTING_FROM = "FROM complaints c JOIN users u ON c.user_id = u.id LEFT JOIN orders o ON c.order_id = o.id"
+
+# Columns that can be requested with ?fields= on the complaint listings
+COMPLAINT_FIELDS = {
+    'id': 'c.id',
+    'user_id': 'c.user_id',
+    'order_id': 'c.order_id',
+    'text': 'c.text',
+    'category': 'c.category',
+    'status': 'c.status',
+    'admin_response_text': 'c.admin_response_text',
+    'timestamp': 'c.timestamp',
+    'zone_id': 'c.zone_id',
+    'department_id': 'c.department_id',
+    'model_version': 'c.model_version',
+    'user_name': 'u.username',
+    'restaurant_name': 'o.restaurant_name',
+    'items': 'o.items',
+    'total_amount': 'o.total_amount',
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def listing_columns(fields_arg, extra_fields=()):
+    # Returns (select list, requested field names). Without ?fields= the full
+    # legacy column set is returned. id and timestamp are always selected
+    # because the pagination cursor is built from them.
+    if not fields_arg:
+        return "c.*, u.username as user_name, o.restaurant_name, o.items, o.total_amount", None
+    fields = [f.strip() for f in fields_arg.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in COMPLAINT_FIELDS and f not in extra_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    selected = ['id', 'timestamp'] + [f for f in fields if f in COMPLAINT_FIELDS and f not in ('id', 'timestamp')]
+    return ", ".join(f"{COMPLAINT_FIELDS[f]} as {f}" for f in selected), set(fields)
+
+def encode_cursor(row):
+    raw = json.dumps([row['timestamp'], row['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor):
+    try:
+        timestamp, complaint_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    # timestamp is None when the page ended on a row without one
+    if not isinstance(complaint_id, int) or not isinstance(timestamp, (str, type(None))):
+        raise ValueError('Invalid cursor')
+    return timestamp, complaint_id
+
+def page_args(args):
+    # Pagination is opt-in: without limit/cursor the listing is unpaginated
+    if 'limit' not in args and 'cursor' not in args:
+        return None, None
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    limit = min(limit, MAX_PAGE_SIZE)
+    cursor = args.get('cursor')
+    return limit, decode_cursor(cursor) if cursor else None
+
+def run_listing(conn, query, params, limit, after):
+    # Keyset pagination on (timestamp, id): seeking past the cursor is an
+    # index range scan, so every page costs the same no matter how deep.
+    # Rows without a timestamp sort last (NULL is smallest in SQLite), so
+    # they follow every timestamped page and are paged by id among themselves.
+    if after and after[0] is None:
+        query += " AND c.timestamp IS NULL AND c.id < ?"
+        params = params + [after[1]]
+    elif after:
+        query += " AND ((c.timestamp, c.id) < (?, ?) OR c.timestamp IS NULL)"
+        params = params + list(after)
+    query += " ORDER BY c.timestamp DESC, c.id DESC"
+    if limit:
+        query += " LIMIT ?"
+        params = params + [limit + 1]
+    rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+def date_range_bounds(args):
+    # Half-open [start, end) bounds for the admin date filters. Comparing the
+    # raw timestamp column against 'YYYY-MM-DD' strings keeps the predicate
+    # sargable, so it is answered from the timestamp indexes instead of
+    # evaluating date(c.timestamp) on every row. Filters that are combined
+    # are intersected.
+    today = datetime.now().date()
+    one_day = timedelta(days=1)
+    starts, ends = [], []
+
+    date_filter = args.get('date')
+    if date_filter == 'today':
+        starts.append(today)
+        ends.append(today + one_day)
+    elif date_filter == 'yesterday':
+        starts.append(today - one_day)
+        ends.append(today)
+
+    days = args.get('days')
+    if days:
+        try:
+            days = int(days)
+        except ValueError:
+            raise ValueError('days must be an integer')
+        if days < 1:
+            raise ValueError('days must be at least 1')
+        # Last N days including today
+        starts.append(today - timedelta(days=days - 1))
+        ends.append(today + one_day)
+
+    try:
+        if args.get('from'):
+            starts.append(datetime.strptime(args['from'], '%Y-%m-%d').date())
+        if args.get('to'):
+            # 'to' is inclusive
+            ends.append(datetime.strptime(args['to'], '%Y-%m-%d').date() + one_day)
+    except ValueError:
+        raise ValueError('from/to must be dates in YYYY-MM-DD format')
+
+    start = str(max(starts)) if starts else None
+    end = str(min(ends)) if ends else None
+    return start, end
+
+def listing_payload(rows, limit, next_cursor):
+    if limit is None:
+        return rows
+    return {'complaints': rows, 'next_cursor': next_cursor}
+
 @app.route('/api/complaints', methods=['GET'])
 def get_complaints():
     user_id = request.args.get('user_id')
     role = request.args.get('role')
     
-    category_filter = request.args.get('category')
-    date_filter = request.args.get('date') 
-    status_filter = request.args.get('status')
+    try:
+        columns, _ = listing_columns(request.args.get('fields'))
+        limit, after = page_args(request.args)
+        start, end = date_range_bounds(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    conn = get_db_connection()
-    query = "SELECT c.*, u.username as user_name, o.restaurant_name, o.items, o.total_amount FROM complaints c JOIN users u ON c.user_id = u.id LEFT JOIN orders o ON c.order_id = o.id WHERE 1=1"
+    conn = get_db()
+    query = f"SELECT {columns} {COMPLAINT_LISTING_FROM} WHERE 1=1"
     params = []
     
     if role == 'user':
@@ -431,33 +888,94 @@ def get_complaints():
         query += " AND c.user_id = ?"
         params.append(user_id)
     elif role == 'admin':
-        # Admin filters
-        if category_filter and category_filter != 'All':
-            query += " AND c.category = ?"
-            params.append(category_filter)
-            
-        if status_filter and status_filter != 'All':
-            query += " AND c.status = ?"
-            params.append(status_filter)
-            
-        if date_filter:
-            today = datetime.now().date()
-            if date_filter == 'today':
-                query += " AND date(c.timestamp) = ?"
-                params.append(str(today))
-            elif date_filter == 'yesterday':
-                yesterday = today - timedelta(days=1)
-                query += " AND date(c.timestamp) = ?"
-                params.append(str(yesterday))
-    
-    query += " ORDER BY c.timestamp DESC"
-    
-    cursor = conn.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
+        clauses, filter_params = admin_filters(request.args, start, end)
+        query += ''.join(f" AND {clause}" for clause in clauses)
+        params += filter_params
     
-    complaints = [dict(row) for row in rows]
-    return jsonify(complaints)
+    complaints, next_cursor = run_listing(conn, query, params, limit, after)
+    return jsonify(listing_payload(complaints, limit, next_cursor))
+
+def admin_filters(args, start, end):
+    # WHERE clauses for the admin filters: category, status and the
+    # date=today|yesterday, days=N and from/to timestamp range
+    clauses, params = [], []
+    category_filter = args.get('category')
+    if category_filter and category_filter != 'All':
+        clauses.append("c.category = ?")
+        params.append(category_filter)
+    status_filter = args.get('status')
+    if status_filter and status_filter != 'All':
+        clauses.append("c.status = ?")
+        params.append(status_filter)
+    if start:
+        clauses.append("c.timestamp >= ?")
+        params.append(start)
+    if end:
+        clauses.append("c.timestamp < ?")
+        params.append(end)
+    return clauses, params
+
+# Rows fetched per round trip (and per response chunk) by the export
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+@app.route('/api/complaints/export', methods=['GET'])
+def export_complaints():
+    # Streams every matching complaint as CSV or NDJSON. Rows are read with
+    # fetchmany() and written out batch by batch, so memory stays flat no
+    # matter how many rows match. Takes the admin listing filters plus
+    # zone_id and ?fields=.
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        columns, _ = listing_columns(request.args.get('fields'))
+        start, end = date_range_bounds(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    clauses, params = admin_filters(request.args, start, end)
+    zone_id = request.args.get('zone_id')
+    if zone_id:
+        clauses.append("c.zone_id = ?")
+        params.append(zone_id)
+    query = (f"SELECT {columns} {COMPLAINT_LISTING_FROM} WHERE 1=1"
+             + ''.join(f" AND {clause}" for clause in clauses)
+             + " ORDER BY c.timestamp DESC, c.id DESC")
+
+    def generate():
+        # Its own connection, not the request's pooled one: the body is
+        # produced after the request has been torn down, and a long export
+        # should not hold a pool slot. The single SELECT reads one snapshot.
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute(query, params)
+            names = [column[0] for column in cursor.description]
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if export_format == 'csv':
+                writer.writerow(names)
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                if export_format == 'csv':
+                    writer.writerows(rows)
+                else:
+                    for row in rows:
+                        buffer.write(json.dumps(dict(zip(names, row))))
+                        buffer.write('\n')
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():  # the CSV header when nothing matched
+                yield buffer.getvalue().encode('utf-8')
+        finally:
+            conn.close()
+
+    filename = f"complaints-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return Response(generate(), mimetype=EXPORT_FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
 
 @app.route('/api/complaints/<int:id>/status', methods=['PUT'])
 def update_status(id):
@@ -468,26 +986,25 @@ def update_status(id):
     if new_status not in ['Pending', 'Verified', 'Resolved', 'Not Responded']:
         return jsonify({'error': 'Invalid status'}), 400
         
-    conn = get_db_connection()
+    conn = get_db()
     if admin_response:
         conn.execute("UPDATE complaints SET status = ?, admin_response_text = ? WHERE id = ?", (new_status, admin_response, id))
     else:
         conn.execute("UPDATE complaints SET status = ? WHERE id = ?", (new_status, id))
         
     conn.commit()
-    conn.close()
+    complaints_changed('complaint_updated', load_complaint_events(conn, [id]))
     
     return jsonify({'message': 'Status and response updated successfully'})
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT category, COUNT(*) FROM complaints GROUP BY category")
-    stats = cursor.fetchall()
-    conn.close()
+    def load():
+        cursor = get_db().cursor()
+        cursor.execute("SELECT category, COUNT(*) FROM complaints GROUP BY category")
+        return {category: count for category, count in cursor.fetchall()}
     
-    stats_dict = {category: count for category, count in stats}
+    stats_dict = response_cache.get_or_set('stats', load, ttl=STATS_CACHE_TTL)
     return jsonify(stats_dict)
     from flask import send_from_directory
 
@@ -503,19 +1020,28 @@ def serve_react(path):
 
 # --- SYSTEM & REGISTRY DATA ---
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return jsonify({
+        'predict_batching': predict_batcher.metrics(),
+        'db_pool': db_pool.stats(),
+        'response_cache': response_cache.stats(),
+        'prediction_cache': dict(prediction_cache.stats(), model_version=classifier.version if classifier else None),
+        'online_learning': online_learner.stats() if online_learner else None,
+        'events': event_broker.stats(),
+    })
+
 @app.route('/api/zones', methods=['GET'])
 def get_zones():
-    conn = get_db_connection()
-    zones = conn.execute("SELECT * FROM zones").fetchall()
-    conn.close()
-    return jsonify([dict(z) for z in zones])
+    def load():
+        return [dict(z) for z in get_db().execute("SELECT * FROM zones").fetchall()]
+    return jsonify(response_cache.get_or_set('zones', load, ttl=REGISTRY_CACHE_TTL))
 
 @app.route('/api/departments', methods=['GET'])
 def get_departments():
-    conn = get_db_connection()
-    depts = conn.execute("SELECT * FROM departments").fetchall()
-    conn.close()
-    return jsonify([dict(d) for d in depts])
+    def load():
+        return [dict(d) for d in get_db().execute("SELECT * FROM departments").fetchall()]
+    return jsonify(response_cache.get_or_set('departments', load, ttl=REGISTRY_CACHE_TTL))
 
 # --- NEW SUPPORT & MASTER LOGIN ---
 
@@ -525,18 +1051,21 @@ def support_login():
     username = data.get('username')
     password = data.get('password')
     role = data.get('role', 'support') # could be L1 or L2 or just generic support
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({'error': 'Username and password must be strings'}), 400
     
-    conn = get_db_connection()
+    conn = get_db()
     user = conn.execute("SELECT * FROM support_staff WHERE username = ?", (username,)).fetchone()
-    conn.close()
     
-    if user and user['password'] == password: # using plain text or basic comparison as per dummy data if not hashed. Real systems use hashing. Let's assume plain or hash check depending on insertion. We'll use pass in our implementation for simplicity, or check_password_hash if needed. For now plain since we might insert plain in dashboard.
+    # Staff created before hashing still hold plaintext passwords; they are
+    # hashed on their next successful login
+    if check_login(conn, 'support_staff', 'password', user, password):
         if role and role not in ['support', user['role']]:
             return jsonify({'error': 'Role mismatch'}), 403
             
         return jsonify({
             'message': 'Login successful',
-            'user': dict(user)
+            'user': {k: user[k] for k in user.keys() if k != 'password'}
         }), 200
     return jsonify({'error': 'Invalid credentials'}), 401
 
@@ -545,49 +1074,91 @@ def master_login():
     data = request.json
     username = data.get('username')
     password = data.get('password')
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({'error': 'Username and password must be strings'}), 400
     
-    conn = get_db_connection()
+    conn = get_db()
     user = conn.execute("SELECT * FROM company_admin_registry WHERE admin_username = ?", (username,)).fetchone()
-    conn.close()
     
-    if user and check_password_hash(user['admin_password'], password):
+    if check_login(conn, 'company_admin_registry', 'admin_password', user, password):
         return jsonify({
             'message': 'Master Login successful',
             'user': {
                 'id': user['id'],
                 'username': user['admin_username'],
                 'role': 'master',
-                'zone_id': user['zone_id']
+                'zone_id': user['zone_id'],
+                'token': master_tokens.dumps({'id': user['id'], 'role': 'master', 'zone_id': user['zone_id']}),
             }
         }), 200
     return jsonify({'error': 'Invalid credentials'}), 401
 
 # --- MULTI-TIER COMPLAINT HANDLING ---
 
+def load_compensations(conn, complaint_ids):
+    # Set-based loader: fetch compensations for all ids at once and group them
+    # in memory. The ids go in as one JSON array so there is no limit on the
+    # number of bound parameters.
+    grouped = {complaint_id: [] for complaint_id in complaint_ids}
+    if not complaint_ids:
+        return grouped
+    rows = conn.execute(
+        "SELECT * FROM complaint_compensation WHERE complaint_id IN (SELECT value FROM json_each(?)) ORDER BY id",
+        (json.dumps(complaint_ids),)
+    ).fetchall()
+    for row in rows:
+        grouped[row['complaint_id']].append(dict(row))
+    return grouped
+
 @app.route('/api/support/complaints', methods=['GET'])
 def get_support_complaints():
     zone_id = request.args.get('zone_id')
     department_id = request.args.get('department_id')
     
-    conn = get_db_connection()
-    query = "SELECT c.*, u.username as user_name, o.restaurant_name, o.items, o.total_amount FROM complaints c JOIN users u ON c.user_id = u.id LEFT JOIN orders o ON c.order_id = o.id WHERE c.zone_id = ?"
-    params = [zone_id]
+    try:
+        columns, fields = listing_columns(request.args.get('fields'), extra_fields=('compensations',))
+        limit, after = page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if department_id:
-        query += " AND c.department_id = ? AND c.status IN ('Forwarded to Department', 'Under Investigation', 'Resolved')"
-        params.append(department_id)
+    def build():
+        conn = get_db()
+        query = f"SELECT {columns} {COMPLAINT_LISTING_FROM} WHERE c.zone_id = ?"
+        params = [zone_id]
         
-    query += " ORDER BY c.timestamp DESC"
-    rows = conn.execute(query, params).fetchall()
-    
-    # Also fetch compensation for each complaint
-    complaints = [dict(row) for row in rows]
-    for c in complaints:
-        comp = conn.execute("SELECT * FROM complaint_compensation WHERE complaint_id = ?", (c['id'],)).fetchall()
-        c['compensations'] = [dict(x) for x in comp]
+        if department_id:
+            query += " AND c.department_id = ? AND c.status IN ('Forwarded to Department', 'Under Investigation', 'Resolved')"
+            params.append(department_id)
+            
+        complaints, next_cursor = run_listing(conn, query, params, limit, after)
         
-    conn.close()
-    return jsonify(complaints)
+        # Also fetch compensation for each complaint (one query for the whole page)
+        if fields is None or 'compensations' in fields:
+            compensations = load_compensations(conn, [c['id'] for c in complaints])
+            for c in complaints:
+                c['compensations'] = compensations[c['id']]
+        return listing_payload(complaints, limit, next_cursor)
+        
+    return zone_conditional_json(zone_id, build)
+
+@app.route('/api/support/stream', methods=['GET'])
+def support_stream():
+    # Server-sent events: complaint_created / complaint_updated for the zone
+    # (and department, for L2), so dashboards load once and apply deltas
+    zone_id = request.args.get('zone_id')
+    department_id = request.args.get('department_id')
+    if not zone_id:
+        return jsonify({'error': 'zone_id required'}), 400
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
+
+    body = EventStream(event_broker, zone_id, department_id, last_event_id, SSE_HEARTBEAT_SECONDS)
+    # Under asgi.py the stream is drained on the event loop, not a worker thread
+    request.environ['complaints.event_stream'] = body
+    return Response(body, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/support/action', methods=['POST'])
 def support_action():
@@ -596,11 +1167,20 @@ def support_action():
     action = data.get('action') # 'Verify', 'Reject', 'Resolve', 'Forward'
     admin_text = data.get('admin_response_text', '')
     department_id = data.get('department_id')
+    category = data.get('category') # Optional correction of the predicted category
     
-    conn = get_db_connection()
+    if category and classifier is not None and category not in classifier.classes:
+        return jsonify({'error': 'Unknown category'}), 400
     
+    conn = get_db()
+    
+    if category:
+        conn.execute("UPDATE complaints SET category = ? WHERE id = ?", (category, complaint_id))
+    
+    previous_department = None
     if action == 'Forward':
         new_status = 'Forwarded to Department'
+        previous_department = conn.execute("SELECT department_id FROM complaints WHERE id = ?", (complaint_id,)).fetchone()
         conn.execute("UPDATE complaints SET status = ?, admin_response_text = ?, department_id = ? WHERE id = ?",
                     (new_status, admin_text, department_id, complaint_id))
     elif action == 'Resolve':
@@ -623,61 +1203,148 @@ def support_action():
                     (new_status, admin_text, complaint_id))
                     
     conn.commit()
-    conn.close()
+    events = load_complaint_events(conn, [complaint_id])
+    if previous_department and events and previous_department[0] != events[0]['department_id']:
+        events[0]['previous_department_id'] = previous_department[0]
+    complaints_changed('complaint_updated', events)
+    if online_learner is not None:
+        label = staff_label(conn, complaint_id, action, category, department_id)
+        if label:
+            online_learner.add(*label)
     return jsonify({'message': 'Action applied successfully'})
 
+# Categories each department handles: forwarding a complaint to a
+# department that handles exactly one category re-labels it
+DEPARTMENT_CATEGORIES = {
+    'Finance': ('Payment / Refund Issue',),
+    'Delivery': ('Delivery Issue',),
+    'Restaurant': ('Food Quality Issue', 'Wrong / Missing Item'),
+    'App Issue': ('App / Technical Issue',),
+}
+
+def staff_label(conn, complaint_id, action, category, department_id):
+    # (text, category) a staff decision vouches for, or None
+    row = conn.execute("SELECT text, category FROM complaints WHERE id = ?", (complaint_id,)).fetchone()
+    if not row:
+        return None
+    if category or action in ('Verify', 'Resolve'):
+        return row['text'], row['category']
+    if action == 'Forward' and department_id:
+        dept = conn.execute("SELECT department_name FROM departments WHERE department_id = ?", (department_id,)).fetchone()
+        handled = DEPARTMENT_CATEGORIES.get(dept['department_name'], ()) if dept else ()
+        if row['category'] in handled:
+            return row['text'], row['category']
+        if len(handled) == 1:
+            return row['text'], handled[0]
+    return None
+
 # --- MASTER ADMIN FEATURES ---
 
 @app.route('/api/master/staff', methods=['POST', 'GET'])
+@master_required
 def master_staff():
-    conn = get_db_connection()
+    conn = get_db()
     
     if request.method == 'POST':
         data = request.json
         uname = data.get('username')
-        pwd = data.get('password') # Plain string for simplified dashboards, or hashed if preferred. Sticking to plain as handled in login.
+        pwd = data.get('password')
         role = data.get('role')
-        z_id = data.get('zone_id')
+        z_id = data.get('zone_id', g.master['zone_id'])
         dep_id = data.get('department_id')
-        admin_id = data.get('admin_id')
+        admin_id = g.master['id']
+        if foreign_zone(z_id):
+            return jsonify({'error': 'Not your zone'}), 403
         
         try:
             conn.execute("INSERT INTO support_staff (username, password, role, zone_id, department_id, created_by_admin) VALUES (?, ?, ?, ?, ?, ?)",
-                        (uname, pwd, role, z_id, dep_id, admin_id))
+                        (uname, hash_password(pwd) if pwd else pwd, role, z_id, dep_id, admin_id))
             conn.commit()
+            staff_changed(z_id)
             res = jsonify({'message': 'Account created'})
             res.status_code = 201
         except sqlite3.IntegrityError:
             res = jsonify({'error': 'Username exists'})
             res.status_code = 409
-        conn.close()
         return res
         
     elif request.method == 'GET':
-        z_id = request.args.get('zone_id')
-        rows = conn.execute("SELECT * FROM support_staff WHERE zone_id = ?", (z_id,)).fetchall()
-        conn.close()
-        return jsonify([dict(r) for r in rows])
+        z_id = request.args.get('zone_id', g.master['zone_id'])
+        if foreign_zone(z_id):
+            return jsonify({'error': 'Not your zone'}), 403
+        def load():
+            rows = conn.execute("SELECT * FROM support_staff WHERE zone_id = ?", (z_id,)).fetchall()
+            return [dict(r) for r in rows]
+        return jsonify(response_cache.get_or_set(f'staff:{z_id}', load, ttl=STAFF_CACHE_TTL))
+
+@app.route('/api/master/model', methods=['GET', 'POST'])
+@master_required
+def master_model():
+    if request.method == 'POST':
+        if online_learner is not None:
+            # The learner publishes the serving model; a registry reload
+            # would be overwritten by its next update
+            return jsonify({'error': 'Online learning owns the serving model; restart without ONLINE_LEARNING to switch versions'}), 409
+        version = (request.json or {}).get('version')
+        try:
+            model_registry.set_current(version)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        # Every worker's watcher picks up the new CURRENT; this one starts now
+        threading.Thread(target=reload_model, args=(version,), daemon=True).start()
+        return jsonify({'message': 'Model reload started', 'version': version}), 202
+
+    counts = get_db().execute("SELECT model_version, COUNT(*) as n FROM complaints GROUP BY model_version").fetchall()
+    current = model_registry.current()
+    return jsonify({
+        'serving': classifier.version if classifier else None,
+        'current': current,
+        'versions': [dict(model_registry.training_info(v), version=v, current=v == current)
+                     for v in model_registry.versions()],
+        'reload': model_reload_state,
+        'complaints_by_version': {r['model_version'] or 'unknown': r['n'] for r in counts},
+    })
 
 @app.route('/api/master/stats', methods=['GET'])
+@master_required
 def master_stats():
-    z_id = request.args.get('zone_id')
-    conn = get_db_connection()
+    z_id = request.args.get('zone_id', g.master['zone_id'])
+    if foreign_zone(z_id):
+        return jsonify({'error': 'Not your zone'}), 403
     
-    total = conn.execute("SELECT COUNT(*) as c FROM complaints WHERE zone_id = ?", (z_id,)).fetchone()['c']
-    pending = conn.execute("SELECT COUNT(*) as c FROM complaints WHERE zone_id = ? AND status != 'Resolved' AND status != 'Rejected'", (z_id,)).fetchone()['c']
-    resolved = conn.execute("SELECT COUNT(*) as c FROM complaints WHERE zone_id = ? AND status = 'Resolved'", (z_id,)).fetchone()['c']
-    
-    dept_stats = conn.execute("SELECT d.department_name, COUNT(c.id) as count FROM departments d LEFT JOIN complaints c ON d.department_id = c.department_id AND c.zone_id = ? GROUP BY d.department_id", (z_id,)).fetchall()
-    
-    conn.close()
+    def build():
+        conn = get_db()
+        
+        # Complaint counts per (department, status) for the zone: a few rows from
+        # the zone_stats counters, or one pass over the zone's index range
+        if USE_ZONE_STATS:
+            counts = conn.execute("SELECT department_id, status, n FROM zone_stats WHERE zone_id = ? AND n > 0", (z_id,)).fetchall()
+        else:
+            counts = conn.execute("SELECT COALESCE(department_id, 0) as department_id, COALESCE(status, '') as status, COUNT(*) as n FROM complaints WHERE zone_id = ? GROUP BY department_id, status", (z_id,)).fetchall()
+        departments = conn.execute("SELECT department_id, department_name FROM departments").fetchall()
+        
+        total = pending = resolved = 0
+        per_department = {}
+        for row in counts:
+            total += row['n']
+            if row['status'] == 'Resolved':
+                resolved += row['n']
+            elif row['status'] not in ('', 'Rejected'):
+                pending += row['n']
+            per_department[row['department_id']] = per_department.get(row['department_id'], 0) + row['n']
+        
+        return {
+            'total': total,
+            'pending': pending,
+            'resolved': resolved,
+            'workload': {d['department_name']: per_department.get(d['department_id'], 0) for d in departments}
+        }
     
-    return jsonify({
-        'total': total,
-        'pending': pending,
-        'resolved': resolved,
-        'workload': {r['department_name']: r['count'] for r in dept_stats}
-    })
+    return zone_conditional_json(z_id, build)
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    if sys.argv[1:] == ['init-db']:
+        init_db()
+        print(f'Database ready: {DATABASE}')
+    else:
+        create_app().run(debug=True, port=5000)
@@ -0,0 +1,149 @@
+"""
+Array-backed model artifacts: a faster-loading alternative to the pickles.
+
+An artifact is a directory holding
+
+    meta.json        vectorizer settings, classifier type, format version and
+                     a content hash of all of it (the model version)
+    vocabulary.npy   terms, sorted (so a term's position is its feature index)
+    idf.npy          IDF weight per term
+    coef.npy         classifier coefficients, one row per class (or one for binary)
+    intercept.npy
+    classes.npy
+
+The arrays are memory-mapped on load, so opening an artifact costs a few
+file reads no matter how large the vocabulary is, and every process that
+opens the same files shares one copy through the page cache.
+
+    python backend/artifacts.py export    # model.pkl + vectorizer.pkl -> model_artifacts/
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(BASE_DIR, 'model_artifacts')
+FORMAT_VERSION = 1
+
+# TfidfVectorizer settings that affect transform(); everything else is fit-time only
+VECTORIZER_PARAMS = ('lowercase', 'token_pattern', 'ngram_range', 'analyzer', 'strip_accents',
+                     'binary', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf')
+ARRAYS = ('vocabulary', 'idf', 'coef', 'intercept', 'classes')
+
+
+class ModelArtifacts:
+    def __init__(self, meta, arrays, version):
+        self.meta = meta
+        self.version = version
+        self.vocabulary = arrays['vocabulary']
+        self.idf = arrays['idf']
+        self.coef = arrays['coef']
+        self.intercept = arrays['intercept']
+        self.classes = arrays['classes']
+
+    @property
+    def vectorizer_params(self):
+        return self.meta['vectorizer']
+
+    def to_sklearn(self):
+        # Rebuilds a fitted (vectorizer, model) pair that predicts exactly
+        # like the exported one
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn import linear_model, svm
+
+        params = dict(self.vectorizer_params)
+        params['ngram_range'] = tuple(params['ngram_range'])
+        vectorizer = TfidfVectorizer(stop_words=self.meta['stop_words'], **params)
+        vectorizer.vocabulary_ = {term: i for i, term in enumerate(self.vocabulary.tolist())}
+        vectorizer.fixed_vocabulary_ = True
+        if params['use_idf']:
+            vectorizer.idf_ = np.asarray(self.idf)
+
+        model_class = getattr(linear_model, self.meta['model'], None) or getattr(svm, self.meta['model'])
+        model = model_class()
+        model.coef_ = np.asarray(self.coef)
+        model.intercept_ = np.asarray(self.intercept)
+        model.classes_ = np.asarray(self.classes)
+        model.n_features_in_ = self.coef.shape[1]
+        return vectorizer, model
+
+
+def export_artifacts(vectorizer, model, path=DEFAULT_DIR):
+    vocabulary = vectorizer.get_feature_names_out()
+    # TfidfVectorizer numbers its features in sorted term order
+    assert all(vectorizer.vocabulary_[term] == i for i, term in enumerate(vocabulary))
+    stop_words = vectorizer.get_stop_words()
+
+    meta = {
+        'format': FORMAT_VERSION,
+        'model': type(model).__name__,
+        'vectorizer': {name: vectorizer.get_params()[name] for name in VECTORIZER_PARAMS},
+        'stop_words': sorted(stop_words) if stop_words else None,
+    }
+    arrays = {
+        'vocabulary': vocabulary.astype(str),
+        'idf': vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vocabulary)),
+        'coef': model.coef_,
+        'intercept': np.asarray(model.intercept_, dtype=np.float64),
+        'classes': model.classes_.astype(str),
+    }
+
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    # Hashed once here rather than on every load, which would read every page
+    meta['version'] = artifact_version(meta, arrays)
+
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), array, allow_pickle=False)
+    # meta.json last: a directory without it is an incomplete export
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def load_artifacts(path=DEFAULT_DIR):
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format {meta.get('format')!r} in {path}")
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+              for name in ARRAYS}
+    # Exports from before the version was stored are hashed at load
+    version = meta.get('version') or artifact_version(meta, arrays)
+    return ModelArtifacts(meta, arrays, version)
+
+
+def artifact_version(meta, arrays):
+    # Content hash: re-exporting an identical model keeps the version
+    meta = {key: value for key, value in meta.items() if key != 'version'}
+    digest = hashlib.sha256(json.dumps(meta, sort_keys=True).encode())
+    for name in ARRAYS:
+        digest.update(name.encode())
+        digest.update(str(arrays[name].dtype).encode())
+        digest.update(np.ascontiguousarray(arrays[name]).data)
+    return digest.hexdigest()[:12]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['export'])
+    parser.add_argument('--model', default=os.path.join(BASE_DIR, 'model.pkl'))
+    parser.add_argument('--vectorizer', default=os.path.join(BASE_DIR, 'vectorizer.pkl'))
+    parser.add_argument('--out', default=DEFAULT_DIR)
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    with open(args.vectorizer, 'rb') as f:
+        vectorizer = pickle.load(f)
+    export_artifacts(vectorizer, model, args.out)
+    print(f"Exported {len(vectorizer.vocabulary_)} terms, {len(model.classes_)} classes to {args.out}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
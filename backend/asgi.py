@@ -0,0 +1,206 @@
+"""
+ASGI entry point for production serving.
+
+    uvicorn backend.asgi:app --host 0.0.0.0 --port 5000
+
+Requests are parsed and answered on an asyncio event loop. The Flask
+handlers (and so all SQLite work) run on a bounded thread pool sized to
+the database connection pool, classification runs in worker processes, and
+/api/support/stream is drained on the loop, so an open dashboard costs a
+subscription instead of a thread.
+
+    ASGI_THREADS               handler threads (default: DB_POOL_SIZE)
+    ASGI_INFERENCE_PROCESSES   classifier processes, 0 = in-thread (default: CPU count)
+
+Request bodies are buffered before the handler runs, so they are capped at
+the Flask app's MAX_CONTENT_LENGTH; larger ones get 413 without being read
+to the end.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import app as app_module
+except ImportError:
+    import app as app_module
+from inference_pool import InferencePool
+
+# Header names that map to CGI variables without the HTTP_ prefix
+# (CONTENT_LENGTH comes from the buffered body)
+_CGI_HEADERS = {'content-type': 'CONTENT_TYPE'}
+_END = object()
+_TOO_LARGE = b'{"error": "Request body too large"}'
+
+
+def build_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        # The body is fully buffered, so its length is known even when the
+        # client sent it chunked
+        'CONTENT_LENGTH': str(len(body)),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').lower()
+        if name == 'content-length':
+            continue
+        value = raw_value.decode('latin-1')
+        key = _CGI_HEADERS.get(name) or 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+class ASGIApp:
+    def __init__(self, wsgi_app, threads, inference_processes, max_body_size=None):
+        self.wsgi_app = wsgi_app
+        self.max_body_size = max_body_size
+        self.threads = threads
+        self.inference_processes = inference_processes
+        self.executor = None
+        self.inference_pool = None
+
+    def start(self):
+        if self.executor is not None:
+            return
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi-handler')
+        if self.inference_processes and app_module.classifier is not None:
+            self.inference_pool = InferencePool(app_module.classifier, self.inference_processes)
+            app_module.inference_pool = self.inference_pool
+
+    def stop(self):
+        # The app may have replaced the pool on a model reload
+        pool, app_module.inference_pool = app_module.inference_pool, None
+        if pool is not None:
+            pool.shutdown()
+        app_module.password_verifier.shutdown()
+        self.inference_pool = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            self.start()
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, scope, receive):
+        # Returns the request body, None on disconnect or _TOO_LARGE when it
+        # exceeds max_body_size (checked against Content-Length up front and
+        # while chunks arrive)
+        limit = self.max_body_size
+        if limit is not None:
+            for name, value in scope['headers']:
+                if name.lower() == b'content-length' and value.isdigit() and int(value) > limit:
+                    return _TOO_LARGE
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if limit is not None and size > limit:
+                return _TOO_LARGE
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(scope, receive)
+        if body is None:
+            return
+        if body is _TOO_LARGE:
+            await send({'type': 'http.response.start', 'status': 413, 'headers': [
+                (b'content-type', b'application/json'), (b'content-length', str(len(_TOO_LARGE)).encode()),
+                (b'connection', b'close')]})
+            await send({'type': 'http.response.body', 'body': _TOO_LARGE})
+            return
+
+        environ = build_environ(scope, body)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        def call_app():
+            app_iter = self.wsgi_app(environ, start_response)
+            if 'complaints.event_stream' in environ:
+                # Never iterated here: the body is streamed from the loop below
+                return app_iter, _END
+            iterator = iter(app_iter)
+            return app_iter, next(iterator, _END), iterator
+
+        loop = asyncio.get_running_loop()
+        app_iter, first, *rest = await loop.run_in_executor(self.executor, call_app)
+        try:
+            await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+            if 'complaints.event_stream' in environ:
+                await self.stream_events(environ['complaints.event_stream'], receive, send)
+                return
+            chunk = first
+            while chunk is not _END:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, next, rest[0], _END)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(app_iter, 'close'):
+                await loop.run_in_executor(self.executor, app_iter.close)
+
+    async def stream_events(self, stream, receive, send):
+        async def pump():
+            async for chunk in stream:
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+        async def wait_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(wait_disconnect())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+app = ASGIApp(
+    app_module.create_app(),
+    threads=int(os.environ.get('ASGI_THREADS', app_module.db_pool.size or 8)),
+    inference_processes=int(os.environ.get('ASGI_INFERENCE_PROCESSES', os.cpu_count() or 1)),
+    max_body_size=app_module.app.config['MAX_CONTENT_LENGTH'],
+)
@@ -0,0 +1,173 @@
+"""
+Micro-batching for single-complaint predictions.
+
+Concurrent callers of PredictionBatcher.predict() are held for up to
+``window_ms`` (or until ``max_batch`` texts are waiting) and classified
+together with one call to ``predict_fn``, which takes a list of texts and
+returns a list of categories in the same order.
+
+If a batch fails its texts are retried one at a time, so one bad text only
+fails its own caller. A caller that has not been answered after
+``timeout`` seconds (a stuck or dead batcher thread) classifies its text
+inline instead.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# Number of recent queue-wait samples kept for percentiles
+WAIT_SAMPLES = 2048
+
+
+class _Pending:
+    __slots__ = ('text', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, text):
+        self.text = text
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PredictionBatcher:
+    def __init__(self, predict_fn, window_ms=5.0, max_batch=64, timeout=5.0):
+        self.predict_fn = predict_fn
+        self.window = max(window_ms, 0) / 1000.0
+        self.max_batch = max(int(max_batch), 1)
+        self.timeout = timeout
+        self._metrics_lock = threading.Lock()
+        self._fork_lock = threading.Lock()
+        self._reset_worker()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._timeouts = 0
+        self._size_histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._size_histogram['+Inf'] = 0
+        self._wait_total = 0.0
+        self._wait_samples = deque(maxlen=WAIT_SAMPLES)
+
+    @property
+    def enabled(self):
+        return self.window > 0 and self.max_batch > 1
+
+    def predict(self, text):
+        if not self.enabled:
+            return self.predict_fn([text])[0]
+
+        item = _Pending(text)
+        # Threads do not survive fork(), so a forked worker starts its own
+        if self._pid != os.getpid():
+            with self._fork_lock:
+                if self._pid != os.getpid():
+                    self._reset_worker()
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(item)
+            self._cond.notify()
+        if not item.done.wait(self.window + self.timeout):
+            with self._cond:
+                if item in self._queue:
+                    self._queue.remove(item)
+            with self._metrics_lock:
+                self._timeouts += 1
+            return self.predict_fn([text])[0]
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def metrics(self):
+        with self._metrics_lock:
+            waits = sorted(self._wait_samples)
+            return {
+                'enabled': self.enabled,
+                'window_ms': self.window * 1000.0,
+                'max_batch': self.max_batch,
+                'batches': self._batches,
+                'items': self._items,
+                'timeouts': self._timeouts,
+                'batch_size': {
+                    'mean': self._items / self._batches if self._batches else 0.0,
+                    'max': self._largest_batch,
+                    'histogram': {str(k): v for k, v in self._size_histogram.items()},
+                },
+                'queue_wait_ms': {
+                    'mean': self._wait_total * 1000.0 / self._items if self._items else 0.0,
+                    'p50': _percentile(waits, 0.50) * 1000.0,
+                    'p99': _percentile(waits, 0.99) * 1000.0,
+                    'max': waits[-1] * 1000.0 if waits else 0.0,
+                },
+            }
+
+    def _reset_worker(self):
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._thread = None
+        self._pid = os.getpid()
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='predict-batcher', daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued + self.window
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            size = min(self.max_batch, len(self._queue))
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            try:
+                self._classify(batch)
+                self._record(batch, started)
+            finally:
+                for item in batch:
+                    item.done.set()
+
+    def _classify(self, batch):
+        try:
+            results = self.predict_fn([item.text for item in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+                return
+            # Find the text(s) that failed instead of failing every caller
+            for item in batch:
+                self._classify([item])
+            return
+        for item, result in zip(batch, results):
+            item.result = result
+
+    def _record(self, batch, started):
+        size = len(batch)
+        with self._metrics_lock:
+            self._batches += 1
+            self._items += size
+            self._largest_batch = max(self._largest_batch, size)
+            bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), '+Inf')
+            self._size_histogram[bucket] += 1
+            for item in batch:
+                wait = started - item.enqueued
+                self._wait_total += wait
+                self._wait_samples.append(wait)
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
@@ -0,0 +1,409 @@
+"""
+Benchmarks for the complaints backend.
+
+Every benchmark runs against a scratch copy of complaints.db, so the
+committed database is never modified.
+
+    python backend/benchmark.py predict --n 1000
+    python backend/benchmark.py complaints --n 500
+    python backend/benchmark.py load --clients 50,200,1000 --duration 10
+    python backend/benchmark.py startup --n 20
+    python backend/benchmark.py auth --logins 0,4,16 --duration 10
+    python backend/benchmark.py inference --n 2000
+"""
+import argparse
+import asyncio
+import atexit
+import csv
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+
+def scratch_database():
+    tmp_dir = tempfile.mkdtemp(prefix='complaints_bench_')
+    atexit.register(shutil.rmtree, tmp_dir, ignore_errors=True)
+    db_path = os.path.join(tmp_dir, 'complaints.db')
+    shutil.copy(os.path.join(BASE_DIR, 'complaints.db'), db_path)
+    return db_path
+
+
+def load_app():
+    # The app reads COMPLAINTS_DB at import time
+    os.environ['COMPLAINTS_DB'] = scratch_database()
+    import app as app_module
+    app_module.create_app()
+    return app_module
+
+
+def sample_texts(n):
+    with open(os.path.join(BASE_DIR, 'complaints_dataset.csv'), newline='', encoding='utf-8') as f:
+        texts = [row['text'] for row in csv.DictReader(f)]
+    return [texts[i % len(texts)] for i in range(n)]
+
+
+def report(label, count, elapsed):
+    print(f"{label:<28} {count:>7} complaints in {elapsed:8.3f}s  ->  {count / elapsed:10.1f} complaints/sec")
+
+
+def bench_predict(args):
+    app_module = load_app()
+    client = app_module.app.test_client()
+    texts = sample_texts(args.n)
+
+    start = time.perf_counter()
+    for text in texts:
+        res = client.post('/api/predict', json={'text': text, 'user_id': 1, 'zone_id': 1})
+        assert res.status_code == 200, res.get_json()
+    single = time.perf_counter() - start
+    report('single /api/predict', len(texts), single)
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), app_module.MAX_PREDICT_BATCH):
+        chunk = texts[i:i + app_module.MAX_PREDICT_BATCH]
+        res = client.post('/api/predict/batch', json={
+            'complaints': [{'text': text, 'user_id': 1, 'zone_id': 1} for text in chunk]
+        })
+        assert res.status_code == 200, res.get_json()
+    batch = time.perf_counter() - start
+    report('bulk /api/predict/batch', len(texts), batch)
+
+    print(f"speedup: {single / batch:.1f}x")
+
+
+def bench_complaints(args):
+    from db import ConnectionPool
+
+    app_module = load_app()
+    client = app_module.app.test_client()
+    urls = [
+        ('user listing', '/api/complaints?role=user&user_id=10'),
+        ('admin listing', '/api/complaints?role=admin'),
+    ]
+    pools = [
+        ('connect per request', ConnectionPool(app_module.DATABASE, size=0)),
+        ('pooled connections', ConnectionPool(app_module.DATABASE, size=8)),
+    ]
+
+    for url_label, url in urls:
+        for pool_label, pool in pools:
+            app_module.db_pool = pool
+            client.get(url)  # warm up
+            start = time.perf_counter()
+            for _ in range(args.n):
+                res = client.get(url)
+                assert res.status_code == 200
+            elapsed = time.perf_counter() - start
+            print(f"{url_label:<14} {pool_label:<20} {args.n / elapsed:10.1f} requests/sec")
+
+
+# Servers compared by the load test; {port} is filled in at start-up
+SERVERS = {
+    'werkzeug': [sys.executable, '-m', 'flask', '--app', 'app:create_app()', 'run', '--port', '{port}', '--with-threads'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', 'app:create_app()', '--bind', '127.0.0.1:{port}', '--log-level', 'warning'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', '{port}', '--log-level', 'warning'],
+}
+
+# Dashboard reads, stats and new complaints in the mix a busy zone sees.
+# The stats read needs a master token for the zone (see master_headers()).
+MASTER_LOGIN = {'username': 'chennai_admin', 'password': 'admin123'}
+LOAD_REQUESTS = [
+    ('GET', '/api/support/complaints?zone_id=1', None),
+    ('GET', '/api/support/complaints?zone_id=1', None),
+    ('GET', '/api/master/stats?zone_id=1', None),
+    ('POST', '/api/predict', {'text': 'The delivery was late and the food arrived cold', 'user_id': 1, 'zone_id': 1}),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def master_headers(port, login=MASTER_LOGIN):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}/api/master/login', data=json.dumps(login).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=30) as res:
+        return {'Authorization': f"Bearer {json.load(res)['user']['token']}"}
+
+
+def start_server(name, db_path, **env):
+    port = free_port()
+    command = [part.format(port=port) for part in SERVERS[name]]
+    env = dict(os.environ, COMPLAINTS_DB=db_path, **env)
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{name} server exited with code {process.returncode}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/zones', timeout=1).read()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{name} server did not start')
+
+
+async def http_request(port, method, path, payload, conn, headers=None):
+    # Minimal HTTP/1.1 client; conn is a [reader, writer] pair reused while
+    # the server keeps the connection alive
+    body = json.dumps(payload).encode() if payload is not None else b''
+    if conn[0] is None:
+        conn[:] = await asyncio.open_connection('127.0.0.1', port)
+    reader, writer = conn
+    extra = ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n'
+        f'{extra}Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        headers['connection'] = 'close'
+    if headers.get('connection') == 'close':
+        writer.close()
+        conn[:] = [None, None]
+    return status
+
+
+async def run_clients(port, clients, duration, requests=LOAD_REQUESTS, headers=None):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client(index):
+        nonlocal errors
+        conn = [None, None]
+        i = index
+        while time.perf_counter() < deadline:
+            method, path, payload = requests[i % len(requests)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                status = await http_request(port, method, path, payload, conn, headers)
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                errors += 1
+                if conn[1] is not None:
+                    conn[1].close()
+                conn[:] = [None, None]
+                await asyncio.sleep(0.05)
+                continue
+            if status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+        if conn[1] is not None:
+            conn[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return sorted(latencies), errors, time.perf_counter() - started
+
+
+def percentile_ms(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)] * 1000.0
+
+
+def bench_load(args):
+    clients = [int(n) for n in args.clients.split(',')]
+    print(f"{'server':<10} {'clients':>7} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for name in args.servers.split(','):
+        process, port = start_server(name, scratch_database())
+        try:
+            headers = master_headers(port)
+            for n in clients:
+                latencies, errors, elapsed = asyncio.run(run_clients(port, n, args.duration, headers=headers))
+                print(f"{name:<10} {n:>7} {len(latencies):>9} {errors:>7} {len(latencies) / elapsed:>9.1f} "
+                      f"{percentile_ms(latencies, 0.50):>9.1f} {percentile_ms(latencies, 0.99):>9.1f}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+# Login storm next to complaint submission: the password checks run on the
+# request threads (0 verifier processes) or in the verifier pool
+AUTH_MODES = {
+    'in-thread': {'PASSWORD_WORKERS': '0'},
+    'verifier pool': {'PASSWORD_WORKERS': '1'},
+}
+LOGIN_REQUESTS = [('POST', '/api/login', {'username': 'admin', 'password': 'admin123'})]
+PREDICT_REQUESTS = LOAD_REQUESTS[-1:]
+PREDICT_CLIENTS = 8
+
+
+async def run_mixed(port, logins, duration):
+    predict = run_clients(port, PREDICT_CLIENTS, duration, PREDICT_REQUESTS)
+    if not logins:
+        return await predict, ([], 0, duration)
+    return await asyncio.gather(predict, run_clients(port, logins, duration, LOGIN_REQUESTS))
+
+
+def bench_auth(args):
+    logins = [int(n) for n in args.logins.split(',')]
+    print(f"{'password checks':<16} {'logins':>6} {'logins/s':>9} {'busy':>6} {'predict/s':>10} "
+          f"{'predict p50':>12} {'predict p99':>12}")
+    for label, env in AUTH_MODES.items():
+        db_path = scratch_database()
+        # Hash the admin password with the current policy before measuring
+        subprocess.run([sys.executable, 'app.py', 'init-db'], cwd=BASE_DIR, check=True, capture_output=True,
+                       env=dict(os.environ, COMPLAINTS_DB=db_path))
+        process, port = start_server('asgi', db_path, **env)
+        try:
+            for n in logins:
+                (predicts, _, elapsed), (accepted, busy, _) = asyncio.run(run_mixed(port, n, args.duration))
+                print(f"{label:<16} {n:>6} {len(accepted) / elapsed:>9.1f} {busy:>6} {len(predicts) / elapsed:>10.1f} "
+                      f"{percentile_ms(predicts, 0.50):>10.1f}ms {percentile_ms(predicts, 0.99):>10.1f}ms")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+# Model loading as a fresh worker does it, imports included
+STARTUP_LOADERS = {
+    'pickle': """
+import pickle
+with open('model.pkl', 'rb') as f:
+    model = pickle.load(f)
+with open('vectorizer.pkl', 'rb') as f:
+    vectorizer = pickle.load(f)
+""",
+    'artifacts (mmap)': """
+from artifacts import load_artifacts
+artifacts = load_artifacts()
+""",
+    'artifacts -> sklearn': """
+from artifacts import load_artifacts
+vectorizer, model = load_artifacts().to_sklearn()
+""",
+    'artifacts -> numpy': """
+from artifacts import load_artifacts
+from inference import LinearTextClassifier
+classifier = LinearTextClassifier(load_artifacts())
+""",
+}
+
+
+# App startup as a worker does it: import, then the create_app() database check
+APP_STARTUP = """
+import app
+imported = time.perf_counter()
+app.create_app()
+print(imported - started)
+"""
+
+
+def time_script(script, env=None):
+    # Each run is a new interpreter, so nothing is cached in-process
+    script = 'import time, warnings\nwarnings.simplefilter("ignore")\nstarted = time.perf_counter()\n' + script
+    out = subprocess.run([sys.executable, '-c', script + 'print(time.perf_counter() - started)'], cwd=BASE_DIR,
+                         env=env, capture_output=True, text=True, check=True).stdout.split()
+    return [float(t) for t in out[-2:]]
+
+
+def bench_startup(args):
+    from artifacts import DEFAULT_DIR
+    if not os.path.exists(os.path.join(DEFAULT_DIR, 'meta.json')):
+        sys.exit('No model artifacts; run "python backend/artifacts.py export" first')
+
+    for label, loader in STARTUP_LOADERS.items():
+        timings = sorted(time_script(loader)[-1] for _ in range(args.n))
+        print(f"{label:<22} median {timings[len(timings) // 2] * 1000:8.1f} ms   min {timings[0] * 1000:8.1f} ms")
+
+    # cold: a new, empty database that init_db() has to build and seed
+    # warm: an initialized copy of complaints.db, one schema check query
+    warm_db = scratch_database()
+    subprocess.run([sys.executable, 'app.py', 'init-db'], cwd=BASE_DIR, check=True, capture_output=True,
+                   env=dict(os.environ, COMPLAINTS_DB=warm_db))
+    cold_dir = tempfile.mkdtemp(prefix='complaints_bench_')
+    atexit.register(shutil.rmtree, cold_dir, ignore_errors=True)
+
+    print(f"{'app start':<22} {'total ms':>9} {'import ms':>10} {'create_app ms':>14}")
+    for label in ('cold', 'warm'):
+        runs = []
+        for i in range(args.n):
+            db_path = warm_db if label == 'warm' else os.path.join(cold_dir, f'cold{i}.db')
+            runs.append(time_script(APP_STARTUP, env=dict(os.environ, COMPLAINTS_DB=db_path)))
+        runs.sort(key=lambda run: run[1])
+        imported, total = runs[len(runs) // 2]
+        print(f"{label:<22} {total * 1000:>9.1f} {imported * 1000:>10.1f} {(total - imported) * 1000:>14.1f}")
+
+
+def bench_inference(args):
+    from artifacts import load_artifacts
+    from inference import LinearTextClassifier, SklearnClassifier
+
+    artifacts = load_artifacts()
+    engines = [
+        ('sklearn', SklearnClassifier(*artifacts.to_sklearn())),
+        ('numpy', LinearTextClassifier(artifacts)),
+    ]
+    texts = sample_texts(args.n)
+
+    print(f"{'engine':<8} {'batch':>6} {'p50 us':>9} {'p99 us':>9} {'texts/sec':>11}")
+    for batch_size in (1, 64, 1000):
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        for label, engine in engines:
+            engine.predict(batches[0])  # warm up
+            timings = []
+            for batch in batches:
+                started = time.perf_counter()
+                engine.predict(batch)
+                timings.append(time.perf_counter() - started)
+            total = sum(timings)
+            timings.sort()
+            print(f"{label:<8} {batch_size:>6} {timings[len(timings) // 2] * 1e6:>9.0f} "
+                  f"{timings[min(int(0.99 * len(timings)), len(timings) - 1)] * 1e6:>9.0f} {len(texts) / total:>11.0f}")
+
+
+BENCHMARKS = {
+    'predict': bench_predict,
+    'complaints': bench_complaints,
+    'load': bench_load,
+    'startup': bench_startup,
+    'inference': bench_inference,
+    'auth': bench_auth,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--n', type=int, default=1000, help='number of complaints / requests')
+    parser.add_argument('--clients', default='50,200,1000', help='load: comma-separated concurrent client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='load: seconds per client count')
+    parser.add_argument('--logins', default='0,4,16', help='auth: comma-separated concurrent login client counts')
+    parser.add_argument('--servers', default='werkzeug,gunicorn,asgi', help=f"load: any of {','.join(SERVERS)}")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
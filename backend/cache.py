@@ -0,0 +1,79 @@
+"""
+Small in-process cache with per-key TTL and LRU eviction.
+
+Values are shared by all request threads of one worker process; write
+paths call invalidate() so readers never wait out the TTL for their own
+changes. Other worker processes see the change once their entry expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize=256, default_ttl=60.0):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, loader, ttl=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if isinstance(k, str) and k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,261 @@
+"""
+SQLite connection handling shared by the app and the maintenance scripts.
+
+Connections are opened with the PRAGMAs below applied once, and the Flask
+app hands them out per request from a bounded ConnectionPool instead of
+opening and closing a new connection in every handler.
+"""
+import os
+import queue
+import sqlite3
+import threading
+
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),      # negative = KiB, i.e. ~16 MB page cache
+    ('mmap_size', 268435456),    # 256 MB memory-mapped reads
+    ('busy_timeout', 5000),      # ms to wait on a locked database
+)
+
+
+# Secondary indexes owned by ensure_indexes(): name -> (table, columns).
+# Composite indexes lead with the equality filters the handlers use and end
+# with timestamp so "ORDER BY timestamp DESC" is read straight off the index.
+INDEXES = {
+    'idx_complaints_timestamp': ('complaints', 'timestamp'),
+    'idx_complaints_zone_timestamp': ('complaints', 'zone_id, timestamp'),
+    'idx_complaints_zone_dept_status': ('complaints', 'zone_id, department_id, status'),
+    'idx_complaints_user_timestamp': ('complaints', 'user_id, timestamp'),
+    'idx_complaints_category_timestamp': ('complaints', 'category, timestamp'),
+    'idx_complaints_status_timestamp': ('complaints', 'status, timestamp'),
+    'idx_complaints_order': ('complaints', 'order_id'),
+    'idx_complaints_model_version': ('complaints', 'model_version'),
+    'idx_orders_user_date': ('orders', 'user_id, order_date'),
+    'idx_compensation_complaint': ('complaint_compensation', 'complaint_id'),
+    'idx_support_staff_zone': ('support_staff', 'zone_id'),
+}
+
+
+# Materialized complaint counters per (zone, department, status), kept up
+# to date by triggers on every INSERT/UPDATE/DELETE of complaints. NULL
+# zone/department ids are stored as 0 and a NULL status as ''.
+ZONE_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS zone_stats (
+    zone_id INTEGER NOT NULL,
+    department_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (zone_id, department_id, status)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS zone_stats_insert AFTER INSERT ON complaints
+BEGIN
+    INSERT INTO zone_stats (zone_id, department_id, status, n)
+    VALUES (COALESCE(NEW.zone_id, 0), COALESCE(NEW.department_id, 0), COALESCE(NEW.status, ''), 1)
+    ON CONFLICT (zone_id, department_id, status) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS zone_stats_delete AFTER DELETE ON complaints
+BEGIN
+    UPDATE zone_stats SET n = n - 1
+    WHERE zone_id = COALESCE(OLD.zone_id, 0) AND department_id = COALESCE(OLD.department_id, 0) AND status = COALESCE(OLD.status, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS zone_stats_update AFTER UPDATE OF zone_id, department_id, status ON complaints
+WHEN OLD.zone_id IS NOT NEW.zone_id OR OLD.department_id IS NOT NEW.department_id OR OLD.status IS NOT NEW.status
+BEGIN
+    UPDATE zone_stats SET n = n - 1
+    WHERE zone_id = COALESCE(OLD.zone_id, 0) AND department_id = COALESCE(OLD.department_id, 0) AND status = COALESCE(OLD.status, '');
+    INSERT INTO zone_stats (zone_id, department_id, status, n)
+    VALUES (COALESCE(NEW.zone_id, 0), COALESCE(NEW.department_id, 0), COALESCE(NEW.status, ''), 1)
+    ON CONFLICT (zone_id, department_id, status) DO UPDATE SET n = n + 1;
+END;
+"""
+
+ZONE_STATS_TRIGGERS = ('zone_stats_insert', 'zone_stats_delete', 'zone_stats_update')
+
+
+# Per-zone change counter bumped by triggers whenever a complaint in the
+# zone (or one of its compensations) is written. Used to build ETags for
+# the dashboard endpoints, and consistent across worker processes.
+CHANGE_VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS zone_versions (
+    zone_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS zone_version_insert AFTER INSERT ON complaints
+BEGIN
+    INSERT INTO zone_versions (zone_id, version) VALUES (COALESCE(NEW.zone_id, 0), 1)
+    ON CONFLICT (zone_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS zone_version_update AFTER UPDATE ON complaints
+BEGIN
+    INSERT INTO zone_versions (zone_id, version) VALUES (COALESCE(NEW.zone_id, 0), 1)
+    ON CONFLICT (zone_id) DO UPDATE SET version = version + 1;
+    INSERT INTO zone_versions (zone_id, version) SELECT COALESCE(OLD.zone_id, 0), 1 WHERE OLD.zone_id IS NOT NEW.zone_id
+    ON CONFLICT (zone_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS zone_version_delete AFTER DELETE ON complaints
+BEGIN
+    INSERT INTO zone_versions (zone_id, version) VALUES (COALESCE(OLD.zone_id, 0), 1)
+    ON CONFLICT (zone_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS zone_version_compensation AFTER INSERT ON complaint_compensation
+BEGIN
+    INSERT INTO zone_versions (zone_id, version) SELECT COALESCE(zone_id, 0), 1 FROM complaints WHERE id = NEW.complaint_id
+    ON CONFLICT (zone_id) DO UPDATE SET version = version + 1;
+END;
+"""
+CHANGE_VERSION_TRIGGERS = ('zone_version_insert', 'zone_version_update', 'zone_version_delete',
+                           'zone_version_compensation')
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+def connect(path, pragmas=PRAGMAS):
+    # check_same_thread is off because pooled connections move between
+    # request threads; each one is only ever used by one request at a time
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for name, value in pragmas:
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+def ensure_indexes(conn, indexes=INDEXES):
+    # Creates missing managed indexes and drops idx_* indexes that are no
+    # longer in the set, then refreshes planner statistics
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'")}
+    for name in existing - set(indexes):
+        conn.execute(f'DROP INDEX IF EXISTS {name}')
+    for name, (table, columns) in indexes.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+    conn.execute('PRAGMA optimize')
+    conn.commit()
+
+
+def enable_zone_stats(conn):
+    # Creates the counter table and triggers, backfilling the counters the
+    # first time (or after disable_zone_stats) in the same transaction
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'zone_stats'").fetchone()
+    if exists:
+        conn.executescript(ZONE_STATS_SCHEMA)
+        return
+    conn.executescript(f"""
+        BEGIN;
+        {ZONE_STATS_SCHEMA}
+        INSERT INTO zone_stats (zone_id, department_id, status, n)
+        SELECT COALESCE(zone_id, 0), COALESCE(department_id, 0), COALESCE(status, ''), COUNT(*)
+        FROM complaints GROUP BY 1, 2, 3;
+        COMMIT;
+    """)
+
+
+def ensure_change_versions(conn):
+    conn.executescript(CHANGE_VERSION_SCHEMA)
+
+
+def zone_version(conn, zone_id):
+    row = conn.execute("SELECT version FROM zone_versions WHERE zone_id = ?", (zone_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def disable_zone_stats(conn):
+    # Drops the triggers and the table so a later enable starts from a fresh backfill
+    for trigger in ZONE_STATS_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    conn.execute('DROP TABLE IF EXISTS zone_stats')
+    conn.commit()
+
+
+class ConnectionPool:
+    """Bounded pool of warmed connections. A size of 0 disables pooling."""
+
+    def __init__(self, path, size=8, timeout=10.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Connections must never be shared across fork(), so a forked
+        # worker starts with an empty pool of its own
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(self.size, 1))
+        self._created = 0
+        self._in_use = 0
+
+    def acquire(self):
+        if self.size == 0:
+            return connect(self.path)
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            slots = self._slots
+        if not slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f'No database connection available after {self.timeout}s')
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = connect(self.path)
+            except Exception:
+                slots.release()
+                raise
+            with self._lock:
+                self._created += 1
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        if self.size == 0:
+            conn.close()
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Checked out before a fork; it belongs to the parent
+                return
+            self._in_use -= 1
+            slots = self._slots
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+        finally:
+            slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = self._in_use
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+            }
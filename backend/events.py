@@ -0,0 +1,179 @@
+"""
+In-process publish/subscribe for live complaint updates.
+
+Write paths publish complaint events and every open dashboard stream in the
+same zone gets them. Fan-out happens in the publishing thread: the broker
+itself starts no threads, and a subscription is just a bounded queue that
+its stream drains. An idle subscriber therefore costs one small object,
+not a thread. A slow subscriber loses its oldest events instead of
+blocking publishers.
+
+Events only reach subscribers of the worker process that handled the
+write.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+
+# Recent events kept for Last-Event-ID replay after a reconnect
+REPLAY_SIZE = 1024
+
+
+class Subscription:
+    def __init__(self, zone_id, department_id=None, maxsize=256):
+        self.zone_id = str(zone_id)
+        self.department_id = str(department_id) if department_id else None
+        self.dropped = 0
+        self._events = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._listeners = []
+
+    def wants(self, event):
+        # A complaint moved to another department is also sent to the one it
+        # left, so that dashboard can drop it
+        if self.department_id is None:
+            return True
+        data = event['data']
+        return self.department_id in (str(data.get('department_id')), str(data.get('previous_department_id')))
+
+    def push(self, event):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def add_listener(self, listener):
+        # Called (from the publishing thread) after every push, e.g. to wake
+        # an asyncio consumer instead of blocking a thread in wait()
+        with self._cond:
+            self._listeners.append(listener)
+
+    def drain(self):
+        with self._cond:
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def wait(self, timeout=None):
+        # Blocks until events are available or the timeout expires; returns
+        # the pending events (possibly none)
+        with self._cond:
+            if not self._events:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+
+class EventBroker:
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._by_zone = {}  # zone id (str) -> set of Subscription
+        self._ids = itertools.count(1)
+        self._recent = deque(maxlen=REPLAY_SIZE)
+        self.published = 0
+
+    def subscribe(self, zone_id, department_id=None, last_event_id=None):
+        subscription = Subscription(zone_id, department_id, self.max_queue)
+        with self._lock:
+            self._by_zone.setdefault(subscription.zone_id, set()).add(subscription)
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event['id'] > last_event_id and event['zone_id'] == subscription.zone_id and subscription.wants(event):
+                        subscription.push(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._by_zone.get(subscription.zone_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_zone[subscription.zone_id]
+
+    def publish(self, event_type, data):
+        zone_id = str(data.get('zone_id'))
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'zone_id': zone_id, 'data': data}
+            self._recent.append(event)
+            self.published += 1
+            subscribers = list(self._by_zone.get(zone_id, ()))
+        for subscription in subscribers:
+            if subscription.wants(event):
+                subscription.push(event)
+        return event
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': sum(len(s) for s in self._by_zone.values()),
+                'zones': len(self._by_zone),
+                'published': self.published,
+            }
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+class EventStream:
+    """Body of an SSE response for one subscriber.
+
+    Iterating it blocks the calling thread between events (threaded WSGI
+    servers); ``async for`` waits on the event loop instead (asgi.py).
+    """
+
+    def __init__(self, broker, zone_id, department_id=None, last_event_id=None, heartbeat=15.0):
+        self.broker = broker
+        self.zone_id = zone_id
+        self.department_id = department_id
+        self.last_event_id = last_event_id
+        self.heartbeat = heartbeat
+
+    def __iter__(self):
+        subscription = self.broker.subscribe(self.zone_id, self.department_id, self.last_event_id)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                events = subscription.wait(timeout=self.heartbeat)
+                if not events:
+                    yield ': keepalive\n\n'
+                for event in events:
+                    yield format_sse(event)
+        finally:
+            self.broker.unsubscribe(subscription)
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+        subscription = self.broker.subscribe(self.zone_id, self.department_id, self.last_event_id)
+        subscription.add_listener(notify)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                wakeup.clear()
+                events = subscription.drain()
+                if not events:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), self.heartbeat)
+                    except asyncio.TimeoutError:
+                        yield ': keepalive\n\n'
+                    continue
+                for event in events:
+                    yield format_sse(event)
+        finally:
+            self.broker.unsubscribe(subscription)
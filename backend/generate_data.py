@@ -1,6 +1,31 @@
+"""
+Synthetic complaint text for training and benchmarking the classifier.
 
-import pandas as pd
-import random
+    python backend/generate_data.py                                  # 500 rows -> complaints_dataset.csv
+    python backend/generate_data.py --rows 5000000 --out /tmp/complaints.csv --jobs 4
+    python backend/generate_data.py --rows 1000000 --out /tmp/complaints.parquet --imbalance 20
+
+Texts come from fixed sentences and from templates with slots
+({restaurant}, {dish}, {amount}, {minutes}, {order}), wrapped in an
+optional opener and closer and randomly lower-cased or exclaimed. Rows
+are generated a chunk at a time with vectorized NumPy sampling, each
+chunk from its own seeded generator, and written out as they are
+produced, so memory stays fixed for any --rows and the same --seed and
+--chunk-size give the same file whatever --jobs is. Parquet output needs
+pyarrow.
+"""
+import argparse
+import csv
+import os
+import string
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 categories = [
     "Delivery Issue",
@@ -73,18 +98,216 @@ templates = {
     ]
 }
 
-data = []
-for _ in range(500):
-    category = random.choice(categories)
-    text = random.choice(templates[category])
-    # Add some random variations
-    if random.random() > 0.5:
-        text = text.lower()
-    if random.random() > 0.8:
-        text = text.replace(".", "!")
-    
-    data.append({"text": text, "category": category})
-
-df = pd.DataFrame(data)
-df.to_csv("backend/complaints_dataset.csv", index=False)
-print("Generated 500 complaints in complaints_dataset.csv")
+slotted_templates = {
+    "Delivery Issue": [
+        "My order from {restaurant} was {minutes} minutes late.",
+        "Waited {minutes} minutes for the {dish} and the rider never called.",
+        "Order {order} shows delivered but nothing reached me.",
+        "The rider from {restaurant} took a {minutes} minute detour.",
+        "{dish} arrived cold after {minutes} minutes.",
+        "Delivery partner cancelled order {order} without informing me.",
+    ],
+    "Food Quality Issue": [
+        "The {dish} from {restaurant} was stale.",
+        "{dish} tasted sour, clearly not fresh.",
+        "Found an insect in the {dish} from {restaurant}.",
+        "The {dish} was undercooked and the oil smelled old.",
+        "Paid {amount} rupees for {dish} that was inedible.",
+        "{restaurant} served burnt {dish} again.",
+    ],
+    "Wrong / Missing Item": [
+        "Ordered {dish} from {restaurant} but received something else.",
+        "The {dish} was missing from order {order}.",
+        "Got {dish} instead of what I ordered.",
+        "{restaurant} forgot the {dish} in my order.",
+        "Only half of order {order} was delivered, the {dish} is missing.",
+        "Bill says {amount} rupees but the {dish} was not in the bag.",
+    ],
+    "Payment / Refund Issue": [
+        "{amount} rupees deducted but order {order} failed.",
+        "Refund of {amount} rupees for order {order} still pending.",
+        "Charged {amount} rupees twice at {restaurant}.",
+        "Coupon applied but I was still billed {amount} rupees.",
+        "Cashback of {amount} rupees never reached my wallet.",
+        "Payment for order {order} failed but money was debited.",
+    ],
+    "App / Technical Issue": [
+        "App crashes when I open the {restaurant} menu.",
+        "Cannot track order {order}, the map keeps loading.",
+        "Payment screen froze for {minutes} minutes.",
+        "Search for {dish} shows no results in the app.",
+        "Order {order} does not show up in my history.",
+        "The app logged me out while ordering from {restaurant}.",
+    ],
+}
+
+restaurants = [
+    "Annapoorna", "Saravana Bhavan", "Murugan Idli Shop", "A2B", "Sangeetha", "CTR", "MTR",
+    "Vidyarthi Bhavan", "Rameshwaram Cafe", "Junior Kuppanna", "Paragon", "Dhe Puttu", "Chutneys",
+    "Minerva Coffee Shop", "Paradise Biryani", "Domino's", "Pizza Hut", "KFC", "McDonald's",
+    "Burger King", "Subway", "Haldiram's", "Barbeque Nation", "Behrouz Biryani", "Faasos",
+]
+dishes = [
+    "biryani", "masala dosa", "idli", "vada", "paneer butter masala", "butter chicken", "pizza",
+    "burger", "fried rice", "noodles", "parotta", "chicken 65", "curd rice", "meals", "upma",
+    "pongal", "chole bhature", "shawarma", "sandwich", "milkshake", "filter coffee", "gulab jamun",
+    "ice cream", "naan", "dal makhani", "fish curry", "momos", "pasta", "salad", "thali",
+]
+openers = ["", "", "", "Hi, ", "Very disappointed. ", "Second time this week! ", "Please look into this: ", "Hello team, "]
+closers = ["", "", "", " Please help.", " Not acceptable.", " Fix this asap.", " Worst experience ever.", " Kindly resolve."]
+
+
+def _strings(values):
+    return values.astype(str).astype(object)
+
+
+SLOTS = {
+    "restaurant": lambda rng, n: np.array(restaurants, dtype=object)[rng.integers(len(restaurants), size=n)],
+    "dish": lambda rng, n: np.array(dishes, dtype=object)[rng.integers(len(dishes), size=n)],
+    "amount": lambda rng, n: _strings(rng.integers(49, 2500, size=n)),
+    "minutes": lambda rng, n: _strings(rng.integers(10, 181, size=n)),
+    "order": lambda rng, n: np.char.add("#", rng.integers(100000, 999999, size=n).astype(str)).astype(object),
+}
+
+
+def compile_template(template):
+    # "{dish} was late" -> (['', ' was late'], ['dish'])
+    parts, slots = [""], []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        parts[-1] += literal
+        if field is not None:
+            slots.append(field)
+            parts.append("")
+    return parts, slots
+
+
+POOLS = [[compile_template(t) for t in templates[c] + slotted_templates[c]] for c in categories]
+
+
+def class_weights(imbalance=1.0, weights=None):
+    # Explicit weights, else a geometric decay from the first category to the
+    # last so that the most common class is `imbalance` times the rarest
+    if weights is None:
+        weights = imbalance ** -np.linspace(0, 1, len(categories))
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (len(categories),) or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError(f"need {len(categories)} non-negative weights")
+    return weights / weights.sum()
+
+
+def generate_chunk(index, size, seed, weights):
+    # Returns (texts, category indices) for one chunk; chunk `index` always
+    # draws from the same generator
+    rng = np.random.default_rng([seed, index])
+    category = rng.choice(len(categories), size=size, p=weights)
+    texts = np.empty(size, dtype=object)
+    for c, pool in enumerate(POOLS):
+        rows = np.flatnonzero(category == c)
+        which = rng.integers(len(pool), size=rows.size)
+        for t, (parts, slots) in enumerate(pool):
+            selected = rows[which == t]
+            if not selected.size:
+                continue
+            text = np.full(selected.size, parts[0], dtype=object)
+            for slot, part in zip(slots, parts[1:]):
+                text = text + SLOTS[slot](rng, selected.size) + part
+            texts[selected] = text
+    texts = (np.array(openers, dtype=object)[rng.integers(len(openers), size=size)] + texts
+             + np.array(closers, dtype=object)[rng.integers(len(closers), size=size)])
+    # Same variations as the original 500-row set
+    lower = rng.random(size) < 0.5
+    texts[lower] = np.char.lower(texts[lower].astype(str)).astype(object)
+    exclaim = rng.random(size) < 0.2
+    texts[exclaim] = np.char.replace(texts[exclaim].astype(str), ".", "!").astype(object)
+    return texts.tolist(), category
+
+
+def generate_chunks(rows, chunk_size, seed, weights, jobs=1):
+    sizes = [min(chunk_size, rows - start) for start in range(0, rows, chunk_size)]
+    if jobs <= 1:
+        for index, size in enumerate(sizes):
+            yield generate_chunk(index, size, seed, weights)
+        return
+    # In order, with at most 2 chunks per worker in flight so memory stays bounded
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for index, size in enumerate(sizes):
+            pending.append(executor.submit(generate_chunk, index, size, seed, weights))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["text", "category"])
+
+    def write(self, texts, labels):
+        self.writer.writerows(zip(texts, labels))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet output needs pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.schema = pa.schema([("text", pa.string()), ("category", pa.string())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, texts, labels):
+        self.writer.write_table(self.pa.table({"text": texts, "category": labels}, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def generate(path, rows, seed=42, weights=None, chunk_size=100000, jobs=1, fmt=None):
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "csv")
+    writer = (ParquetWriter if fmt == "parquet" else CsvWriter)(path)
+    labels = np.array(categories, dtype=object)
+    counts = np.zeros(len(categories), dtype=np.int64)
+    try:
+        for texts, category in generate_chunks(rows, chunk_size, seed, class_weights() if weights is None else weights, jobs):
+            writer.write(texts, labels[category].tolist())
+            counts += np.bincount(category, minlength=len(categories))
+    finally:
+        writer.close()
+    return dict(zip(categories, counts.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, "complaints_dataset.csv"))
+    parser.add_argument("--format", choices=["csv", "parquet"], help="default: from the --out extension")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--imbalance", type=float, default=1.0, help="most common / rarest class ratio")
+    parser.add_argument("--weights", help=f"comma-separated class weights, in order: {', '.join(categories)}")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--jobs", type=int, default=1, help="processes generating chunks")
+    args = parser.parse_args()
+
+    try:
+        weights = class_weights(args.imbalance, [float(w) for w in args.weights.split(",")] if args.weights else None)
+    except ValueError as e:
+        sys.exit(f"--weights: {e}")
+
+    started = time.perf_counter()
+    counts = generate(args.out, args.rows, args.seed, weights, args.chunk_size, args.jobs, args.format)
+    elapsed = time.perf_counter() - started
+    print(f"Generated {args.rows} complaints in {args.out} ({elapsed:.1f}s, {args.rows / elapsed:,.0f} rows/s)")
+    for category, n in counts.items():
+        print(f"  {category:<24} {n}")
+
+
+if __name__ == "__main__":
+    main()
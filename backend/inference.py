@@ -0,0 +1,170 @@
+"""
+Complaint classification without scikit-learn at request time.
+
+LinearTextClassifier reproduces TfidfVectorizer.transform() followed by a
+linear model's predict() (LogisticRegression, LinearSVC, SGDClassifier)
+from the arrays in a model artifact (see artifacts.py): a regex
+tokenizer, sparse term counting with NumPy and one gather-and-sum per
+class. The scores match scikit-learn's to floating-point rounding and
+the predicted labels match exactly (test_inference.py).
+
+Only analyzer='word' is supported; anything else raises ValueError so the
+caller can fall back to SklearnClassifier.
+
+normalize_text() gives a cache key for a complaint: texts with the same
+key get the same prediction from any classifier whose vectorizer
+lowercases and only matches word characters (see text_key_safe()).
+"""
+import re
+import unicodedata
+
+import numpy as np
+
+
+def _strip_accents_unicode(text):
+    normalized = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+# Token patterns made only of word characters: replacing everything else
+# with spaces cannot split, merge or change a token
+WORD_TOKEN_PATTERNS = frozenset([r'(?u)\b\w\w+\b', r'\b\w\w+\b', r'(?u)\b\w+\b', r'\b\w+\b'])
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    # Lowercase, punctuation -> space (keeping token boundaries), whitespace collapsed
+    return _SPACES.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+
+def text_key_safe(params):
+    return (params['analyzer'] == 'word' and params['lowercase']
+            and params['token_pattern'] in WORD_TOKEN_PATTERNS)
+
+
+STRIP_ACCENTS = {
+    None: None,
+    'unicode': _strip_accents_unicode,
+    'ascii': _strip_accents_ascii,
+}
+
+
+class LinearTextClassifier:
+    def __init__(self, artifacts):
+        params = artifacts.vectorizer_params
+        if params['analyzer'] != 'word':
+            raise ValueError(f"Unsupported analyzer {params['analyzer']!r}")
+        self.version = artifacts.version
+        self.params = params
+        self.lowercase = params['lowercase']
+        self.strip_accents = STRIP_ACCENTS[params['strip_accents']]
+        self.token_re = re.compile(params['token_pattern'])
+        self.ngram_range = tuple(params['ngram_range'])
+        self.stop_words = frozenset(artifacts.meta['stop_words'] or ())
+        self.binary = params['binary']
+        self.sublinear_tf = params['sublinear_tf']
+        self.norm = params['norm']
+
+        self.vocabulary = artifacts.vocabulary
+        self.idf = np.asarray(artifacts.idf)
+        # Feature-major so one fancy index pulls every class's weight for a term
+        self.coef_t = np.ascontiguousarray(np.asarray(artifacts.coef).T)
+        self.intercept = np.asarray(artifacts.intercept)
+        self.classes = [str(c) for c in artifacts.classes]
+
+    def analyze(self, text):
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_accents:
+            text = self.strip_accents(text)
+        tokens = [t for t in self.token_re.findall(text) if t not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        # Same n-grams as sklearn's _word_ngrams
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def transform(self, texts):
+        # Returns the TF-IDF matrix in coordinate form: (row, column, value)
+        docs = [self.analyze(text) for text in texts]
+        lengths = np.fromiter((len(d) for d in docs), dtype=np.intp, count=len(docs))
+        tokens = np.array([t for d in docs for t in d], dtype=str)
+        rows = np.repeat(np.arange(len(docs)), lengths)
+
+        # Sorted vocabulary: a term is known if searchsorted lands on it
+        columns = np.searchsorted(self.vocabulary, tokens)
+        columns[columns == len(self.vocabulary)] = 0
+        known = self.vocabulary[columns] == tokens
+        keys = rows[known] * len(self.vocabulary) + columns[known]
+
+        keys, counts = np.unique(keys, return_counts=True)
+        rows, columns = np.divmod(keys, len(self.vocabulary))
+        values = counts.astype(np.float64)
+        if self.binary:
+            values[:] = 1.0
+        elif self.sublinear_tf:
+            values = np.log(values) + 1.0
+        values *= self.idf[columns]
+
+        if self.norm == 'l2':
+            norms = np.sqrt(np.bincount(rows, values * values, minlength=len(docs)))
+        elif self.norm == 'l1':
+            norms = np.bincount(rows, np.abs(values), minlength=len(docs))
+        else:
+            norms = None
+        if norms is not None:
+            values /= norms[rows]
+        return rows, columns, values
+
+    def decision_function(self, texts):
+        rows, columns, values = self.transform(texts)
+        scores = np.zeros((len(texts), self.coef_t.shape[1]))
+        np.add.at(scores, rows, self.coef_t[columns] * values[:, None])
+        scores += self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict(self, texts):
+        if not texts:
+            return []
+        scores = self.decision_function(texts)
+        if scores.ndim == 1:
+            indices = (scores > 0).astype(np.intp)
+        else:
+            indices = scores.argmax(axis=1)
+        return [self.classes[i] for i in indices]
+
+
+class SklearnClassifier:
+    """Same predict() interface over a fitted (vectorizer, model) pair."""
+
+    def __init__(self, vectorizer, model, version=None):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.version = version
+        self.params = vectorizer.get_params()
+        self.classes = [str(c) for c in model.classes_]
+
+    def decision_function(self, texts):
+        return self.model.decision_function(self.vectorizer.transform(texts))
+
+    def predict(self, texts):
+        if not texts:
+            return []
+        return [str(c) for c in self.model.predict(self.vectorizer.transform(texts))]
+
+
+def load_classifier(artifacts):
+    try:
+        return LinearTextClassifier(artifacts)
+    except ValueError:
+        return SklearnClassifier(*artifacts.to_sklearn(), version=artifacts.version)
@@ -0,0 +1,49 @@
+"""
+Runs classification in worker processes.
+
+Each worker gets its own copy of the classifier (see inference.py) when it
+starts, so a classify() call only ships the texts and the predicted
+categories across the process boundary. Large batches are split across
+the workers.
+"""
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Smallest slice of a batch worth sending to a separate worker
+MIN_CHUNK = 16
+
+_classifier = None
+
+
+def _init_worker(classifier):
+    global _classifier
+    _classifier = classifier
+
+
+def _classify(texts):
+    return _classifier.predict(texts)
+
+
+class InferencePool:
+    def __init__(self, classifier, processes=2):
+        self.processes = max(int(processes), 1)
+        self.version = classifier.version
+        # spawn, not fork: the serving process already runs threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(classifier,),
+        )
+
+    def classify(self, texts):
+        if not texts:
+            return []
+        chunks = min(self.processes, math.ceil(len(texts) / MIN_CHUNK)) or 1
+        size = math.ceil(len(texts) / chunks)
+        futures = [self._executor.submit(_classify, texts[i:i + size]) for i in range(0, len(texts), size)]
+        return [category for future in futures for category in future.result()]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,390 @@
+"""
+Versioned schema migrations for the complaints database.
+
+    python backend/migrations.py              # apply pending migrations
+    python backend/migrations.py status
+
+Applied versions are recorded in schema_version, so each migration runs
+once per database. Migrations are lists of steps and every step is
+idempotent, which also lets the first run bring an unversioned database
+(built by the old init_db()/migrate_db.py) up to date.
+
+Steps that touch every row never hold the write lock for long: table
+rebuilds and backfills work through the table in id ranges of
+batch_size rows, one short transaction per batch, and save the last id
+done in migration_progress in the same transaction. Other connections
+read and write between batches, and an interrupted run resumes from the
+saved id. A rebuild copies into <table>_new while triggers mirror
+concurrent writes to already-copied rows, then swaps the tables in one
+transaction.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from db import connect
+
+BATCH_SIZE = 5000
+# Idle time after each batch, as a fraction of the time the batch took
+PAUSE = 1.0
+
+Migration = namedtuple('Migration', 'version name steps')
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+class Runner:
+    def __init__(self, conn, batch_size=BATCH_SIZE, pause=PAUSE, log=print):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pause = pause
+        self.log = log
+
+    def progress(self, key):
+        row = self.conn.execute("SELECT last_id FROM migration_progress WHERE step = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def save_progress(self, key, last_id):
+        self.conn.execute("INSERT INTO migration_progress (step, last_id) VALUES (?, ?) "
+                          "ON CONFLICT (step) DO UPDATE SET last_id = excluded.last_id", (key, last_id))
+
+    def clear_progress(self, key):
+        self.conn.execute("DELETE FROM migration_progress WHERE step = ?", (key,))
+
+    def batches(self, key, table, work):
+        # Calls work(lo, hi) for consecutive id ranges of batch_size rows
+        # after the saved progress, committing each with its progress
+        last_id = self.progress(key)
+        max_id = self.conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0] or 0
+        started, batches = time.perf_counter(), 0
+        while last_id < max_id:
+            row = self.conn.execute(f"SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?",
+                                    (last_id, self.batch_size - 1)).fetchone()
+            hi = min(row[0], max_id) if row else max_id
+            batch_started = time.perf_counter()
+            with self.conn:
+                work(last_id + 1, hi)
+                self.save_progress(key, hi)
+            last_id, batches = hi, batches + 1
+            # SQLite's lock is not fair: without a gap between batches a
+            # waiting writer can keep missing it until its busy_timeout
+            time.sleep(min((time.perf_counter() - batch_started) * self.pause, 1.0))
+            if batches % 20 == 0:
+                self.log(f"      {key}: id {hi}/{max_id} ({100 * hi / max_id:.0f}%, {time.perf_counter() - started:.1f}s)")
+        with self.conn:
+            self.clear_progress(key)
+
+
+class SQL:
+    def __init__(self, description, sql):
+        self.description = description
+        self.sql = sql
+
+    def run(self, runner):
+        with runner.conn:
+            for statement in self.sql.split(';'):
+                if statement.strip():
+                    runner.conn.execute(statement)
+
+
+class AddColumn:
+    def __init__(self, table, column, definition):
+        self.table, self.column, self.definition = table, column, definition
+        self.description = f"add {table}.{column}"
+
+    def run(self, runner):
+        if self.column in table_columns(runner.conn, self.table):
+            return 'exists'
+        with runner.conn:
+            runner.conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self.definition}")
+
+
+class BatchedUpdate:
+    """A set-based UPDATE run per id range; sql binds :lo and :hi."""
+
+    def __init__(self, key, description, table, sql):
+        self.key, self.description, self.table, self.sql = key, description, table, sql
+
+    def run(self, runner):
+        runner.batches(self.key, self.table, lambda lo, hi: runner.conn.execute(self.sql, {'lo': lo, 'hi': hi}))
+
+
+class RebuildTable:
+    """Recreates a table from create_sql (with {name} for the table name),
+    for changes ALTER TABLE cannot make. Indexes, triggers and the
+    AUTOINCREMENT counter are carried over."""
+
+    def __init__(self, table, create_sql, done):
+        self.table, self.create_sql, self.done = table, create_sql, done
+        self.description = f"rebuild {table}"
+
+    def run(self, runner):
+        conn, table, new = runner.conn, self.table, f'{self.table}_new'
+        if self.done(conn):
+            return 'up to date'
+        with conn:
+            conn.execute(self.create_sql.format(name=new))
+        columns = [c for c in table_columns(conn, new) if c in table_columns(conn, table)]
+        names = ', '.join(columns)
+        values = ', '.join(f'NEW.{c}' for c in columns)
+        with conn:
+            # Writes to the old table from here on are applied to the copy too
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_mirror_insert AFTER INSERT ON {table} "
+                         f"BEGIN INSERT OR REPLACE INTO {new} ({names}) VALUES ({values}); END")
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_mirror_update AFTER UPDATE ON {table} "
+                         f"BEGIN DELETE FROM {new} WHERE id = OLD.id; "
+                         f"INSERT OR REPLACE INTO {new} ({names}) VALUES ({values}); END")
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_mirror_delete AFTER DELETE ON {table} "
+                         f"BEGIN DELETE FROM {new} WHERE id = OLD.id; END")
+        # OR IGNORE: a row the triggers already copied is newer than the batch's
+        runner.batches(f'rebuild:{table}', table, lambda lo, hi: conn.execute(
+            f"INSERT OR IGNORE INTO {new} ({names}) SELECT {names} FROM {table} WHERE id BETWEEN ? AND ?", (lo, hi)))
+
+        # Legacy rename: triggers on other tables that name this table must
+        # not be checked against (or rewritten to) the table being renamed
+        conn.execute("PRAGMA legacy_alter_table = ON")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            carried = [sql for (sql,) in conn.execute(
+                "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+                "AND sql IS NOT NULL AND name NOT LIKE ? ESCAPE '\\'", (table, f'{table}\\_mirror\\_%'))]
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {new} RENAME TO {table}")
+            for sql in carried:
+                conn.execute(sql)
+            if seq:
+                conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq[0], table))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA legacy_alter_table = OFF")
+
+
+# Round-robin assignment: the i-th unassigned complaint of a zone (or zone
+# and department) in an id range goes to staff member (lo + i) mod n of
+# that group, numbered with window functions
+ASSIGN_SQL = """
+UPDATE complaints SET {column} = plan.staff_id FROM (
+    SELECT c.id, s.id AS staff_id
+    FROM (
+        SELECT id, zone_id, department_id,
+               ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY id) + :lo AS n
+        FROM complaints
+        WHERE id BETWEEN :lo AND :hi AND {column} IS NULL AND {condition}  -- unary +: walk the id range, not a status index
+    ) c
+    JOIN (
+        SELECT id, zone_id, department_id,
+               ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY id) - 1 AS slot,
+               COUNT(*) OVER (PARTITION BY {partition}) AS staff
+        FROM support_staff WHERE role = '{role}'
+    ) s ON {join} AND s.slot = c.n % s.staff
+) plan
+WHERE complaints.id = plan.id
+"""
+
+MIGRATIONS = [
+    Migration(1, 'base tables', [SQL('create tables', """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user'
+        );
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            restaurant_name TEXT NOT NULL,
+            items TEXT NOT NULL,
+            total_amount REAL NOT NULL,
+            order_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'Delivered',
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        );
+        CREATE TABLE IF NOT EXISTS complaints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            order_id INTEGER,
+            text TEXT NOT NULL,
+            category TEXT NOT NULL,
+            status TEXT DEFAULT 'Pending',
+            admin_response_text TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (order_id) REFERENCES orders (id)
+        );
+        CREATE TABLE IF NOT EXISTS zones (
+            zone_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            zone_name TEXT UNIQUE NOT NULL,
+            district TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS departments (
+            department_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            department_name TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS support_staff (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            zone_id INTEGER,
+            department_id INTEGER,
+            created_by_admin INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (zone_id) REFERENCES zones (zone_id),
+            FOREIGN KEY (department_id) REFERENCES departments (department_id)
+        );
+        CREATE TABLE IF NOT EXISTS company_admin_registry (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            zone_id INTEGER NOT NULL,
+            admin_username TEXT UNIQUE NOT NULL,
+            admin_password TEXT NOT NULL,
+            created_by_company TEXT DEFAULT 'System',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (zone_id) REFERENCES zones (zone_id)
+        );
+        CREATE TABLE IF NOT EXISTS complaint_compensation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            complaint_id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            amount REAL,
+            coupon_code TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (complaint_id) REFERENCES complaints (id)
+        )
+    """)]),
+    Migration(2, 'complaint orders, responses and routing', [
+        AddColumn('complaints', 'order_id', 'INTEGER REFERENCES orders(id)'),
+        AddColumn('complaints', 'admin_response_text', 'TEXT'),
+        AddColumn('complaints', 'zone_id', 'INTEGER REFERENCES zones(zone_id)'),
+        AddColumn('complaints', 'department_id', 'INTEGER REFERENCES departments(department_id)'),
+    ]),
+    # created_at needs a rebuild: ALTER TABLE cannot add a CURRENT_TIMESTAMP default
+    Migration(3, 'user zones and creation time', [
+        RebuildTable('users', """
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                role TEXT NOT NULL DEFAULT 'user',
+                zone TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """, done=lambda conn: 'created_at' in table_columns(conn, 'users')),
+    ]),
+    Migration(4, 'complaint zone names and staff assignment', [
+        AddColumn('complaints', 'zone', 'TEXT'),
+        AddColumn('complaints', 'assigned_l1', 'INTEGER REFERENCES support_staff(id)'),
+        AddColumn('complaints', 'assigned_l2', 'INTEGER REFERENCES support_staff(id)'),
+        BatchedUpdate('backfill:users.zone', 'users.zone from their complaints', 'users', """
+            UPDATE users SET zone = COALESCE(z.zone_name, 'Coimbatore')
+            FROM (
+                SELECT u.id AS user_id, MIN(c.zone_id) AS zone_id
+                FROM users u
+                LEFT JOIN orders o ON o.user_id = u.id
+                LEFT JOIN complaints c ON c.order_id = o.id
+                WHERE u.id BETWEEN :lo AND :hi AND u.role = 'user' AND u.zone IS NULL
+                GROUP BY u.id
+            ) uz
+            LEFT JOIN zones z ON z.zone_id = uz.zone_id
+            WHERE users.id = uz.user_id
+        """),
+        BatchedUpdate('backfill:complaints.zone', 'complaints.zone from zones', 'complaints', """
+            UPDATE complaints SET zone = z.zone_name FROM zones z
+            WHERE z.zone_id = complaints.zone_id AND complaints.zone IS NULL AND complaints.id BETWEEN :lo AND :hi
+        """),
+        BatchedUpdate('backfill:complaints.assigned_l1', 'round-robin L1 assignment', 'complaints', ASSIGN_SQL.format(
+            column='assigned_l1', role='L1', partition='zone_id', join='s.zone_id = c.zone_id',
+            condition="+status != 'Pending'")),
+        BatchedUpdate('backfill:complaints.assigned_l2', 'round-robin L2 assignment', 'complaints', ASSIGN_SQL.format(
+            column='assigned_l2', role='L2', partition='zone_id, department_id',
+            join='s.zone_id = c.zone_id AND s.department_id = c.department_id',
+            condition="+status IN ('Under Investigation', 'Resolved', 'Rejected')")),
+    ]),
+    Migration(5, 'model version on complaints', [
+        # Registry version (or 'pickle' / artifact hash) that predicted the category
+        AddColumn('complaints', 'model_version', 'TEXT'),
+    ]),
+]
+
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+def ensure_tables(conn):
+    with conn:
+        conn.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            seconds REAL
+        )""")
+        conn.execute("CREATE TABLE IF NOT EXISTS migration_progress (step TEXT PRIMARY KEY, last_id INTEGER NOT NULL)")
+
+
+def applied_versions(conn):
+    ensure_tables(conn)
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+
+def migrate(conn, migrations=MIGRATIONS, batch_size=BATCH_SIZE, pause=PAUSE, log=print):
+    # Applies pending migrations in version order; returns the versions applied
+    runner = Runner(conn, batch_size, pause, log)
+    done = applied_versions(conn)
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        log(f"Migration {migration.version}: {migration.name}")
+        started = time.perf_counter()
+        for step in migration.steps:
+            step_started = time.perf_counter()
+            note = step.run(runner)
+            log(f"    {step.description}: {note or 'done'} ({time.perf_counter() - step_started:.2f}s)")
+        seconds = time.perf_counter() - started
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO schema_version (version, name, seconds) VALUES (?, ?, ?)",
+                         (migration.version, migration.name, seconds))
+        log(f"    applied in {seconds:.2f}s")
+        applied.append(migration.version)
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', nargs='?', choices=['migrate', 'status'], default='migrate')
+    parser.add_argument('--db', default=os.environ.get('COMPLAINTS_DB', os.path.join(BASE_DIR, 'complaints.db')))
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--pause', type=float, default=PAUSE, help='idle time after each batch, relative to its duration')
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == 'status':
+        ensure_tables(conn)
+        applied = {row['version']: row for row in conn.execute("SELECT * FROM schema_version")}
+        for migration in MIGRATIONS:
+            row = applied.get(migration.version)
+            state = f"applied {row['applied_at']} ({row['seconds']:.2f}s)" if row else 'pending'
+            print(f"{migration.version:>3}  {migration.name:<45} {state}")
+        for row in conn.execute("SELECT * FROM migration_progress"):
+            print(f"     in progress: {row['step']} at id {row['last_id']}")
+    else:
+        started = time.perf_counter()
+        applied = migrate(conn, batch_size=args.batch_size, pause=args.pause)
+        print(f"{len(applied)} migration(s) applied in {time.perf_counter() - started:.2f}s" if applied
+              else "Schema is up to date.")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Online learning from support staff decisions.
+
+OnlineLearner keeps a HashingVectorizer + SGDClassifier that is first
+trained on the base data (bootstrap) and then updated with partial_fit
+on mini-batches of labels that staff confirm or correct. All training
+happens on one background thread that owns the model; request threads
+only append (text, label) to a bounded queue. After every update a copy
+of the model is published through on_update(), whose caller swaps it in
+for serving with a single assignment, so a request only ever sees a
+complete model.
+
+Each worker process learns from the labels its own requests submit.
+Published versions read "<base>+online-<boot id>-<n>": the boot id is
+drawn per process, so two workers (or one worker across restarts) never
+report the same version for different models.
+"""
+import copy
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from inference import SklearnClassifier
+
+
+class OnlineClassifier(SklearnClassifier):
+    """Serving wrapper over a published model snapshot."""
+
+
+class OnlineLearner:
+    def __init__(self, classes, on_update, bootstrap=None, batch_size=32, flush_seconds=30.0,
+                 n_features=2 ** 18, epochs=5, seed=42, max_pending=10000, base_version=None):
+        self.classes = sorted(classes)
+        self.base_version = base_version
+        self.on_update = on_update
+        self.bootstrap_data = bootstrap
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_seconds = flush_seconds
+        self.epochs = epochs
+        self.seed = seed
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, stop_words='english')
+        self.model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=seed)
+        self._bootstrapped = False
+        self._pending = deque(maxlen=max_pending)
+        self._fork_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._reset_worker()
+        self.updates = 0
+        self.samples = 0
+        self.rejected = 0
+        self.version = None
+        self.last_update = None
+
+    def start(self):
+        self._ensure_worker()
+
+    def add(self, text, label):
+        # Called from request threads; never blocks on training
+        if not text or label not in self.classes:
+            with self._stats_lock:
+                self.rejected += 1
+            return False
+        self._ensure_worker()
+        with self._cond:
+            self._pending.append((text, label))
+            self._cond.notify()
+        return True
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'version': self.version,
+                'bootstrapped': self._bootstrapped,
+                'updates': self.updates,
+                'samples': self.samples,
+                'pending': len(self._pending),
+                'rejected': self.rejected,
+                'last_update': self.last_update,
+            }
+
+    def _reset_worker(self):
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = os.getpid()
+        self._boot_id = uuid.uuid4().hex[:8]
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so a forked worker starts its own
+        if self._pid != os.getpid():
+            with self._fork_lock:
+                if self._pid != os.getpid():
+                    self._reset_worker()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='online-learner', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        # Waits for batch_size labels, or flush_seconds after the first one
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.flush_seconds
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            size = min(self.batch_size, len(self._pending))
+            return [self._pending.popleft() for _ in range(size)]
+
+    def _fit(self, texts, labels):
+        self.model.partial_fit(self.vectorizer.transform(texts), labels, classes=self.classes)
+
+    def _bootstrap(self):
+        texts, labels = self.bootstrap_data() if self.bootstrap_data else ([], [])
+        pairs = [(t, l) for t, l in zip(texts, labels) if t and l in self.classes]
+        rng = random.Random(self.seed)
+        for _ in range(self.epochs if pairs else 0):
+            rng.shuffle(pairs)
+            for i in range(0, len(pairs), 256):
+                chunk = pairs[i:i + 256]
+                self._fit([t for t, _ in chunk], [l for _, l in chunk])
+        self._bootstrapped = True
+        return len(pairs)
+
+    def _publish(self, samples):
+        version = f'online-{self._boot_id}-{self.updates + 1}'
+        if self.base_version:
+            version = f'{self.base_version}+{version}'
+        snapshot = OnlineClassifier(self.vectorizer, copy.deepcopy(self.model), version)
+        with self._stats_lock:
+            self.updates += 1
+            self.samples += samples
+            self.version = snapshot.version
+            self.last_update = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.on_update(snapshot)
+
+    def _run(self):
+        if not self._bootstrapped:
+            samples = self._bootstrap()
+            if samples:
+                self._publish(samples)
+        while True:
+            batch = self._next_batch()
+            try:
+                self._fit([t for t, _ in batch], [l for _, l in batch])
+            except Exception as e:
+                print(f"Online learning update failed: {e}")
+                continue
+            self._publish(len(batch))
@@ -0,0 +1,109 @@
+"""
+Password hashing policy and off-thread verification.
+
+Hashes are werkzeug strings ("method$salt$hash"), so the algorithm and
+cost of every stored password are recorded next to it:
+
+    PASSWORD_HASH_METHOD   werkzeug method, e.g. scrypt:32768:8:1 or
+                           pbkdf2:sha256:600000 (default: scrypt)
+    PASSWORD_WORKERS       verifier processes per server process, 0 = verify
+                           on the request thread (default: 1)
+    PASSWORD_MAX_PENDING   verifications queued or running before logins
+                           are turned away with AuthBusy (default: 4 per worker)
+
+A successful login whose stored hash was made with a different method (or
+is a legacy plaintext password) gets a new hash from the same worker call,
+so policy changes roll out as people sign in.
+"""
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+WORKERS = int(os.environ.get('PASSWORD_WORKERS', 1))
+MAX_PENDING = int(os.environ.get('PASSWORD_MAX_PENDING', 4 * max(WORKERS, 1)))
+
+
+class AuthBusy(RuntimeError):
+    pass
+
+
+def method_spec(method):
+    # Spells out werkzeug's defaults so "scrypt" and "scrypt:32768:8:1"
+    # compare equal to the method prefix stored in a hash
+    name, *params = method.split(':')
+    if name == 'scrypt':
+        defaults = [str(2 ** 15), '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        raise ValueError(f'Unsupported password hash method: {method}')
+    return ':'.join([name] + params + defaults[len(params):])
+
+
+def is_hashed(stored):
+    return stored.partition(':')[0] in ('scrypt', 'pbkdf2') and stored.count('$') == 2
+
+
+def hash_password(password, method=None):
+    return generate_password_hash(password, method=method_spec(method or HASH_METHOD))
+
+
+def needs_rehash(stored, method=None):
+    return not is_hashed(stored) or stored.partition('$')[0] != method_spec(method or HASH_METHOD)
+
+
+def verify_password(stored, password, method=None):
+    # Returns (matches, new hash or None). Support staff accounts created
+    # before hashing hold the plaintext password.
+    if not stored or password is None:
+        return False, None
+    if is_hashed(stored):
+        ok = check_password_hash(stored, password)
+    else:
+        ok = hmac.compare_digest(stored.encode(), password.encode())
+    if ok and needs_rehash(stored, method):
+        return True, hash_password(password, method)
+    return ok, None
+
+
+class PasswordVerifier:
+    """Bounded process pool for verify_password(). 0 processes verifies in-thread."""
+
+    def __init__(self, processes=WORKERS, max_pending=MAX_PENDING, method=None):
+        self.processes = max(int(processes), 0)
+        self.method = method_spec(method or HASH_METHOD)
+        # Callers wait on a result; past this many the login is refused
+        # rather than tying up another request thread
+        self._slots = threading.BoundedSemaphore(max(int(max_pending), 1))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Started on first use, so each forked server worker gets its own
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the serving process already runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def verify(self, stored, password):
+        if not self._slots.acquire(blocking=False):
+            raise AuthBusy('Too many logins in progress')
+        try:
+            if not self.processes:
+                return verify_password(stored, password, self.method)
+            return self._pool().submit(verify_password, stored, password, self.method).result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
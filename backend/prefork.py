@@ -0,0 +1,228 @@
+"""
+Pre-fork launcher: loads the app and model once, then forks the workers.
+
+    python backend/prefork.py --workers 4 --port 5000
+    python backend/prefork.py --workers 4 --server wsgi
+
+The parent imports the app (model, vectorizer, database setup) and calls
+gc.freeze() before forking, so the workers share those pages
+copy-on-write instead of each unpickling its own copy. After that the
+parent only supervises: crashed workers are restarted, SIGTERM/SIGINT
+stop them all, and per-worker memory is printed a few seconds after
+start-up, every --report-interval seconds and on SIGUSR1.
+
+--no-preload makes every worker load the app itself after the fork,
+which is what running N separate servers costs; use it to compare.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# A worker that dies sooner than this after starting is crash-looping
+MIN_WORKER_LIFETIME = 5.0
+GRACEFUL_TIMEOUT = 30.0
+
+
+def load_app(server):
+    if server == 'asgi':
+        # The workers are the inference processes here; a per-worker
+        # process pool would unpickle its own model copy again
+        os.environ.setdefault('ASGI_INFERENCE_PROCESSES', '0')
+        import asgi
+        return asgi.app
+    import app as app_module
+    return app_module.create_app()
+
+
+def serve_asgi(sock, args):
+    import uvicorn
+    config = uvicorn.Config(load_app('asgi'), lifespan='on', log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve_wsgi(sock, args):
+    from werkzeug.serving import make_server
+    make_server(args.host, args.port, load_app('wsgi'), threaded=True, fd=sock.fileno()).serve_forever()
+
+
+SERVERS = {
+    'asgi': serve_asgi,
+    'wsgi': serve_wsgi,
+}
+
+
+def memory_usage(pid):
+    # kB figures from /proc/<pid>/smaps_rollup; None where that is unavailable
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                parts = rest.split()
+                if len(parts) == 2 and parts[1] == 'kB':
+                    fields[name] = int(parts[0])
+    except OSError:
+        return None
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def format_memory_report(processes):
+    # processes: [(label, pid)]. RSS counts shared pages in every process;
+    # PSS splits them between the sharers, so the PSS total is the real cost.
+    lines = [f"{'process':<10} {'pid':>7} {'rss MB':>8} {'shared MB':>10} {'private MB':>11} {'pss MB':>8}"]
+    total_rss = total_pss = 0
+    for label, pid in processes:
+        usage = memory_usage(pid)
+        if usage is None:
+            lines.append(f"{label:<10} {pid:>7}   (memory figures unavailable)")
+            continue
+        total_rss += usage['rss']
+        total_pss += usage['pss']
+        lines.append(f"{label:<10} {pid:>7} {usage['rss'] / 1024:>8.1f} {usage['shared'] / 1024:>10.1f} "
+                     f"{usage['private'] / 1024:>11.1f} {usage['pss'] / 1024:>8.1f}")
+    lines.append(f"{'total':<10} {'':>7} {total_rss / 1024:>8.1f} {'':>10} {'':>11} {total_pss / 1024:>8.1f}")
+    return '\n'.join(lines)
+
+
+class Supervisor:
+    def __init__(self, sock, args):
+        self.sock = sock
+        self.args = args
+        self.workers = {}  # slot -> pid
+        self.started = {}  # slot -> monotonic start time
+        self.stopping = False
+        self.report_requested = False
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+                signal.signal(sig, signal.SIG_DFL)
+            code = 0
+            try:
+                SERVERS[self.args.server](self.sock, self.args)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[slot] = pid
+        self.started[slot] = time.monotonic()
+
+    def reap(self):
+        # Restarts workers that exited; crash-looping ones after a pause
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = next((s for s, p in self.workers.items() if p == pid), None)
+            if slot is None or self.stopping:
+                continue
+            lifetime = time.monotonic() - self.started[slot]
+            print(f"prefork: worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)} "
+                  f"after {lifetime:.1f}s, restarting", file=sys.stderr)
+            if lifetime < MIN_WORKER_LIFETIME:
+                time.sleep(1.0)
+            self.spawn(slot)
+
+    def report(self):
+        processes = [('parent', os.getpid())] + [(f'worker {s}', p) for s, p in sorted(self.workers.items())]
+        print(format_memory_report(processes), flush=True)
+
+    def stop(self):
+        for pid in self.workers.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers = {s: p for s, p in self.workers.items() if p != pid}
+            else:
+                time.sleep(0.1)
+        for pid in self.workers.values():
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        def request_stop(signum, frame):
+            self.stopping = True
+
+        def request_report(signum, frame):
+            self.report_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGUSR1, request_report)
+
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+        print(f"prefork: {self.args.workers} {self.args.server} workers on "
+              f"http://{self.args.host}:{self.args.port}", flush=True)
+
+        next_report = time.monotonic() + self.args.report_after
+        while not self.stopping:
+            time.sleep(0.5)
+            self.reap()
+            if self.report_requested or (next_report is not None and time.monotonic() >= next_report):
+                self.report_requested = False
+                self.report()
+                next_report = time.monotonic() + self.args.report_interval if self.args.report_interval else None
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--server', choices=sorted(SERVERS), default='asgi')
+    parser.add_argument('--no-preload', action='store_true', help='load the app in each worker instead of once')
+    parser.add_argument('--report-after', type=float, default=5.0, help='seconds before the first memory report')
+    parser.add_argument('--report-interval', type=float, default=0, help='seconds between memory reports, 0 = once')
+    parser.add_argument('--log-level', default='warning')
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    if not args.no_preload:
+        load_app(args.server)
+        # Move everything loaded so far out of the collector's reach: a
+        # collection in a worker would otherwise write to (and so copy)
+        # every page holding a tracked object
+        gc.collect()
+        gc.freeze()
+
+    Supervisor(sock, args).run()
+
+
+if __name__ == '__main__':
+    main()
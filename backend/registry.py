@@ -0,0 +1,92 @@
+"""
+Versioned model registry.
+
+    models/
+        20261018-161554-60d27cc9d3cf/   one array artifact per version (artifacts.py)
+            meta.json, *.npy, training.json
+        CURRENT                         name of the version to serve
+
+train_model.py adds versions (and with --promote points CURRENT at the new
+one); the app watches CURRENT and hot-swaps the model it names. CURRENT is
+replaced atomically, so a reader sees either the old or the new name.
+
+    python backend/registry.py list
+    python backend/registry.py promote 20261018-161554-60d27cc9d3cf
+"""
+import argparse
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+
+
+class ModelRegistry:
+    def __init__(self, root=MODELS_DIR):
+        self.root = root
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def exists(self, version):
+        return bool(version) and os.path.basename(version) == version and \
+            os.path.exists(os.path.join(self.path(version), 'meta.json'))
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if self.exists(name))
+
+    def training_info(self, version):
+        try:
+            with open(os.path.join(self.path(version), 'training.json')) as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        info.pop('candidates', None)
+        return info
+
+    def current(self):
+        try:
+            with open(os.path.join(self.root, 'CURRENT')) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version if self.exists(version) else None
+
+    def set_current(self, version):
+        if not self.exists(version):
+            raise ValueError(f'Unknown model version {version!r}')
+        tmp_path = os.path.join(self.root, f'.CURRENT.{os.getpid()}')
+        with open(tmp_path, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp_path, os.path.join(self.root, 'CURRENT'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['list', 'promote'])
+    parser.add_argument('version', nargs='?')
+    parser.add_argument('--root', default=MODELS_DIR)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'promote':
+        try:
+            registry.set_current(args.version)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"CURRENT -> {args.version}")
+        return
+
+    current = registry.current()
+    for version in registry.versions():
+        info = registry.training_info(version)
+        mark = '*' if version == current else ' '
+        print(f"{mark} {version}  {info.get('model', '?'):<20} F1 {info.get('cv_f1_macro', float('nan')):.3f}  "
+              f"{info.get('samples', '?')} samples")
+
+
+if __name__ == '__main__':
+    main()
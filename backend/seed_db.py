@@ -1,14 +1,19 @@
 import sqlite3
 import random
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash
+import numpy as np
 import sys
 import os
 
+from passwords import hash_password
+
 # Removed faker import
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE = os.path.join(BASE_DIR, 'complaints.db')
+DATABASE = os.environ.get('COMPLAINTS_DB', os.path.join(BASE_DIR, 'complaints.db'))
 
 ZONES = {
     'Coimbatore': 'Coimbatore District',
@@ -68,9 +73,9 @@ def generate_random_date(start, end):
     random_seconds = random.randrange(24*60*60)
     return start + timedelta(days=random_days, seconds=random_seconds)
 
-def main():
-    print("Connecting to DB...")
-    conn = sqlite3.connect(DATABASE)
+def seed_reference_data(conn):
+    # Wipes the seeded tables and (re)creates zones, departments, zone
+    # admins and support staff. Returns ({zone name: id}, {department name: id}).
     cursor = conn.cursor()
 
     print("Cleaning database...")
@@ -101,10 +106,10 @@ def main():
             existing_depts[d_name] = cursor.lastrowid
 
     # Master Admin Creation (Zone admins)
-    ADMIN_PWD = generate_password_hash("admin123")
+    ADMIN_PWD = hash_password("admin123")
     try:
         cursor.execute("INSERT INTO company_admin_registry (zone_id, admin_username, admin_password) VALUES (?, ?, ?)",
-                      (1, "master", generate_password_hash("master123")))
+                      (1, "master", hash_password("master123")))
     except sqlite3.IntegrityError:
         pass # exists
 
@@ -116,7 +121,7 @@ def main():
             pass # exists
 
     print("Seeding L1 and L2 Support Staff...")
-    DEFAULT_PWD = "password123"
+    DEFAULT_PWD = hash_password("password123")
     # Create Staff
     for z_name, z_id in existing_zones.items():
         # 5 L1 agents
@@ -133,9 +138,16 @@ def main():
                               (uname, DEFAULT_PWD, "L2", z_id, d_id, 1))
 
     conn.commit()
+    return existing_zones, existing_depts
+
+def seed_demo(path):
+    print("Connecting to DB...")
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    existing_zones, existing_depts = seed_reference_data(conn)
 
     print("Generating 1200 Users (240 per zone)...")
-    USER_PWD = generate_password_hash("password123")
+    USER_PWD = hash_password("password123")
     user_ids = []
     
     for z_name, z_id in existing_zones.items():
@@ -257,5 +269,292 @@ def main():
     print(f"- 2400 Complaints")
     print(f"- 25 L1 Agents, 40 L2 Agents")
 
+# --- BULK SEEDING ---
+# python seed_db.py --bulk --complaints 10000000 --jobs 4
+#
+# Same shape of data as the demo seed (2 complaints and 3-5 orders per
+# user, compensation on resolved complaints, the same category, date and
+# status distributions), generated with NumPy a chunk of users at a time
+# and written with executemany(), one transaction per chunk. During the
+# load the journal and fsyncs are off and the indexes and triggers on the
+# seeded tables are dropped; they are recreated once at the end and the
+# trigger-maintained counters rebuilt. With --jobs > 1 every zone is
+# generated in its own process into a shard file, which is copied in with
+# INSERT ... SELECT as soon as it is done.
+
+BULK_TABLES = ('users', 'orders', 'complaints', 'complaint_compensation')
+BULK_INSERTS = {
+    'users': "INSERT INTO users (id, username, password, role) VALUES (?, ?, ?, ?)",
+    'orders': "INSERT INTO orders (id, user_id, restaurant_name, items, total_amount, order_date, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    'complaints': "INSERT INTO complaints (id, user_id, order_id, text, category, status, admin_response_text, timestamp, zone_id, department_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'complaint_compensation': "INSERT INTO complaint_compensation (id, complaint_id, type, amount, coupon_code, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+}
+BULK_PRAGMAS = (
+    ('journal_mode', 'OFF'),
+    ('synchronous', 'OFF'),
+    ('cache_size', -262144),  # ~256 MB
+    ('temp_store', 'MEMORY'),
+)
+
+MIN_ORDERS, MAX_ORDERS = 3, 5
+COMPLAINTS_PER_USER = 2
+# (first day, number of days, share of complaints)
+COMPLAINT_PERIODS = [('2026-01-01', 31, 800), ('2026-02-01', 28, 1000), ('2026-03-01', 7, 600)]
+STATUS_REFERENCE_DATE = '2026-03-08'
+# (complaints younger than N days, statuses, weights); the last rule has no limit
+STATUS_RULES = [
+    (2, ['Pending', 'Verified by L1'], [0.8, 0.2]),
+    (5, ['Verified by L1', 'Forwarded to Department', 'Under Investigation', 'Resolved'], [0.2, 0.4, 0.2, 0.2]),
+    (None, ['Resolved', 'Rejected'], [0.8, 0.2]),
+]
+ROUTED_STATUSES = ['Forwarded to Department', 'Under Investigation', 'Resolved', 'Rejected']
+CATEGORY_DEPARTMENTS = {
+    'Delivery Delay': 'Delivery', 'Food Quality': 'Restaurant', 'Restaurant Issue': 'Restaurant',
+    'Payment Issue': 'Finance', 'App Issue': 'App Issue',
+}
+ADMIN_RESPONSES = {
+    'Resolved': "We have investigated your issue and provided a resolution.",
+    'Rejected': "As per policy, we cannot proceed with compensation for this claim.",
+    'Forwarded to Department': "Case escalated to the specialized department.",
+    'Under Investigation': "Case escalated to the specialized department.",
+}
+COMPENSATION_TYPES = ['Refund', 'Coupon', 'Free Delivery', 'Wallet Credit']
+
+
+class BulkGenerator:
+    """Vectorized rows for one zone. Row ids are derived from the user's
+    position in the zone, so chunks (and zones, via id bases) never
+    collide and need no shared counters."""
+
+    def __init__(self, zone_name, zone_id, dept_ids, bases, password, seed):
+        self.zone_id = zone_id
+        self.bases = bases
+        self.password = password
+        self.rng = np.random.default_rng([seed, zone_id])
+        self.restaurants = np.array(RESTAURANTS_MAP.get(zone_name, sum(RESTAURANTS_MAP.values(), [])), dtype=object)
+        # A pool of order baskets to draw from instead of building one per order
+        item_rng = random.Random(seed * 1000 + zone_id)
+        self.baskets = np.array([
+            ", ".join(f"{item_rng.choice(MENU)} (x{item_rng.randint(1, 3)})" for _ in range(item_rng.randint(1, 4)))
+            for _ in range(512)
+        ], dtype=object)
+        self.order_dates = np.array([(datetime(2026, 1, 1) + timedelta(days=d)).strftime("%Y-%m-%d %H:%M:%S")
+                                     for d in range(61)], dtype=object)
+        self.categories = np.array(COMPLAINT_CATEGORIES, dtype=object)
+        self.category_weights = np.array(COMPLAINT_WEIGHTS) / sum(COMPLAINT_WEIGHTS)
+        texts = [TEXT_SAMPLES[c] for c in COMPLAINT_CATEGORIES]
+        self.texts = np.array(sum(texts, []), dtype=object)
+        self.text_counts = np.array([len(t) for t in texts])
+        self.text_offsets = np.cumsum(self.text_counts) - self.text_counts
+        self.statuses = np.array(STATUSES, dtype=object)
+        self.departments = np.array([dept_ids.get(CATEGORY_DEPARTMENTS[c]) for c in COMPLAINT_CATEGORIES], dtype=object)
+        self.responses = np.array([ADMIN_RESPONSES.get(s) for s in STATUSES], dtype=object)
+        self.routed = np.isin(self.statuses, ROUTED_STATUSES)
+        self.period_starts = np.array([start for start, _, _ in COMPLAINT_PERIODS], dtype='datetime64[s]')
+        self.period_days = np.array([days for _, days, _ in COMPLAINT_PERIODS])
+        shares = np.array([share for _, _, share in COMPLAINT_PERIODS], dtype=float)
+        self.period_weights = shares / shares.sum()
+
+    def chunk(self, first_user, n_users):
+        # Returns {table: list of row tuples} for users [first_user, first_user + n_users)
+        rng = self.rng
+        local = np.arange(first_user, first_user + n_users)
+        user_ids = self.bases['users'] + local
+        users = [(uid, f"bulk_{self.zone_id}_{i}", self.password, 'user')
+                 for uid, i in zip(user_ids.tolist(), local.tolist())]
+
+        counts = rng.integers(MIN_ORDERS, MAX_ORDERS + 1, n_users)
+        owner = np.repeat(np.arange(n_users), counts)
+        slot = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        order_ids = self.bases['orders'] + local[owner] * MAX_ORDERS + slot
+        orders = list(zip(
+            order_ids.tolist(), user_ids[owner].tolist(),
+            self.restaurants[rng.integers(len(self.restaurants), size=owner.size)].tolist(),
+            self.baskets[rng.integers(len(self.baskets), size=owner.size)].tolist(),
+            rng.integers(150, 801, owner.size).tolist(),
+            self.order_dates[rng.integers(len(self.order_dates), size=owner.size)].tolist(),
+            ['Delivered'] * owner.size,
+        ))
+
+        n = n_users * COMPLAINTS_PER_USER
+        c_owner = np.repeat(np.arange(n_users), COMPLAINTS_PER_USER)
+        complaint_index = first_user * COMPLAINTS_PER_USER + np.arange(n)
+        picked = (rng.random(n) * counts[c_owner]).astype(np.int64)
+        category = rng.choice(len(self.categories), size=n, p=self.category_weights)
+        text = self.text_offsets[category] + (rng.random(n) * self.text_counts[category]).astype(np.int64)
+
+        period = rng.choice(len(self.period_starts), size=n, p=self.period_weights)
+        offsets = rng.integers(0, self.period_days[period]) * 86400 + rng.integers(0, 86400, n)
+        stamps = self.period_starts[period] + offsets.astype('timedelta64[s]')
+        timestamps = np.char.replace(np.datetime_as_string(stamps, unit='s'), 'T', ' ').astype(object)
+        days_ago = (np.datetime64(STATUS_REFERENCE_DATE, 's') - stamps).astype(np.int64) // 86400
+
+        status = np.empty(n, dtype=np.int64)
+        rule = np.searchsorted([limit for limit, _, _ in STATUS_RULES[:-1]], days_ago, side='right')
+        draw = rng.random(n)
+        for i, (_, names, weights) in enumerate(STATUS_RULES):
+            mask = rule == i
+            cumulative = np.cumsum(weights) / sum(weights)
+            picks = np.minimum(np.searchsorted(cumulative, draw[mask], side='right'), len(names) - 1)
+            status[mask] = np.array([STATUSES.index(s) for s in names])[picks]
+        department = np.where(self.routed[status], self.departments[category], None)
+
+        complaints = list(zip(
+            (self.bases['complaints'] + complaint_index).tolist(), user_ids[c_owner].tolist(),
+            (self.bases['orders'] + local[c_owner] * MAX_ORDERS + picked).tolist(),
+            self.texts[text].tolist(), self.categories[category].tolist(), self.statuses[status].tolist(),
+            self.responses[status].tolist(), timestamps.tolist(), [self.zone_id] * n, department.tolist(),
+        ))
+
+        resolved = np.flatnonzero(self.statuses[status] == 'Resolved')
+        kind = rng.integers(len(COMPENSATION_TYPES), size=resolved.size)
+        amounts = rng.integers(50, 501, resolved.size)
+        coupons = rng.integers(1000, 10000, resolved.size)
+        compensation = [
+            (comp_id, complaint_id, COMPENSATION_TYPES[k],
+             amount if COMPENSATION_TYPES[k] in ('Refund', 'Wallet Credit') else 0,
+             f"ZSTY{coupon}" if COMPENSATION_TYPES[k] == 'Coupon' else None, created)
+            for comp_id, complaint_id, k, amount, coupon, created in zip(
+                (self.bases['complaint_compensation'] + complaint_index[resolved]).tolist(),
+                (self.bases['complaints'] + complaint_index[resolved]).tolist(),
+                kind.tolist(), amounts.tolist(), coupons.tolist(), timestamps[resolved].tolist())
+        ]
+        return {'users': users, 'orders': orders, 'complaints': complaints, 'complaint_compensation': compensation}
+
+
+def bulk_zone(conn, zone_name, zone_id, n_users, dept_ids, bases, password, seed, chunk_users):
+    generator = BulkGenerator(zone_name, zone_id, dept_ids, bases, password, seed)
+    counts = dict.fromkeys(BULK_TABLES, 0)
+    for first in range(0, n_users, chunk_users):
+        rows = generator.chunk(first, min(chunk_users, n_users - first))
+        with conn:  # one transaction per chunk
+            for table in BULK_TABLES:
+                conn.executemany(BULK_INSERTS[table], rows[table])
+                counts[table] += len(rows[table])
+    return counts
+
+
+def bulk_zone_shard(path, schema, *args):
+    # Process pool entry point: one zone into its own shard database
+    conn = sqlite3.connect(path)
+    for name, value in BULK_PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+    conn.executescript(';\n'.join(schema))
+    counts = bulk_zone(conn, *args)
+    conn.close()
+    return path, counts
+
+
+def seed_bulk(path, n_complaints, jobs=1, seed=42, chunk_users=50000):
+    from db import disable_zone_stats, enable_zone_stats
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    for name, value in BULK_PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+
+    # Indexes and triggers are rebuilt once after the load instead of being
+    # maintained row by row
+    placeholders = ', '.join('?' * len(BULK_TABLES))
+    indexes = conn.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+                           BULK_TABLES).fetchall()
+    triggers = conn.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ({placeholders})",
+                            BULK_TABLES).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX {name}')
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER {name}')
+    conn.commit()
+
+    zones, depts = seed_reference_data(conn)
+    password = hash_password("password123")
+    first_user = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users").fetchone()[0]
+
+    # Complaints split evenly over the zones, as whole users
+    n_users = -(-n_complaints // COMPLAINTS_PER_USER)
+    zone_list = sorted(zones.items(), key=lambda z: z[1])
+    plan, offset = [], 0
+    for i, (zone_name, zone_id) in enumerate(zone_list):
+        zone_users = n_users // len(zone_list) + (1 if i < n_users % len(zone_list) else 0)
+        bases = {'users': first_user + offset, 'orders': 1 + offset * MAX_ORDERS,
+                 'complaints': 1 + offset * COMPLAINTS_PER_USER, 'complaint_compensation': 1 + offset * COMPLAINTS_PER_USER}
+        plan.append((zone_name, zone_id, zone_users, depts, bases, password, seed, chunk_users))
+        offset += zone_users
+    print(f"Generating {n_users * COMPLAINTS_PER_USER} complaints for {n_users} users in {len(zone_list)} zones "
+          f"({jobs} process{'es' if jobs > 1 else ''})...")
+
+    totals = dict.fromkeys(BULK_TABLES, 0)
+    def add(zone_name, counts):
+        for table, n in counts.items():
+            totals[table] += n
+        elapsed = time.perf_counter() - started
+        print(f"  {zone_name}: {counts['complaints']} complaints ({sum(totals.values()) / elapsed:,.0f} rows/s so far)")
+
+    if jobs > 1:
+        schema = [row[0] for row in conn.execute(f"SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})",
+                                                 BULK_TABLES)]
+        shard_dir = os.path.dirname(os.path.abspath(path))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {}
+            for args in plan:
+                shard = os.path.join(shard_dir, f".seed-shard-{os.getpid()}-{args[1]}.db")
+                if os.path.exists(shard):
+                    os.remove(shard)
+                futures[executor.submit(bulk_zone_shard, shard, schema, *args)] = args[0]
+            for future in as_completed(futures):
+                shard, counts = future.result()
+                conn.execute("ATTACH DATABASE ? AS shard", (shard,))
+                with conn:
+                    for table in BULK_TABLES:
+                        conn.execute(f"INSERT INTO main.{table} SELECT * FROM shard.{table}")
+                conn.execute("DETACH DATABASE shard")
+                os.remove(shard)
+                add(futures[future], counts)
+    else:
+        for args in plan:
+            add(args[0], bulk_zone(conn, *args))
+    loaded = time.perf_counter() - started
+
+    print("Rebuilding indexes and triggers...")
+    for _, sql in indexes:
+        conn.execute(sql)
+    for _, sql in triggers:
+        conn.execute(sql)
+    conn.commit()
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'zone_stats'").fetchone():
+        disable_zone_stats(conn)
+        enable_zone_stats(conn)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'zone_versions'").fetchone():
+        # New data: invalidate every dashboard ETag
+        conn.execute("INSERT INTO zone_versions (zone_id, version) SELECT zone_id, 1 FROM zones WHERE 1 "
+                     "ON CONFLICT (zone_id) DO UPDATE SET version = version + 1")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+
+    total = time.perf_counter() - started
+    rows = sum(totals.values())
+    print("Bulk seeding completed!")
+    for table in BULK_TABLES:
+        print(f"- {totals[table]} {table}")
+    print(f"{rows} rows loaded in {loaded:.1f}s ({rows / loaded:,.0f} rows/s), {total:.1f}s including indexes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the complaints database with demo or load-test data.")
+    parser.add_argument('--db', default=DATABASE)
+    parser.add_argument('--bulk', action='store_true', help='generate --complaints rows with the bulk loader')
+    parser.add_argument('--complaints', type=int, default=1000000)
+    parser.add_argument('--jobs', type=int, default=1, help='zones generated in parallel processes')
+    parser.add_argument('--chunk-users', type=int, default=50000, help='users generated and committed per transaction')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.bulk:
+        seed_bulk(args.db, args.complaints, jobs=max(args.jobs, 1), seed=args.seed, chunk_users=args.chunk_users)
+    else:
+        seed_demo(args.db)
+
 if __name__ == '__main__':
     main()
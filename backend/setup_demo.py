@@ -1,5 +1,5 @@
 import sqlite3
-from werkzeug.security import generate_password_hash
+from passwords import hash_password
 
 def setup_demo():
     conn = sqlite3.connect('complaints.db')
@@ -20,7 +20,7 @@ def setup_demo():
     # Set up master admin for Coimbatore
     master_username = 'master'
     master_password = 'master123'
-    master_pass_hash = generate_password_hash(master_password)
+    master_pass_hash = hash_password(master_password)
     
     # Check if 'master' uses this zone, else update it
     cursor.execute("SELECT id FROM company_admin_registry WHERE admin_username = ?", (master_username,))
@@ -58,13 +58,13 @@ def setup_demo():
         staff_row = cursor.fetchone()
         if staff_row:
             cursor.execute("UPDATE support_staff SET password = ?, role = ?, zone_id = ?, department_id = ? WHERE username = ?",
-                           (password, role, zone_id, dept_id, username))
+                           (hash_password(password), role, zone_id, dept_id, username))
         else:
             cursor.execute("INSERT INTO support_staff (username, password, role, zone_id, department_id, created_by_admin) VALUES (?, ?, ?, ?, ?, ?)",
-                           (username, password, role, zone_id, dept_id, 1))
+                           (username, hash_password(password), role, zone_id, dept_id, 1))
 
     # Add a user to test
-    user_pass = generate_password_hash('user123')
+    user_pass = hash_password('user123')
     cursor.execute("SELECT id FROM users WHERE username = 'testuser'")
     if not cursor.fetchone():
         cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", ('testuser', user_pass, 'user'))
@@ -0,0 +1,254 @@
+"""
+Trains the complaint classifier and writes a versioned model artifact.
+
+    python backend/train_model.py                          # complaints_dataset.csv
+    python backend/train_model.py --source db --status Resolved
+    python backend/train_model.py --promote                # also make it CURRENT
+
+Every candidate in the grid (vectorizer settings x classifier settings) is
+cross-validated in parallel with joblib, one task per (candidate, fold),
+and scored on accuracy and macro F1. Only the candidates within
+--tolerance of the best F1 can be chosen, so only those are refit on all
+the data (again in parallel) to measure their serving cost: the artifact
+size (vocabulary x classes, which is what the NumPy inference engine's
+work grows with) and per-complaint latency. The smallest of them is
+written to models/<version>/ together with training.json (settings,
+scores, data fingerprint); registry.py
+describes how the app picks versions up. Splits and classifiers are
+seeded and the choice never depends on timings, so the same data and
+--seed give the same model.
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.svm import LinearSVC
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from artifacts import export_artifacts, load_artifacts
+from inference import LinearTextClassifier
+from registry import MODELS_DIR, ModelRegistry
+
+VECTORIZER_GRID = {
+    'ngram_range': [(1, 1), (1, 2)],
+    'max_features': [1000, 5000, None],
+    'sublinear_tf': [False, True],
+}
+CLASSIFIER_GRID = [
+    (LogisticRegression, {'C': [1.0, 10.0]}),
+    (LinearSVC, {'C': [0.5, 1.0]}),
+]
+
+
+def load_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = [(row['text'], row['category']) for row in csv.DictReader(f)]
+    return [text for text, _ in rows], [category for _, category in rows]
+
+
+def load_db(path, statuses=(), limit=None):
+    # Labelled complaints straight from the complaints table, read in
+    # chunks. Categories there are model predictions unless staff corrected
+    # them, so restrict to statuses whose labels were reviewed. limit keeps
+    # only the most recent rows.
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    query = "SELECT id, text, category FROM complaints WHERE text != '' AND category IS NOT NULL"
+    params = list(statuses)
+    if statuses:
+        query += f" AND status IN ({', '.join('?' * len(statuses))})"
+    if limit:
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(int(limit))
+    query = f"SELECT text, category FROM ({query})"
+    texts, labels = [], []
+    try:
+        cursor = conn.execute(query + " ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            for text, category in rows:
+                texts.append(text)
+                labels.append(category)
+    finally:
+        conn.close()
+    return texts, labels
+
+
+def candidates():
+    vectorizer_keys = sorted(VECTORIZER_GRID)
+    for values in itertools.product(*(VECTORIZER_GRID[k] for k in vectorizer_keys)):
+        vectorizer_params = dict(zip(vectorizer_keys, values))
+        for model_class, grid in CLASSIFIER_GRID:
+            keys = sorted(grid)
+            for model_values in itertools.product(*(grid[k] for k in keys)):
+                yield vectorizer_params, model_class, dict(zip(keys, model_values))
+
+
+def build(vectorizer_params, model_class, model_params, seed):
+    vectorizer = TfidfVectorizer(stop_words='english', **vectorizer_params)
+    model = model_class(random_state=seed, max_iter=5000, **model_params)
+    return vectorizer, model
+
+
+def fit_and_score(vectorizer, model, texts, labels, train, test):
+    vectorizer, model = clone(vectorizer), clone(model)
+    model.fit(vectorizer.fit_transform([texts[i] for i in train]), [labels[i] for i in train])
+    predicted = model.predict(vectorizer.transform([texts[i] for i in test]))
+    expected = [labels[i] for i in test]
+    return accuracy_score(expected, predicted), f1_score(expected, predicted, average='macro')
+
+
+def serving_cost(vectorizer, model, texts, samples=200):
+    # Latency of the engine the API actually serves with, one complaint at
+    # a time, plus the size of the exported arrays
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export_artifacts(vectorizer, model, tmp_dir)
+        size = sum(os.path.getsize(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir))
+        engine = LinearTextClassifier(load_artifacts(tmp_dir))
+        sample = texts[:samples]
+        engine.predict(sample[:1])
+        timings = []
+        for text in sample:
+            started = time.perf_counter()
+            engine.predict([text])
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6, size
+
+
+def refit_and_cost(candidate, texts, labels, seed):
+    vectorizer, model = build(*candidate, seed)
+    model.fit(vectorizer.fit_transform(texts), labels)
+    # Measured while other refits run, so latency is indicative only; the
+    # choice uses size
+    latency_us, size = serving_cost(vectorizer, model, texts)
+    return (vectorizer, model), latency_us, size
+
+
+def describe(vectorizer_params, model_class, model_params):
+    ngrams = '{}-{}'.format(*vectorizer_params['ngram_range'])
+    return (f"{model_class.__name__}(C={model_params['C']}) ngrams={ngrams} "
+            f"max_features={vectorizer_params['max_features']} sublinear={vectorizer_params['sublinear_tf']}")
+
+
+def data_fingerprint(texts, labels):
+    digest = hashlib.sha256()
+    for text, label in zip(texts, labels):
+        digest.update(f'{label}\t{text}\n'.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', choices=['csv', 'db'], default='csv')
+    parser.add_argument('--csv', default=os.path.join(BASE_DIR, 'complaints_dataset.csv'))
+    parser.add_argument('--db', default=os.environ.get('COMPLAINTS_DB', os.path.join(BASE_DIR, 'complaints.db')))
+    parser.add_argument('--status', action='append', default=[], help='db: only complaints with this status (repeatable)')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--jobs', type=int, default=-1, help='parallel workers, -1 = all cores')
+    parser.add_argument('--tolerance', type=float, default=0.005, help='F1 a cheaper model may give up')
+    parser.add_argument('--out', default=MODELS_DIR, help='directory that receives models/<version>/')
+    parser.add_argument('--promote', action='store_true', help='point the registry CURRENT at the new version; running apps hot-swap to it')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.source == 'csv':
+        texts, labels = load_csv(args.csv)
+    else:
+        texts, labels = load_db(args.db, tuple(args.status))
+    if len(set(labels)) < 2:
+        sys.exit(f'Need at least two categories to train, got {len(texts)} complaints')
+    print(f"{len(texts)} complaints, {len(set(labels))} categories from {args.source}")
+
+    grid = list(candidates())
+    splits = list(StratifiedKFold(args.folds, shuffle=True, random_state=args.seed).split(texts, labels))
+    scores = Parallel(n_jobs=args.jobs)(
+        delayed(fit_and_score)(*build(*candidate, args.seed), texts, labels, train, test)
+        for candidate in grid for train, test in splits
+    )
+    scores = np.array(scores).reshape(len(grid), len(splits), 2).mean(axis=1)
+    print(f"cross-validated {len(grid)} candidates x {len(splits)} folds in {time.perf_counter() - started:.1f}s")
+
+    results = [{'candidate': candidate, 'fitted': None, 'accuracy': float(accuracy), 'f1': float(f1),
+                'latency_us': None, 'size_bytes': None}
+               for candidate, (accuracy, f1) in zip(grid, scores)]
+    best_f1 = max(r['f1'] for r in results)
+    eligible = [r for r in results if r['f1'] >= best_f1 - args.tolerance]
+    costs = Parallel(n_jobs=args.jobs)(
+        delayed(refit_and_cost)(r['candidate'], texts, labels, args.seed) for r in eligible
+    )
+    for r, (fitted, latency_us, size) in zip(eligible, costs):
+        r.update(fitted=fitted, latency_us=latency_us, size_bytes=size)
+    print(f"refit {len(eligible)} candidates within {args.tolerance} F1 of the best")
+    # min() keeps grid order among exact ties
+    chosen = min(eligible, key=lambda r: (r['size_bytes'], -r['f1']))
+
+    print(f"\n{'':2}{'candidate':<72} {'acc':>6} {'F1':>6} {'us/text':>8} {'KB':>7}")
+    for r in sorted(results, key=lambda r: (-r['f1'], r['size_bytes'] is None, r['size_bytes'] or 0)):
+        mark = '*' if r is chosen else ' '
+        cost = (f"{r['latency_us']:8.0f} {r['size_bytes'] / 1024:7.1f}" if r['size_bytes'] is not None
+                else f"{'-':>8} {'-':>7}")
+        print(f"{mark} {describe(*r['candidate']):<72} {r['accuracy']:6.3f} {r['f1']:6.3f} {cost}")
+
+    vectorizer, model = chosen['fitted']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export_artifacts(vectorizer, model, tmp_dir)
+        artifact_version = load_artifacts(tmp_dir).version
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{artifact_version}"
+        path = os.path.join(args.out, version)
+        shutil.copytree(tmp_dir, path)
+
+    vectorizer_params, model_class, model_params = chosen['candidate']
+    training = {
+        'version': version,
+        'artifact_version': artifact_version,
+        'trained_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'source': args.source,
+        'samples': len(texts),
+        'data_fingerprint': data_fingerprint(texts, labels),
+        'seed': args.seed,
+        'folds': args.folds,
+        'model': model_class.__name__,
+        'model_params': model_params,
+        'vectorizer_params': vectorizer_params,
+        'cv_accuracy': chosen['accuracy'],
+        'cv_f1_macro': chosen['f1'],
+        'latency_us': chosen['latency_us'],
+        'size_bytes': chosen['size_bytes'],
+        'candidates': [
+            {'description': describe(*r['candidate']), 'accuracy': r['accuracy'], 'f1': r['f1'],
+             'latency_us': r['latency_us'], 'size_bytes': r['size_bytes']}
+            for r in results
+        ],
+    }
+    with open(os.path.join(path, 'training.json'), 'w') as f:
+        json.dump(training, f, indent=2)
+    print(f"\nwrote {path} ({time.perf_counter() - started:.1f}s total)")
+
+    if args.promote:
+        ModelRegistry(args.out).set_current(version)
+        print(f"promoted {version} (CURRENT)")
+
+
+if __name__ == '__main__':
+    main()
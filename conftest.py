@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The backend imports its sibling modules by top-level name (passwords,
+# cache, ...); tests that share classes with the app import them the same
+# way, or they get a second copy of the module
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Point the backend at a throwaway database before it is first imported
+_tmp_dir = tempfile.mkdtemp(prefix='complaints_test_')
+os.environ['COMPLAINTS_DB'] = os.path.join(_tmp_dir, 'complaints.db')
+os.environ.setdefault('PREDICT_BATCH_WINDOW_MS', '0')
+os.environ.setdefault('PASSWORD_WORKERS', '0')
+
+# test_api.py is a manual script that talks to a running server
+collect_ignore = ['test_api.py']
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    from backend import app as app_module
+    app_module.create_app()
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def master_headers(app_module):
+    # master_headers(zone_id) -> Authorization header for that zone's admin
+    def headers(zone_id=1):
+        token = app_module.master_tokens.dumps({'id': 1, 'role': 'master', 'zone_id': zone_id})
+        return {'Authorization': f'Bearer {token}'}
+    return headers
+
+
+@pytest.fixture
+def traced_queries(app_module, monkeypatch):
+    """Collects every SQL statement run on pooled connections during a test."""
+    statements = []
+    pool = app_module.db_pool
+    acquire, release = pool.acquire, pool.release
+
+    def traced_acquire():
+        conn = acquire()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    def traced_release(conn):
+        conn.set_trace_callback(None)
+        release(conn)
+
+    monkeypatch.setattr(pool, 'acquire', traced_acquire)
+    monkeypatch.setattr(pool, 'release', traced_release)
+    return statements
@@ -1,6 +1,26 @@
 const BASE_URL = import.meta.env.VITE_API_URL || "http://127.0.0.1:5000";
 const API_URL = `${BASE_URL.replace(/\/$/, '')}/api`;
 
+// --- Conditional GET ---
+// Dashboard endpoints return an ETag; we keep the last body per URL and
+// revalidate with If-None-Match, so an unchanged poll is an empty 304.
+const etagCache = new Map();
+
+const fetchWithETag = async (url, extraHeaders = {}) => {
+    const cached = etagCache.get(url);
+    const headers = cached ? { ...extraHeaders, "If-None-Match": cached.etag } : extraHeaders;
+    const response = await fetch(url, { headers, cache: "no-store" });
+    if (response.status === 304 && cached) {
+        return cached.body;
+    }
+    const body = await response.json();
+    const etag = response.headers.get("ETag");
+    if (response.ok && etag) {
+        etagCache.set(url, { etag, body });
+    }
+    return body;
+};
+
 // --- Auth ---
 
 export const loginUser = async (username, password, role) => {
@@ -173,13 +193,35 @@ export const getSupportComplaints = async (zone_id, department_id = '') => {
     try {
         let url = `${API_URL}/support/complaints?zone_id=${zone_id}`;
         if (department_id) url += `&department_id=${department_id}`;
-        const res = await fetch(url);
-        return res.json();
+        return await fetchWithETag(url);
     } catch (e) {
         return [];
     }
 };
 
+// Live complaint events (server-sent events). Calls onEvent(type, complaint)
+// for 'complaint_created' and 'complaint_updated'; returns an unsubscribe fn.
+export const subscribeSupportStream = (zone_id, department_id, onEvent) => {
+    let url = `${API_URL}/support/stream?zone_id=${zone_id}`;
+    if (department_id) url += `&department_id=${department_id}`;
+    const source = new EventSource(url);
+    ['complaint_created', 'complaint_updated'].forEach(type => {
+        source.addEventListener(type, (e) => onEvent(type, JSON.parse(e.data)));
+    });
+    return () => source.close();
+};
+
+// Applies a streamed complaint (a full listing row) to a dashboard list:
+// replaces the row with the same id or inserts it in listing order
+// (newest first). Rows for which belongs(complaint) is false are removed.
+export const applyComplaintEvent = (complaints, complaint, belongs = () => true) => {
+    const rest = complaints.filter(c => c.id !== complaint.id);
+    if (!belongs(complaint)) return rest.length === complaints.length ? complaints : rest;
+    const newer = (a, b) => a.timestamp > b.timestamp || (a.timestamp === b.timestamp && a.id > b.id);
+    const index = rest.findIndex(c => newer(complaint, c));
+    return index === -1 ? [...rest, complaint] : [...rest.slice(0, index), complaint, ...rest.slice(index)];
+};
+
 export const supportAction = async (data) => {
     try {
         const res = await fetch(`${API_URL}/support/action`, {
@@ -194,10 +236,16 @@ export const supportAction = async (data) => {
 };
 
 // --- MASTER ADMIN ACTIONS ---
+// Master endpoints take the token returned by masterLogin (kept on the
+// stored master/admin user)
+const masterAuth = () => {
+    const user = JSON.parse(localStorage.getItem('masterUser') || localStorage.getItem('adminUser') || 'null');
+    return user && user.token ? { Authorization: `Bearer ${user.token}` } : {};
+};
+
 export const getMasterStats = async (zone_id) => {
     try {
-        const res = await fetch(`${API_URL}/master/stats?zone_id=${zone_id}`);
-        return res.json();
+        return await fetchWithETag(`${API_URL}/master/stats?zone_id=${zone_id}`, masterAuth());
     } catch (e) {
         return {};
     }
@@ -205,7 +253,7 @@ export const getMasterStats = async (zone_id) => {
 
 export const getMasterStaff = async (zone_id) => {
     try {
-        const res = await fetch(`${API_URL}/master/staff?zone_id=${zone_id}`);
+        const res = await fetch(`${API_URL}/master/staff?zone_id=${zone_id}`, { headers: masterAuth() });
         return res.json();
     } catch (e) {
         return [];
@@ -216,7 +264,7 @@ export const createStaff = async (data) => {
     try {
         const res = await fetch(`${API_URL}/master/staff`, {
             method: "POST",
-            headers: { "Content-Type": "application/json" },
+            headers: { "Content-Type": "application/json", ...masterAuth() },
             body: JSON.stringify(data)
         });
         return res.json();
@@ -25,12 +25,13 @@ const MasterAdminDashboard = () => {
         }
         const m = JSON.parse(stored);
         setMaster(m);
-        fetchData();
+        fetchData(m);
     }, [navigate]);
 
-    const fetchData = async () => {
+    const fetchData = async (m) => {
         setLoading(true);
-        const zs = await getZones();
+        // Master tokens are scoped to the admin's zone
+        const zs = (await getZones()).filter(z => String(z.zone_id) === String(m.zone_id));
         setZones(zs);
 
         const statsMap = {};
@@ -1,6 +1,6 @@
 import React, { useEffect, useState, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getSupportComplaints, supportAction, getDepartments } from '../../api';
+import { getSupportComplaints, subscribeSupportStream, supportAction, getDepartments, applyComplaintEvent } from '../../api';
 import SidebarLayout from '../../components/SidebarLayout';
 import { motion, AnimatePresence } from 'framer-motion';
 import { ShieldCheck, XCircle, Send, CheckCircle2, Filter, AlertCircle, Clock, CheckSquare, ChevronLeft, ChevronRight, BarChart3, Search } from 'lucide-react';
@@ -49,6 +49,15 @@ const L1Dashboard = () => {
         setLoading(false);
     };
 
+    // Live updates: events carry the full listing row, so new complaints
+    // are inserted and changed ones patched without re-fetching the zone
+    useEffect(() => {
+        if (!user) return undefined;
+        return subscribeSupportStream(user.zone_id, '', (type, complaint) => {
+            setComplaints(prev => applyComplaintEvent(prev, complaint));
+        });
+    }, [user]);
+
     const handleAction = async (id, action, deptId = null) => {
         let admin_response_text = prompt("Enter optional response message to user:");
         if (admin_response_text === null) return;
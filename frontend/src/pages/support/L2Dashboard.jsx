@@ -1,6 +1,6 @@
 import React, { useEffect, useState, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getSupportComplaints, supportAction } from '../../api';
+import { getSupportComplaints, subscribeSupportStream, supportAction, applyComplaintEvent } from '../../api';
 import SidebarLayout from '../../components/SidebarLayout';
 import { motion, AnimatePresence } from 'framer-motion';
 import { Search, Filter, AlertTriangle, CheckCircle, Ticket, Wallet, PackageOpen, Undo, ChevronLeft, ChevronRight, PieChart as PieChartIcon } from 'lucide-react';
@@ -8,6 +8,9 @@ import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContaine
 
 const COLORS = ['#10B981', '#F59E0B', '#EF4444', '#3B82F6', '#8B5CF6'];
 
+// Statuses the department listing shows (see get_support_complaints)
+const L2_STATUSES = ['Forwarded to Department', 'Under Investigation', 'Resolved'];
+
 const L2Dashboard = () => {
     const [user, setUser] = useState(null);
     const [complaints, setComplaints] = useState([]);
@@ -42,6 +45,17 @@ const L2Dashboard = () => {
         setLoading(false);
     };
 
+    // Live updates for this department: events carry the full listing row,
+    // so complaints forwarded in are inserted and ones that leave the
+    // department's statuses are dropped, without re-fetching the listing
+    useEffect(() => {
+        if (!user) return undefined;
+        const belongs = c => String(c.department_id) === String(user.department_id) && L2_STATUSES.includes(c.status);
+        return subscribeSupportStream(user.zone_id, user.department_id, (type, complaint) => {
+            setComplaints(prev => applyComplaintEvent(prev, complaint, belongs));
+        });
+    }, [user]);
+
     const handleAction = async (id, action) => {
         let admin_response_text = prompt("Enter investigation response message to user:");
         if (admin_response_text === null) return;
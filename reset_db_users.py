@@ -1,5 +1,9 @@
+import os
 import sqlite3
-from werkzeug.security import generate_password_hash
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from passwords import hash_password
 
 DATABASE = 'backend/complaints.db'
 
@@ -13,7 +17,7 @@ def reset_users():
         print(u)
         
     print("\n--- Resetting Admin ---")
-    admin_pass = generate_password_hash("admin123")
+    admin_pass = hash_password("admin123")
     
     # Check if admin exists
     cursor.execute("SELECT * FROM users WHERE username = 'admin'")
@@ -26,7 +30,7 @@ def reset_users():
         print("Admin user created with password 'admin123'")
 
     print("\n--- Ensuring Test User ---")
-    user_pass = generate_password_hash("password123")
+    user_pass = hash_password("password123")
     cursor.execute("SELECT * FROM users WHERE username = 'user1'")
     if not cursor.fetchone():
         cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
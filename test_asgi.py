@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+
+@pytest.fixture
+def asgi_app(app_module):
+    from backend import asgi
+    server = asgi.ASGIApp(app_module.app, threads=2, inference_processes=0, max_body_size=1024)
+    yield server
+    server.stop()
+
+
+async def call(asgi_app, method, path, query=b'', body=b'', until=None, headers=(), received=None):
+    # Drives one request and collects the response; for streams, disconnects
+    # once until(body_so_far) is true. A list body is sent as chunks.
+    disconnect = asyncio.Event()
+    chunks = list(body) if isinstance(body, list) else [body]
+    received = [] if received is None else received
+    messages = []
+
+    async def receive():
+        if len(received) < len(chunks):
+            received.append(chunks[len(received)])
+            return {'type': 'http.request', 'body': received[-1], 'more_body': len(received) < len(chunks)}
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if until and until(b''.join(m.get('body', b'') for m in messages)):
+            disconnect.set()
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+             'headers': [(b'content-type', b'application/json'), *headers], 'http_version': '1.1'}
+    await asyncio.wait_for(asgi_app(scope, receive, send), 10)
+    return messages[0]['status'], b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def test_asgi_serves_flask_routes(asgi_app, client):
+    status, body = asyncio.run(call(asgi_app, 'GET', '/api/departments'))
+    assert status == 200
+    assert json.loads(body) == client.get('/api/departments').get_json()
+
+
+def test_asgi_streams_events_without_a_handler_thread(asgi_app, app_module):
+    async def scenario():
+        stream = asyncio.ensure_future(call(asgi_app, 'GET', '/api/support/stream', b'zone_id=1',
+                                            until=lambda body: b'complaint_created' in body))
+        while app_module.event_broker.stats()['subscribers'] == 0:
+            await asyncio.sleep(0.01)
+        # Both handler threads stay free while the stream is open
+        statuses = await asyncio.gather(*(call(asgi_app, 'GET', '/api/zones') for _ in range(4)))
+        assert [status for status, _ in statuses] == [200] * 4
+        app_module.event_broker.publish('complaint_created', {'id': 1, 'zone_id': 1, 'department_id': None})
+        return await stream
+
+    status, body = asyncio.run(scenario())
+    assert status == 200
+    assert b'event: complaint_created' in body
+    assert app_module.event_broker.stats()['subscribers'] == 0
+
+
+def test_asgi_reads_chunked_bodies_and_caps_their_size(asgi_app):
+    payload = json.dumps({'complaints': [{'text': 'Food was cold', 'user_id': 1}] * 3}).encode()
+    status, body = asyncio.run(call(asgi_app, 'POST', '/api/predict/batch', body=[payload[:10], payload[10:40], payload[40:]],
+                                    headers=[(b'transfer-encoding', b'chunked')]))
+    assert status == 200
+    assert json.loads(body)['count'] == 3
+
+    # Rejected from Content-Length before any of the body is read...
+    received = []
+    status, body = asyncio.run(call(asgi_app, 'POST', '/api/predict/batch', body=b'x' * 2000,
+                                    headers=[(b'content-length', b'2000')], received=received))
+    assert status == 413 and received == []
+    # ...or as soon as the chunks pass the limit
+    received = []
+    status, _ = asyncio.run(call(asgi_app, 'POST', '/api/predict/batch', body=[b'x' * 600] * 4, received=received))
+    assert status == 413 and len(received) == 2
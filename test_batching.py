@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from backend.batching import PredictionBatcher
+
+
+def classify(texts):
+    if any(text == 'bad' for text in texts):
+        raise ValueError('cannot classify')
+    return [text.upper() for text in texts]
+
+
+def predict_concurrently(batcher, texts):
+    results = {}
+
+    def call(text):
+        try:
+            results[text] = batcher.predict(text)
+        except ValueError as e:
+            results[text] = e
+
+    threads = [threading.Thread(target=call, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_concurrent_calls_are_coalesced():
+    batcher = PredictionBatcher(classify, window_ms=200, max_batch=8)
+    texts = [f'text {i}' for i in range(8)]
+    assert predict_concurrently(batcher, texts) == {text: text.upper() for text in texts}
+    metrics = batcher.metrics()
+    assert metrics['items'] == 8
+    assert metrics['batches'] < 8
+
+
+def test_failing_text_only_fails_its_caller():
+    batcher = PredictionBatcher(classify, window_ms=200, max_batch=4)
+    results = predict_concurrently(batcher, ['a', 'bad', 'b', 'c'])
+    assert isinstance(results['bad'], ValueError)
+    assert [results[t] for t in 'abc'] == ['A', 'B', 'C']
+
+
+def test_stuck_batcher_falls_back_to_inline_prediction(monkeypatch):
+    batcher = PredictionBatcher(classify, window_ms=1, timeout=0.05)
+    # No batcher thread ever starts
+    monkeypatch.setattr(batcher, '_ensure_worker', lambda: None)
+    started = time.perf_counter()
+    assert batcher.predict('late') == 'LATE'
+    assert time.perf_counter() - started < 1
+    assert batcher.metrics()['timeouts'] == 1
+    assert not batcher._queue
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_worker_restarts_after_fork_or_death():
+    batcher = PredictionBatcher(classify, window_ms=1)
+    assert batcher.predict('a') == 'A'
+    first = batcher._thread
+
+    # A forked child inherits the pid check but not the thread
+    batcher._pid = -1
+    assert batcher.predict('b') == 'B'
+    assert batcher._thread is not first
+
+    # A batcher thread that died is replaced on the next call
+    def broken(batch, started):
+        raise RuntimeError('metrics failed')
+    batcher._record = broken
+    assert batcher.predict('c') == 'C'
+    batcher._thread.join(1)
+    assert not batcher._thread.is_alive()
+    del batcher._record
+    assert batcher.predict('d') == 'D'
+    assert batcher._thread.is_alive()
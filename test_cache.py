@@ -0,0 +1,56 @@
+from backend import cache as cache_module
+from backend.cache import TTLCache
+
+
+class Clock:
+    now = 1000.0
+
+    @classmethod
+    def monotonic(cls):
+        return cls.now
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # a is now the most recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiry_and_invalidation(monkeypatch):
+    monkeypatch.setattr(cache_module, 'time', Clock)
+    cache = TTLCache(default_ttl=10)
+    cache.set('stats', 'old')
+    cache.set('forever', 'x', ttl=0)
+    cache.set('staff:1', 'a')
+    cache.set('staff:2', 'b')
+    Clock.now += 9
+    assert cache.get('stats') == 'old'
+    Clock.now += 2
+    assert cache.get('stats') is None
+    assert cache.get_or_set('stats', lambda: 'new') == 'new'
+    assert cache.get('forever') == 'x'
+
+    cache.invalidate_prefix('staff:')
+    assert cache.get('staff:1') is None and cache.get('staff:2') is None
+    cache.invalidate('stats')
+    assert cache.get('stats') is None
+
+
+def test_writes_invalidate_cached_responses(client, master_headers):
+    before = client.get('/api/stats').get_json()
+    res = client.post('/api/predict', json={'text': 'Money deducted but order failed.', 'user_id': 1, 'zone_id': 501})
+    category = res.get_json()['category']
+    # Well inside STATS_CACHE_TTL, but complaints_changed() dropped the entry
+    assert client.get('/api/stats').get_json()[category] == before.get(category, 0) + 1
+
+    headers = master_headers(501)
+    assert client.get('/api/master/staff?zone_id=501', headers=headers).get_json() == []
+    client.post('/api/master/staff', headers=headers,
+                json={'username': 'cache_l1', 'password': 'pw', 'role': 'L1', 'zone_id': 501})
+    staff = client.get('/api/master/staff?zone_id=501', headers=headers).get_json()
+    assert [s['username'] for s in staff] == ['cache_l1']
@@ -0,0 +1,44 @@
+import pytest
+
+from backend.db import ConnectionPool, PoolTimeout, connect
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    conn = connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.close()
+    pool = ConnectionPool(path, size=1, timeout=0.1)
+    yield pool
+    pool.close_all()
+
+
+def test_release_rolls_back_open_transaction(pool):
+    conn = pool.acquire()
+    conn.execute("INSERT INTO t VALUES (1)")
+    assert conn.in_transaction
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+
+    again = pool.acquire()
+    assert again is conn
+    assert not again.in_transaction
+    assert again.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.release(again)
+    assert pool.stats() == {'size': 1, 'created': 1, 'in_use': 0, 'idle': 1}
+
+
+def test_teardown_returns_connection_after_failed_handler(app_module, pool, monkeypatch):
+    monkeypatch.setattr(app_module, 'db_pool', pool)
+    with pytest.raises(RuntimeError):
+        with app_module.app.app_context():
+            app_module.get_db().execute("INSERT INTO t VALUES (1)")
+            assert pool.stats()['in_use'] == 1
+            raise RuntimeError('handler failed')
+
+    assert pool.stats()['in_use'] == 0
+    with app_module.app.app_context():
+        assert app_module.get_db().execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
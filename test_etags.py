@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.mark.parametrize('url', ['/api/support/complaints?zone_id=601', '/api/master/stats?zone_id=601'])
+def test_etag_revalidation(client, master_headers, url):
+    headers = master_headers(601)
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+    client.post('/api/predict', json={'text': 'The food was cold', 'user_id': 1, 'zone_id': 601})
+    changed = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    # Another zone's writes leave this zone's ETag alone
+    client.post('/api/predict', json={'text': 'The food was cold', 'user_id': 1, 'zone_id': 602})
+    assert client.get(url, headers={**headers, 'If-None-Match': changed.headers['ETag']}).status_code == 304
+
+
+def test_preflight_is_cacheable(client):
+    res = client.options('/api/master/stats?zone_id=601', headers={
+        'Origin': 'http://localhost:5173',
+        'Access-Control-Request-Method': 'GET',
+        'Access-Control-Request-Headers': 'Authorization, If-None-Match',
+    })
+    assert res.headers['Access-Control-Max-Age'] == '600'
+    assert 'if-none-match' in res.headers['Access-Control-Allow-Headers'].lower()
@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+
+
+def seed_export(app_module, zone_id, n_complaints):
+    conn = app_module.get_db_connection()
+    with conn:
+        user_id = conn.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                               (f'export{zone_id}_user', 'x', 'user')).lastrowid
+        for i in range(n_complaints):
+            conn.execute(
+                "INSERT INTO complaints (user_id, text, category, status, zone_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, f'complaint, "{i}"\nsecond line', 'Delivery Issue', 'Resolved' if i % 2 else 'Pending',
+                 zone_id, f'2026-01-01 00:00:{i:02d}'))
+    conn.close()
+
+
+def test_export_streams_filtered_rows(app_module, client, monkeypatch):
+    seed_export(app_module, 301, 25)
+    monkeypatch.setattr(app_module, 'EXPORT_BATCH_SIZE', 4)
+
+    res = client.get('/api/complaints/export?zone_id=301&status=Resolved&fields=text,status')
+    assert res.mimetype == 'text/csv'
+    assert not res.is_sequence  # streamed, not buffered
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert len(rows) == 12
+    assert set(rows[0]) == {'id', 'timestamp', 'text', 'status'}
+    assert rows[0]['text'] == 'complaint, "23"\nsecond line'
+    assert [r['timestamp'] for r in rows] == sorted((r['timestamp'] for r in rows), reverse=True)
+
+    res = client.get('/api/complaints/export?zone_id=301&format=ndjson')
+    lines = res.get_data(as_text=True).splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[-1])['text'] == 'complaint, "0"\nsecond line'
+
+    res = client.get('/api/complaints/export?zone_id=999')
+    assert res.get_data(as_text=True).startswith('id,user_id,')
+    assert client.get('/api/complaints/export?format=xml').status_code == 400
@@ -0,0 +1,32 @@
+import csv
+
+import numpy as np
+import pytest
+
+from backend.generate_data import categories, class_weights, generate, generate_chunk
+
+
+def test_chunks_are_reproducible_and_filled():
+    weights = class_weights()
+    texts, category = generate_chunk(3, 2000, 7, weights)
+    again, _ = generate_chunk(3, 2000, 7, weights)
+    assert texts == again
+    assert texts != generate_chunk(4, 2000, 7, weights)[0]
+    assert all(text and '{' not in text for text in texts)
+    assert len(set(texts)) > 1000
+
+
+def test_class_imbalance(tmp_path):
+    weights = class_weights(imbalance=16)
+    assert weights[0] / weights[-1] == pytest.approx(16)
+    with pytest.raises(ValueError):
+        class_weights(weights=[1, 2])
+
+    counts = generate(str(tmp_path / 'complaints.csv'), 5000, weights=class_weights(weights=[1, 0, 0, 0, 1]),
+                      chunk_size=1000)
+    with open(tmp_path / 'complaints.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5000
+    assert {row['category'] for row in rows} == {categories[0], categories[-1]}
+    assert counts[categories[1]] == 0
+    assert np.isclose(counts[categories[0]] / 5000, 0.5, atol=0.05)
@@ -0,0 +1,77 @@
+import csv
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.svm import LinearSVC
+
+from backend import artifacts as artifacts_module
+from backend.artifacts import export_artifacts, load_artifacts
+from backend.inference import LinearTextClassifier, normalize_text, text_key_safe
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    with open(os.path.join(BACKEND_DIR, 'complaints_dataset.csv'), newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    # Plus texts with unknown words, accents, no tokens at all
+    extra = ['', '!!!', 'zzz qqq', 'Délivery was LATE, the delivery boy was rude!!', 'refund refund refund']
+    return [row['text'] for row in rows] + extra, [row['category'] for row in rows]
+
+
+def assert_parity(vectorizer, model, artifacts, texts):
+    engine = LinearTextClassifier(artifacts)
+    X = vectorizer.transform(texts)
+    assert engine.predict(texts) == [str(c) for c in model.predict(X)]
+    np.testing.assert_allclose(engine.decision_function(texts), model.decision_function(X), rtol=0, atol=1e-12)
+
+
+def test_numpy_engine_matches_pickled_model(dataset):
+    texts, _ = dataset
+    with open(os.path.join(BACKEND_DIR, 'model.pkl'), 'rb') as f:
+        model = pickle.load(f)
+    with open(os.path.join(BACKEND_DIR, 'vectorizer.pkl'), 'rb') as f:
+        vectorizer = pickle.load(f)
+    assert_parity(vectorizer, model, load_artifacts(os.path.join(BACKEND_DIR, 'model_artifacts')), texts)
+
+
+def test_version_is_hashed_at_export_not_load(tmp_path, monkeypatch):
+    with open(os.path.join(BACKEND_DIR, 'model.pkl'), 'rb') as f:
+        model = pickle.load(f)
+    with open(os.path.join(BACKEND_DIR, 'vectorizer.pkl'), 'rb') as f:
+        vectorizer = pickle.load(f)
+    exported = export_artifacts(vectorizer, model, str(tmp_path))
+
+    def no_hashing(meta, arrays):
+        raise AssertionError('artifacts were hashed on load')
+    monkeypatch.setattr(artifacts_module, 'artifact_version', no_hashing)
+    # Re-exporting the same model reproduces the committed version
+    assert load_artifacts(exported).version == load_artifacts(os.path.join(BACKEND_DIR, 'model_artifacts')).version
+
+
+@pytest.mark.parametrize('params', [
+    {'ngram_range': (1, 2), 'sublinear_tf': True},
+    {'ngram_range': (2, 3), 'stop_words': None, 'norm': 'l1', 'strip_accents': 'unicode'},
+    {'binary': True, 'use_idf': False, 'norm': None, 'lowercase': False},
+])
+def test_numpy_engine_matches_other_vectorizer_settings(dataset, tmp_path, params):
+    texts, labels = dataset
+    params = {'stop_words': 'english', **params}
+    vectorizer = TfidfVectorizer(**params)
+    model = LinearSVC().fit(vectorizer.fit_transform(texts[:len(labels)]), labels)
+    assert_parity(vectorizer, model, load_artifacts(export_artifacts(vectorizer, model, str(tmp_path))), texts)
+
+
+def test_normalized_text_is_a_safe_cache_key(dataset):
+    texts, _ = dataset
+    texts = texts + ["Money deducted but order failed.", "MONEY deducted...but order-failed!!", "can't   won't"]
+    artifacts = load_artifacts(os.path.join(BACKEND_DIR, 'model_artifacts'))
+    assert text_key_safe(artifacts.vectorizer_params)
+    engine = LinearTextClassifier(artifacts)
+    np.testing.assert_array_equal(engine.decision_function([normalize_text(t) for t in texts]),
+                                  engine.decision_function(texts))
+    assert normalize_text("MONEY deducted...but order-failed!!") == 'money deducted but order failed'
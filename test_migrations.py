@@ -0,0 +1,118 @@
+import sqlite3
+
+import pytest
+
+from backend.db import connect, ensure_change_versions
+from backend.migrations import MIGRATIONS, RebuildTable, Runner, migrate, table_columns
+
+# Layout of a database built before zones and staff assignment existed
+LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL, role TEXT NOT NULL DEFAULT 'user');
+CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, restaurant_name TEXT NOT NULL,
+                     items TEXT NOT NULL, total_amount REAL NOT NULL, order_date DATETIME, status TEXT);
+CREATE TABLE complaints (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, text TEXT NOT NULL,
+                         category TEXT NOT NULL, status TEXT DEFAULT 'Pending', timestamp DATETIME,
+                         order_id INTEGER, zone_id INTEGER, department_id INTEGER);
+CREATE TABLE zones (zone_id INTEGER PRIMARY KEY AUTOINCREMENT, zone_name TEXT UNIQUE NOT NULL, district TEXT NOT NULL);
+CREATE TABLE support_staff (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, password TEXT NOT NULL,
+                            role TEXT NOT NULL, zone_id INTEGER, department_id INTEGER);
+"""
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    conn = connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    with conn:
+        conn.execute("INSERT INTO zones (zone_name, district) VALUES ('Chennai', 'Chennai District')")
+        for i in range(3):
+            conn.execute("INSERT INTO support_staff (username, password, role, zone_id) VALUES (?, 'x', 'L1', 1)", (f'l1_{i}',))
+        for i in range(60):
+            user_id = conn.execute("INSERT INTO users (username, password) VALUES (?, 'x')", (f'user{i}',)).lastrowid
+            order_id = conn.execute("INSERT INTO orders (user_id, restaurant_name, items, total_amount) VALUES (?, 'CTR', 'Idli', 50)",
+                                    (user_id,)).lastrowid
+            conn.execute("INSERT INTO complaints (user_id, text, category, status, order_id, zone_id) VALUES (?, 'late', 'Delivery', ?, ?, 1)",
+                         (user_id, 'Pending' if i % 4 == 0 else 'Resolved', order_id))
+        # The AUTOINCREMENT counter is ahead of the rows after a delete
+        conn.execute("DELETE FROM users WHERE id = 60")
+    conn.close()
+    return path
+
+
+def test_migrates_legacy_database_and_resumes(legacy_db):
+    conn = connect(legacy_db)
+
+    def interrupt(message):
+        raise Interrupted(message)
+
+    # batch_size=1: the first progress report (after 20 batches) interrupts the users rebuild
+    with pytest.raises(Interrupted):
+        migrate(conn, batch_size=1, pause=0, log=lambda m: m.startswith('      ') and interrupt(m))
+    assert conn.execute("SELECT last_id FROM migration_progress").fetchone()[0] == 20
+    conn.execute("INSERT INTO users (username, password) VALUES ('late_signup', 'x')")
+    conn.execute("UPDATE users SET password = 'changed' WHERE id = 5")
+    conn.commit()
+
+    assert migrate(conn, batch_size=7, pause=0, log=lambda m: None) == [3, 4, 5]
+    assert migrate(conn, log=lambda m: None) == []
+
+    assert {'zone', 'created_at'} <= set(table_columns(conn, 'users'))
+    assert conn.execute("SELECT password FROM users WHERE id = 5").fetchone()[0] == 'changed'
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 60
+    assert conn.execute("SELECT id FROM users WHERE username = 'late_signup'").fetchone()[0] == 61
+    # No complaints yet: the default zone
+    assert conn.execute("SELECT zone FROM users WHERE username = 'late_signup'").fetchone()[0] == 'Coimbatore'
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE zone = 'Chennai'").fetchone()[0] == 59
+    assert conn.execute("SELECT COUNT(*) FROM migration_progress").fetchone()[0] == 0
+    assert not conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'users%mirror%' OR name = 'users_new'").fetchall()
+
+    # Round-robin: 45 reviewed complaints over 3 L1 agents
+    counts = conn.execute("SELECT assigned_l1, COUNT(*) FROM complaints WHERE assigned_l1 IS NOT NULL GROUP BY 1").fetchall()
+    assert [n for _, n in counts] == [15, 15, 15]
+    assert conn.execute("SELECT COUNT(*) FROM complaints WHERE status = 'Pending' AND assigned_l1 IS NOT NULL").fetchone()[0] == 0
+    assert conn.execute("SELECT DISTINCT zone FROM complaints").fetchall()[0][0] == 'Chennai'
+    assert [row[0] for row in conn.execute("SELECT version FROM schema_version")] == [m.version for m in MIGRATIONS]
+    conn.close()
+
+
+def test_rebuild_keeps_triggers_that_reference_the_table(legacy_db):
+    conn = connect(legacy_db)
+    migrate(conn, log=lambda m: None)
+    ensure_change_versions(conn)
+    columns = ', '.join(f'{c} TEXT' if c != 'id' else 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+                        for c in table_columns(conn, 'complaints'))
+    step = RebuildTable('complaints', f"CREATE TABLE IF NOT EXISTS {{name}} ({columns}, note TEXT)",
+                        done=lambda c: 'note' in table_columns(c, 'complaints'))
+    step.run(Runner(conn, batch_size=8, pause=0, log=lambda m: None))
+
+    assert 'note' in table_columns(conn, 'complaints')
+    assert conn.execute("SELECT COUNT(*) FROM complaints").fetchone()[0] == 60
+    # Triggers on complaints survived the swap and still fire
+    conn.execute("UPDATE complaints SET status = 'Resolved' WHERE id = 1")
+    conn.execute("INSERT INTO complaint_compensation (complaint_id, type) VALUES (1, 'Refund')")
+    conn.commit()
+    assert conn.execute("SELECT version FROM zone_versions WHERE zone_id = 1").fetchone()[0] == 2
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO complaints (id, text, category) VALUES (1, 'dup', 'x')")
+
+
+def test_startup_check_skips_init_on_current_database(app_module, monkeypatch, tmp_path):
+    conn = app_module.get_db_connection()
+    assert app_module.database_is_current(conn)
+
+    def fail():
+        raise AssertionError('init_db() ran on a current database')
+    monkeypatch.setattr(app_module, 'init_db', fail)
+    app_module.ensure_db()
+
+    # Switching the zone stats setting needs its triggers created or dropped
+    monkeypatch.setattr(app_module, 'USE_ZONE_STATS', False)
+    assert not app_module.database_is_current(conn)
+    conn.close()
+    assert not app_module.database_is_current(connect(str(tmp_path / 'new.db')))
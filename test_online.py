@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from backend.online import OnlineLearner
+from inference import SklearnClassifier
+from backend.train_model import load_csv, load_db
+
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'complaints_dataset.csv')
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.05)
+
+
+def test_online_learner_publishes_independent_snapshots():
+    texts, labels = load_csv(DATASET)
+    published = []
+    learner = OnlineLearner(sorted(set(labels)), on_update=published.append,
+                            bootstrap=lambda: (texts, labels), batch_size=2, flush_seconds=0.1,
+                            base_version='base')
+    learner.start()
+    wait_for(lambda: len(published) == 1)
+    first = published[0]
+    assert isinstance(first, SklearnClassifier)
+    assert first.version.startswith('base+online-') and first.version.endswith('-1')
+    assert first.predict(['Money deducted but order failed.']) == ['Payment / Refund Issue']
+    coef = first.model.coef_.copy()
+
+    assert not learner.add('my food was cold', 'Not a category')
+    assert learner.add('the rider was rude to me', 'Delivery Issue')
+    assert learner.add('charged twice for one order', 'Payment / Refund Issue')
+    wait_for(lambda: len(published) == 2)
+
+    assert published[1].version == first.version[:-1] + '2'
+    # Training continued on the learner's own model, not the served snapshot
+    np.testing.assert_array_equal(first.model.coef_, coef)
+    assert learner.stats()['samples'] == len(texts) + 2
+    assert learner.stats()['rejected'] == 1
+
+
+def test_versions_differ_per_process_and_bootstrap_is_capped(tmp_path):
+    learners = [OnlineLearner(['a', 'b'], on_update=None, base_version='base') for _ in range(2)]
+    assert learners[0]._boot_id != learners[1]._boot_id
+
+    path = str(tmp_path / 'c.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE complaints (id INTEGER PRIMARY KEY, text TEXT, category TEXT, status TEXT)")
+    conn.executemany("INSERT INTO complaints (text, category, status) VALUES (?, 'a', ?)",
+                     [(f'complaint {i}', 'Resolved' if i % 2 else 'Pending') for i in range(10)])
+    conn.commit()
+    conn.close()
+    assert load_db(path, ('Resolved',), limit=2) == (['complaint 7', 'complaint 9'], ['a', 'a'])
+    assert len(load_db(path, ('Resolved',))[0]) == 5
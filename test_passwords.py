@@ -0,0 +1,72 @@
+import pytest
+
+from passwords import AuthBusy, PasswordVerifier, hash_password, method_spec, needs_rehash, verify_password
+
+FAST = 'pbkdf2:sha256:1000'
+
+
+def test_policy_and_rehash():
+    assert method_spec('scrypt') == 'scrypt:32768:8:1'
+    assert method_spec('pbkdf2:sha1').startswith('pbkdf2:sha1:')
+    with pytest.raises(ValueError):
+        method_spec('md5')
+
+    stored = hash_password('pw', FAST)
+    assert not needs_rehash(stored, FAST)
+    assert verify_password(stored, 'pw', FAST) == (True, None)
+    assert verify_password(stored, 'nope', FAST) == (False, None)
+    # Policy changed: verified against the old hash, upgraded to the new one
+    ok, new_hash = verify_password(stored, 'pw', 'pbkdf2:sha256:2000')
+    assert ok and new_hash.startswith('pbkdf2:sha256:2000$')
+    # Legacy plaintext
+    ok, new_hash = verify_password('pw', 'pw', FAST)
+    assert ok and new_hash.startswith(FAST + '$')
+    assert verify_password('pw', 'PW', FAST) == (False, None)
+
+
+def test_verifier_process_pool_is_bounded():
+    verifier = PasswordVerifier(processes=1, max_pending=1, method=FAST)
+    try:
+        assert verifier.verify(hash_password('pw', FAST), 'pw') == (True, None)
+        verifier._slots.acquire()
+        with pytest.raises(AuthBusy):
+            verifier.verify(hash_password('pw', FAST), 'pw')
+        verifier._slots.release()
+    finally:
+        verifier.shutdown()
+
+
+def test_support_login_upgrades_plaintext(app_module, client, monkeypatch, master_headers):
+    monkeypatch.setattr(app_module, 'password_verifier', PasswordVerifier(processes=0, method=FAST))
+    conn = app_module.get_db_connection()
+    with conn:
+        conn.execute("INSERT INTO support_staff (username, password, role, zone_id) VALUES ('pw_l1', 'secret', 'L1', 1)")
+
+    def cached_password():
+        staff = client.get('/api/master/staff?zone_id=1', headers=master_headers(1)).get_json()
+        return next(s['password'] for s in staff if s['username'] == 'pw_l1')
+
+    assert cached_password() == 'secret'
+    assert client.post('/api/support/login', json={'username': 'pw_l1', 'password': 'wrong'}).status_code == 401
+    res = client.post('/api/support/login', json={'username': 'pw_l1', 'password': 'secret'})
+    assert res.status_code == 200
+    assert 'password' not in res.get_json()['user']
+    stored = conn.execute("SELECT password FROM support_staff WHERE username = 'pw_l1'").fetchone()[0]
+    assert stored.startswith(FAST + '$')
+    # The upgrade dropped the cached staff list holding the plaintext
+    assert cached_password() == stored
+    assert client.post('/api/support/login', json={'username': 'pw_l1', 'password': 'secret'}).status_code == 200
+
+    monkeypatch.setattr(app_module, 'password_verifier', PasswordVerifier(processes=0, max_pending=1, method=FAST))
+    app_module.password_verifier._slots.acquire()
+    res = client.post('/api/support/login', json={'username': 'pw_l1', 'password': 'secret'})
+    assert res.status_code == 503 and res.headers['Retry-After'] == '1'
+    conn.close()
+
+
+@pytest.mark.parametrize('path', ['/api/login', '/api/support/login', '/api/master/login', '/api/register'])
+@pytest.mark.parametrize('password', [123, ['pw'], {'pw': 1}])
+def test_non_string_password_is_rejected(client, path, password):
+    # Used to reach the hash/plaintext comparison and fail with a 500
+    for username in ('admin', 'pw_l1', 'chennai_admin'):
+        assert client.post(path, json={'username': username, 'password': password}).status_code == 400
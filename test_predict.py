@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.parametrize('item, index', [
+    ({'text': 5, 'user_id': 1}, 1),
+    ({'text': '   ', 'user_id': 1}, 1),
+    ({'text': 'late', 'user_id': [1]}, 1),
+    ({'text': 'late', 'user_id': 1, 'zone_id': {'id': 1}}, 1),
+    ({'text': 'late', 'user_id': 1, 'order_id': True}, 1),
+    ('late', 1),
+])
+def test_batch_rejects_malformed_items(client, item, index):
+    res = client.post('/api/predict/batch', json={'complaints': [{'text': 'Food was cold', 'user_id': 1}, item]})
+    assert res.status_code == 400
+    assert res.get_json()['index'] == index
+
+
+def test_batch_accepts_digit_string_ids(client):
+    res = client.post('/api/predict/batch', json={'complaints': [{'text': 'Food was cold', 'user_id': '1', 'zone_id': 2}]})
+    assert res.status_code == 200
+    assert res.get_json()['count'] == 1
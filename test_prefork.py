@@ -0,0 +1,48 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+PREFORK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'prefork.py')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_prefork_serves_and_shuts_down(app_module):
+    # Inherits COMPLAINTS_DB, so the workers use the session's test database
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, PREFORK, '--workers', '2', '--port', str(port), '--server', 'wsgi',
+                             '--report-after', '0'],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/zones', timeout=5) as res:
+                    assert res.status == 200 and isinstance(json.load(res), list)
+                break
+            except OSError:
+                assert proc.poll() is None and time.monotonic() < deadline, 'prefork did not start'
+                time.sleep(0.2)
+        proc.send_signal(signal.SIGUSR1)
+        time.sleep(1)
+        proc.send_signal(signal.SIGTERM)
+        output, _ = proc.communicate(timeout=30)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.communicate()
+
+    assert proc.returncode == 0, output
+    assert 'prefork: 2 wsgi workers' in output
+    report = output[output.rindex('process'):]
+    assert 'worker 0' in report and 'worker 1' in report and 'pss MB' in report
+    assert 'restarting' not in output
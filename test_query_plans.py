@@ -0,0 +1,127 @@
+"""
+Runs EXPLAIN QUERY PLAN on every SQL statement the API issues and fails if
+any of them walks the whole complaints or orders table.
+
+The statements are captured from the pooled connections while the requests
+below are served, so dynamically built queries are covered with the
+parameters the handlers actually bind.
+"""
+import re
+
+import pytest
+
+# Tables that must always be reached through an index
+GUARDED_TABLES = {'complaints', 'orders'}
+
+TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|SET\b|GROUP\b|ORDER\b)(\w+))?', re.I)
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING)')
+
+
+@pytest.fixture(scope='module')
+def seeded(app_module):
+    conn = app_module.get_db_connection()
+    with conn:
+        user_id = conn.execute("INSERT INTO users (username, password, role) VALUES ('plan_user', 'x', 'user')").lastrowid
+        order_id = conn.execute("INSERT INTO orders (user_id, restaurant_name, items, total_amount) VALUES (?, 'CTR', 'Idli', 100)",
+                                (user_id,)).lastrowid
+        complaint_id = conn.execute(
+            "INSERT INTO complaints (user_id, order_id, text, category, status, zone_id, department_id) VALUES (?, ?, 'late', 'Delivery Issue', 'Resolved', 1, 2)",
+            (user_id, order_id)).lastrowid
+    conn.close()
+    return {'user_id': user_id, 'order_id': order_id, 'complaint_id': complaint_id}
+
+
+def api_requests(seeded):
+    user_id, order_id, complaint_id = seeded['user_id'], seeded['order_id'], seeded['complaint_id']
+    return [
+        ('POST', '/api/register', {'username': 'plan_register', 'password': 'pw'}),
+        ('POST', '/api/login', {'username': 'plan_user', 'password': 'pw'}),
+        ('GET', '/api/restaurants', None),
+        ('POST', '/api/orders', {'user_id': user_id, 'restaurant_name': 'CTR', 'items': 'Dosa', 'total_amount': 80}),
+        ('GET', f'/api/orders?user_id={user_id}', None),
+        ('POST', '/api/predict', {'text': 'Food was cold', 'user_id': user_id, 'order_id': order_id}),
+        ('POST', '/api/predict/batch', {'complaints': [{'text': 'Refund pending', 'user_id': user_id}]}),
+        ('GET', f'/api/complaints?role=user&user_id={user_id}', None),
+        ('GET', '/api/complaints?role=admin', None),
+        ('GET', '/api/complaints?role=admin&category=Delivery%20Issue', None),
+        ('GET', '/api/complaints?role=admin&status=Resolved', None),
+        ('GET', '/api/complaints?role=admin&date=today', None),
+        ('GET', '/api/complaints?role=admin&date=yesterday', None),
+        ('GET', '/api/complaints?role=admin&days=7', None),
+        ('GET', '/api/complaints/export?zone_id=1&status=Resolved&days=7', None),
+        ('GET', '/api/complaints?role=admin&from=2026-01-01&to=2026-01-31', None),
+        ('GET', '/api/complaints?role=admin&limit=1&cursor={cursor}', None),
+        ('PUT', f'/api/complaints/{complaint_id}/status', {'status': 'Verified', 'admin_response_text': 'ok'}),
+        ('GET', '/api/stats', None),
+        ('GET', '/api/metrics', None),
+        ('GET', '/api/zones', None),
+        ('GET', '/api/departments', None),
+        ('POST', '/api/support/login', {'username': 'plan_l1', 'password': 'pw'}),
+        ('POST', '/api/master/login', {'username': 'chennai_admin', 'password': 'wrong'}),
+        ('GET', '/api/support/complaints?zone_id=1', None),
+        ('GET', '/api/support/complaints?zone_id=1&department_id=2', None),
+        ('GET', '/api/support/complaints?zone_id=1&limit=1&cursor={cursor}', None),
+        ('GET', '/api/support/stream?zone_id=1', None),
+        ('POST', '/api/support/action', {'complaint_id': complaint_id, 'action': 'Forward', 'department_id': 2}),
+        ('POST', '/api/support/action', {'complaint_id': complaint_id, 'action': 'Resolve', 'compensation_type': 'Refund', 'compensation_amount': 50}),
+        ('POST', '/api/support/action', {'complaint_id': complaint_id, 'action': 'Verify'}),
+        ('POST', '/api/master/staff', {'username': 'plan_l1', 'password': 'pw', 'role': 'L1', 'zone_id': 1}),
+        ('GET', '/api/master/staff?zone_id=1', None),
+        ('GET', '/api/master/stats?zone_id=1', None),
+        ('GET', '/api/master/model', None),
+    ]
+
+
+def full_scans(conn, sql):
+    aliases = {}
+    for table, alias in TABLE_ALIAS.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    scans = []
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'):
+        match = FULL_SCAN.match(row['detail'])
+        if match and aliases.get(match.group(1), match.group(1)) in GUARDED_TABLES:
+            scans.append(row['detail'])
+    return scans
+
+
+def test_no_full_table_scans(app_module, client, traced_queries, seeded, master_headers):
+    adapter = app_module.app.url_map.bind('localhost')
+    exercised = set()
+    cursor = app_module.encode_cursor({'timestamp': '2099-01-01 00:00:00', 'id': 10 ** 9})
+
+    for method, path, body in api_requests(seeded):
+        path = path.format(cursor=cursor)
+        exercised.add(adapter.match(path.split('?')[0], method=method)[0])
+        res = client.open(path, method=method, json=body, headers=master_headers(1))
+        assert res.status_code < 500, (path, res.get_data(as_text=True))
+        res.close()
+
+    # New API routes must be added to api_requests()
+    api_endpoints = {rule.endpoint for rule in app_module.app.url_map.iter_rules() if rule.rule.startswith('/api/')}
+    assert api_endpoints - exercised == set()
+
+    conn = app_module.get_db_connection()
+    failures = {}
+    for sql in set(traced_queries):
+        if not re.match(r'\s*(SELECT|UPDATE|DELETE|WITH)\b', sql, re.I):
+            continue
+        scans = full_scans(conn, sql)
+        if scans:
+            failures[sql] = scans
+    conn.close()
+
+    assert failures == {}
+
+
+def test_date_filters_use_timestamp_range(client, app_module, traced_queries):
+    for date_args in ('date=today', 'date=yesterday', 'days=30', 'from=2026-01-01&to=2026-01-31'):
+        del traced_queries[:]
+        assert client.get(f'/api/complaints?role=admin&{date_args}').status_code == 200
+        sql = next(q for q in traced_queries if 'FROM complaints c' in q)
+
+        conn = app_module.get_db_connection()
+        plan = [row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+        conn.close()
+        assert any(d.startswith('SEARCH c') and 'timestamp>?' in d and 'timestamp<?' in d for d in plan), (date_args, plan)
@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pytest
+
+from backend.registry import ModelRegistry
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'model_artifacts')
+
+
+@pytest.fixture
+def registry(app_module, tmp_path, monkeypatch):
+    for version in ('v1', 'v2'):
+        shutil.copytree(ARTIFACTS_DIR, tmp_path / version)
+    registry = ModelRegistry(str(tmp_path))
+    monkeypatch.setattr(app_module, 'model_registry', registry)
+    # Put the session's model back afterwards
+    monkeypatch.setattr(app_module, 'classifier', app_module.classifier)
+    return registry
+
+
+def test_reload_swaps_model_and_records_version(app_module, client, registry, master_headers):
+    assert registry.versions() == ['v1', 'v2']
+    with pytest.raises(ValueError):
+        registry.set_current('../v1')
+
+    registry.set_current('v2')
+    app_module.reload_model(registry.current())
+    assert app_module.classifier.version == 'v2'
+    assert app_module.model_reload_state['status'] == 'ready'
+
+    res = client.post('/api/predict', json={'text': 'Money deducted but order failed.', 'user_id': 1})
+    assert res.get_json()['model_version'] == 'v2'
+    row = app_module.get_db_connection().execute(
+        "SELECT model_version FROM complaints WHERE id = ?", (res.get_json()['id'],)).fetchone()
+    assert row[0] == 'v2'
+
+    res = client.get('/api/master/model', headers=master_headers())
+    assert res.get_json()['serving'] == 'v2'
+    assert res.get_json()['complaints_by_version']['v2'] == 1
+
+
+def test_model_switch_needs_master_and_no_online_learner(app_module, client, registry, master_headers, monkeypatch):
+    assert client.get('/api/master/model').status_code == 401
+    token = client.post('/api/master/login', json={'username': 'chennai_admin', 'password': 'admin123'}).get_json()['user']['token']
+    assert client.get('/api/master/model', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+    assert client.post('/api/master/model', json={'version': 'v1'},
+                       headers={'Authorization': 'Bearer forged'}).status_code == 401
+    assert client.post('/api/master/model', json={'version': 'v9'}, headers=master_headers()).status_code == 404
+
+    monkeypatch.setattr(app_module, 'online_learner', object())
+    res = client.post('/api/master/model', json={'version': 'v1'}, headers=master_headers())
+    assert res.status_code == 409
+    assert registry.current() is None
+
+
+def test_master_token_is_limited_to_its_zone(client):
+    login = client.post('/api/master/login', json={'username': 'chennai_admin', 'password': 'admin123'}).get_json()['user']
+    headers = {'Authorization': f"Bearer {login['token']}"}
+    other = 2 if login['zone_id'] != 2 else 3
+
+    assert client.get(f"/api/master/stats?zone_id={login['zone_id']}", headers=headers).status_code == 200
+    assert client.get('/api/master/stats', headers=headers).get_json() == \
+        client.get(f"/api/master/stats?zone_id={login['zone_id']}", headers=headers).get_json()
+    assert client.get(f'/api/master/stats?zone_id={other}', headers=headers).status_code == 403
+    assert client.get(f'/api/master/staff?zone_id={other}', headers=headers).status_code == 403
+    res = client.post('/api/master/staff', headers=headers,
+                      json={'username': 'zone_intruder', 'password': 'pw', 'role': 'L1', 'zone_id': other})
+    assert res.status_code == 403
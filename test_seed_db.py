@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from db import enable_zone_stats, ensure_change_versions
+from migrations import migrate
+from seed_db import seed_bulk
+
+# Generated columns; password salts and created_at defaults differ per run
+COLUMNS = {
+    'users': 'id, username, role',
+    'orders': '*',
+    'complaints': '*',
+    'complaint_compensation': '*',
+}
+
+
+def seeded(path, jobs):
+    conn = sqlite3.connect(path)
+    migrate(conn, log=lambda m: None)
+    enable_zone_stats(conn)
+    ensure_change_versions(conn)
+    conn.close()
+    # 101 complaints round up to 51 whole users, 102 complaints
+    seed_bulk(path, 101, jobs=jobs, chunk_users=4)
+    return sqlite3.connect(path)
+
+
+@pytest.fixture(scope='module')
+def databases(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('seed')
+    single, sharded = seeded(str(tmp / 'single.db'), 1), seeded(str(tmp / 'sharded.db'), 3)
+    yield single, sharded
+    single.close()
+    sharded.close()
+
+
+def test_bulk_seed_rounds_to_whole_users(databases):
+    single, _ = databases
+    assert single.execute("SELECT COUNT(*) FROM users WHERE username LIKE 'bulk\\_%' ESCAPE '\\'").fetchone()[0] == 51
+    assert single.execute("SELECT COUNT(*) FROM complaints").fetchone()[0] == 102
+    assert single.execute("SELECT COUNT(*), MIN(n), MAX(n) FROM (SELECT COUNT(*) as n FROM complaints GROUP BY user_id)").fetchone() == (51, 2, 2)
+
+
+def test_sharded_seed_matches_single_process(databases):
+    single, sharded = databases
+    for table, columns in COLUMNS.items():
+        rows = f"SELECT {columns} FROM {table} ORDER BY id"
+        assert single.execute(rows).fetchall() == sharded.execute(rows).fetchall(), table
+
+    for conn in databases:
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        # Ids are contiguous per table, zones included
+        for table in ('users', 'complaints'):
+            count, low, high = conn.execute(f"SELECT COUNT(*), MIN(id), MAX(id) FROM {table}").fetchone()
+            assert high - low + 1 == count, table
+        # Every complaint's order belongs to the complaining user
+        assert conn.execute("SELECT COUNT(*) FROM complaints c JOIN orders o ON o.id = c.order_id "
+                            "WHERE o.user_id = c.user_id").fetchone()[0] == 102
+        assert conn.execute("SELECT SUM(n) FROM zone_stats").fetchone()[0] == 102
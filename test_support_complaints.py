@@ -0,0 +1,116 @@
+import base64
+import json
+
+
+def seed_zone(app_module, zone_id, n_complaints):
+    conn = app_module.get_db_connection()
+    with conn:
+        user_id = conn.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                               (f'zone{zone_id}_user', 'x', 'user')).lastrowid
+        for i in range(n_complaints):
+            complaint_id = conn.execute(
+                "INSERT INTO complaints (user_id, text, category, status, zone_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, f'complaint {i}', 'Delivery Issue', 'Resolved', zone_id, f'2026-01-01 00:00:{i:02d}')
+            ).lastrowid
+            # Every other complaint gets two compensations
+            if i % 2 == 0:
+                for comp_type in ('Refund', 'Coupon'):
+                    conn.execute("INSERT INTO complaint_compensation (complaint_id, type, amount) VALUES (?, ?, ?)",
+                                 (complaint_id, comp_type, 50))
+    conn.close()
+
+
+def query_count(client, traced_queries, zone_id):
+    del traced_queries[:]
+    res = client.get(f'/api/support/complaints?zone_id={zone_id}')
+    assert res.status_code == 200
+    return len(traced_queries), res.get_json()
+
+
+def test_support_complaints_query_count_is_constant(app_module, client, traced_queries):
+    seed_zone(app_module, 101, 1)
+    seed_zone(app_module, 102, 40)
+
+    small_count, small = query_count(client, traced_queries, 101)
+    large_count, large = query_count(client, traced_queries, 102)
+
+    assert len(small) == 1
+    assert len(large) == 40
+    assert small_count == large_count
+
+
+def test_support_complaints_groups_compensations(app_module, client):
+    seed_zone(app_module, 103, 3)
+
+    complaints = client.get('/api/support/complaints?zone_id=103').get_json()
+
+    by_text = {c['text']: c for c in complaints}
+    assert [x['type'] for x in by_text['complaint 0']['compensations']] == ['Refund', 'Coupon']
+    assert by_text['complaint 1']['compensations'] == []
+    assert all(x['complaint_id'] == by_text['complaint 2']['id'] for x in by_text['complaint 2']['compensations'])
+
+
+def test_keyset_pages_cover_the_listing_once(app_module, client):
+    conn = app_module.get_db_connection()
+    with conn:
+        user_id = conn.execute("INSERT INTO users (username, password) VALUES ('pages_user', 'x')").lastrowid
+        # Three complaints share a timestamp, so the id breaks the tie; legacy
+        # rows without a timestamp come last and a page can end on one
+        for i, ts in enumerate(['2026-01-03 10:00:00'] * 3 + ['2026-01-02 10:00:00', '2026-01-04 10:00:00'] * 2 + [None] * 2):
+            conn.execute("INSERT INTO complaints (user_id, text, category, status, zone_id, timestamp) VALUES (?, ?, 'Delivery Issue', 'Pending', 104, ?)",
+                         (user_id, f'page {i}', ts))
+    conn.close()
+
+    everything = [c['id'] for c in client.get('/api/support/complaints?zone_id=104').get_json()]
+    assert len(everything) == 9
+
+    pages, url = [], '/api/support/complaints?zone_id=104&limit=2&fields=text,status'
+    while url:
+        body = client.get(url).get_json()
+        assert len(body['complaints']) <= 2
+        assert set(body['complaints'][0]) == {'id', 'timestamp', 'text', 'status'}
+        pages.append([c['id'] for c in body['complaints']])
+        url = body['next_cursor'] and f"/api/support/complaints?zone_id=104&limit=2&fields=text,status&cursor={body['next_cursor']}"
+    assert [complaint_id for page in pages for complaint_id in page] == everything
+    assert len(pages) == 5
+
+
+def test_listing_rejects_bad_page_arguments(client):
+    forged = base64.urlsafe_b64encode(json.dumps(['2026-01-01', 'x']).encode()).decode()
+    for query in ('fields=text,password', 'cursor=not-a-cursor', f'cursor={forged}', 'limit=abc', 'limit=0'):
+        assert client.get(f'/api/support/complaints?zone_id=104&{query}').status_code == 400, query
+        assert client.get(f'/api/complaints?role=admin&{query}').status_code == 400, query
+
+
+def test_events_carry_listing_rows(app_module, client):
+    subscription = app_module.event_broker.subscribe(105)
+    try:
+        res = client.post('/api/predict', json={'text': 'Food was cold', 'user_id': 1, 'zone_id': 105})
+        complaint_id = res.get_json()['id']
+        client.post('/api/support/action', json={'complaint_id': complaint_id, 'action': 'Resolve',
+                                                 'compensation_type': 'Refund', 'compensation_amount': 40})
+        created, updated = [event['data'] for event in subscription.drain()]
+    finally:
+        app_module.event_broker.unsubscribe(subscription)
+
+    listing = client.get('/api/support/complaints?zone_id=105').get_json()
+    assert updated == listing[0]
+    assert set(created) == set(updated)
+    assert created['status'] == 'Pending' and created['compensations'] == []
+    assert [c['type'] for c in updated['compensations']] == ['Refund']
+
+
+def test_forwarding_reaches_the_department_it_left(app_module, client):
+    department_1, department_2 = (app_module.event_broker.subscribe(106, d) for d in (1, 2))
+    try:
+        complaint_id = client.post('/api/predict', json={'text': 'Food was cold', 'user_id': 1, 'zone_id': 106}).get_json()['id']
+        for department_id in (1, 2):
+            client.post('/api/support/action', json={'complaint_id': complaint_id, 'action': 'Forward', 'department_id': department_id})
+        first = [event['data'] for event in department_1.drain()]
+        second = [event['data'] for event in department_2.drain()]
+    finally:
+        app_module.event_broker.unsubscribe(department_1)
+        app_module.event_broker.unsubscribe(department_2)
+
+    assert [(e['department_id'], e.get('previous_department_id')) for e in first] == [(1, None), (2, 1)]
+    assert [(e['department_id'], e.get('previous_department_id')) for e in second] == [(2, 1)]
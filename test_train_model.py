@@ -0,0 +1,55 @@
+import csv
+import json
+import os
+import sys
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import LinearSVC
+
+from backend import train_model
+
+WORDS = {
+    'Delivery Issue': 'rider late delivery',
+    'Food Quality Issue': 'cold stale taste',
+    'Payment / Refund Issue': 'refund charged payment',
+    'App Issue': 'app crash login',
+}
+
+
+def test_only_candidates_within_tolerance_are_refit(tmp_path, monkeypatch):
+    path = tmp_path / 'data.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['text', 'category'])
+        for category, words in WORDS.items():
+            for i in range(8):
+                writer.writerow([f'{words} order {i}', category])
+
+    # max_features=1 cannot tell four categories apart, so those two
+    # candidates fall outside the tolerance
+    monkeypatch.setattr(train_model, 'VECTORIZER_GRID', {'ngram_range': [(1, 1)], 'max_features': [1, None], 'sublinear_tf': [False]})
+    monkeypatch.setattr(train_model, 'CLASSIFIER_GRID', [(LogisticRegression, {'C': [10.0]}), (LinearSVC, {'C': [1.0]})])
+    refit = []
+    refit_and_cost = train_model.refit_and_cost
+
+    def recording_refit(candidate, *args):
+        refit.append(candidate)
+        return refit_and_cost(candidate, *args)
+
+    monkeypatch.setattr(train_model, 'refit_and_cost', recording_refit)
+    monkeypatch.setattr(sys, 'argv', ['train_model.py', '--csv', str(path), '--folds', '2', '--jobs', '1', '--out', str(tmp_path / 'models')])
+    train_model.main()
+
+    [version] = os.listdir(tmp_path / 'models')
+    with open(tmp_path / 'models' / version / 'training.json') as f:
+        training = json.load(f)
+    best = max(c['f1'] for c in training['candidates'])
+    eligible = [c for c in training['candidates'] if c['f1'] >= best - 0.005]
+    others = [c for c in training['candidates'] if c not in eligible]
+
+    assert len(eligible) == 2 and len(others) == 2
+    assert sorted(c[0]['max_features'] is None for c in refit) == [True, True]
+    assert all(c['latency_us'] is not None and c['size_bytes'] for c in eligible)
+    assert all(c['latency_us'] is None and c['size_bytes'] is None for c in others)
+    assert training['size_bytes'] == min(c['size_bytes'] for c in eligible)
+    assert training['vectorizer_params']['max_features'] is None
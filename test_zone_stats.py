@@ -0,0 +1,40 @@
+def zone_counts(conn, zone_id):
+    grouped = conn.execute(
+        "SELECT COALESCE(department_id, 0), COALESCE(status, ''), COUNT(*) FROM complaints WHERE zone_id = ? GROUP BY 1, 2",
+        (zone_id,)).fetchall()
+    counters = conn.execute("SELECT department_id, status, n FROM zone_stats WHERE zone_id = ? AND n > 0",
+                            (zone_id,)).fetchall()
+    return sorted(map(tuple, grouped)), sorted(map(tuple, counters))
+
+
+def test_zone_stats_counters_match_group_by(app_module, client, monkeypatch, master_headers):
+    conn = app_module.get_db_connection()
+    with conn:
+        user_id = conn.execute("INSERT INTO users (username, password) VALUES ('stats_user', 'x')").lastrowid
+        ids = [conn.execute("INSERT INTO complaints (user_id, text, category, status, zone_id, department_id) VALUES (?, 'x', 'Delivery Issue', ?, ?, ?)",
+                            (user_id, status, zone_id, dept)).lastrowid
+               for status, zone_id, dept in [('Pending', 401, None), ('Pending', 401, 1), ('Resolved', 401, 2),
+                                             ('Rejected', 401, None), ('Pending', 402, 1), (None, 401, None)]]
+        conn.execute("UPDATE complaints SET status = 'Forwarded to Department', department_id = 2 WHERE id = ?", (ids[0],))
+        conn.execute("UPDATE complaints SET status = 'Resolved' WHERE id = ?", (ids[1],))
+        conn.execute("UPDATE complaints SET zone_id = 402 WHERE id = ?", (ids[2],))
+        conn.execute("UPDATE complaints SET text = 'edited' WHERE id = ?", (ids[3],))
+        conn.execute("DELETE FROM complaints WHERE id = ?", (ids[4],))
+
+    for zone_id in (401, 402):
+        grouped, counters = zone_counts(conn, zone_id)
+        assert grouped == counters
+    # Turning the counters off and on again backfills the same numbers
+    app_module.disable_zone_stats(conn)
+    app_module.enable_zone_stats(conn)
+    assert zone_counts(conn, 401)[0] == zone_counts(conn, 401)[1]
+    conn.close()
+
+    stats = {}
+    for enabled in (True, False):
+        monkeypatch.setattr(app_module, 'USE_ZONE_STATS', enabled)
+        stats[enabled] = [client.get(f'/api/master/stats?zone_id={z}', headers=master_headers(z)).get_json() for z in (401, 402)]
+    assert stats[True] == stats[False]
+    zone_401, zone_402 = stats[True]
+    assert (zone_401['total'], zone_401['pending'], zone_401['resolved']) == (4, 1, 1)
+    assert (zone_402['total'], zone_402['pending'], zone_402['resolved']) == (1, 0, 1)